@@ -1,44 +1,82 @@
 """
 Database configuration for MongoDB Atlas
+One AsyncIOMotorClient per worker process, created at startup (after fork)
 """
-from pymongo import MongoClient
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 
+from app.services.circuit_breaker import db_breaker
+from app.services.metrics import mongo_metrics
+
+# Connection pool settings (per worker process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+
 mongo_client = None
 db = None
 
 async def connect_db():
     global mongo_client, db
     mongo_uri = os.getenv("MONGODB_URI")
-    
+
     if not mongo_uri:
         print("⚠️  MONGODB_URI not set - running without database")
         return
-    
+
     try:
         # Use motor for async MongoDB operations
         mongo_client = AsyncIOMotorClient(
             mongo_uri,
-            serverSelectionTimeoutMS=5000
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            event_listeners=[mongo_metrics]
         )
-        
-        # Test connection
-        await mongo_client.admin.command('ping')
-        
+
         # Get database name from connection string
         db = mongo_client.get_default_database()
-        print(f"✓ MongoDB connected: {db.name}")
-        
+
     except Exception as e:
         print(f"❌ MongoDB connection failed: {str(e)}")
         mongo_client = None
         db = None
+        return
+
+    try:
+        # Test connection
+        await mongo_client.admin.command('ping')
+        await warm_pool()
+        print(f"✓ MongoDB connected: {db.name} (pool {MONGO_MIN_POOL_SIZE}-{MONGO_MAX_POOL_SIZE})")
+
+    except Exception as e:
+        # Keep the client: the driver reconnects by itself, and meanwhile
+        # the open circuit serves last-known-good data instead of waiting
+        db_breaker.trip()
+        print(f"❌ MongoDB unreachable ({e}) - serving last-known-good data until it recovers")
+
+async def warm_pool():
+    """
+    Open minPoolSize connections now instead of on the first requests.
+    Concurrent pings each check out their own pooled connection.
+    """
+    if mongo_client is None or MONGO_MIN_POOL_SIZE <= 0:
+        return
+    await asyncio.gather(*[
+        mongo_client.admin.command('ping') for _ in range(MONGO_MIN_POOL_SIZE)
+    ])
 
 async def close_db():
-    global mongo_client
+    global mongo_client, db
     if mongo_client:
         mongo_client.close()
+        mongo_client = None
+        db = None
         print("✓ MongoDB connection closed")
 
 def get_database():
@@ -0,0 +1,281 @@
+"""
+Index definitions - Every index the service's queries rely on, ensured at startup
+Also a query-plan audit: runs explain() for each query shape the services
+issue and flags collection scans, in-memory sorts and queries that examine
+far more documents than they return. Run from backend/flask-service:
+    python -m app.config.indexes --uri mongodb://localhost:27017/fooddelivery_bench --ensure
+Exits 1 when a declared index is missing or a query shape fails the audit,
+so CI catches a missing index before production does.
+--ensure also backfills restaurants' GeoJSON address.location (a one-off
+migration; ingest writes it for new rows), which startup never does.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel, MongoClient
+from pymongo.errors import PyMongoError
+
+from app.models.serializers import MENU_ITEM_PROJECTION, RESTAURANT_PROJECTION
+from app.services.menu_service import MENU_SORT
+
+ENSURE_INDEXES = os.getenv("ENSURE_INDEXES", "true").lower() != "false"
+# A query may examine this many documents per document returned
+AUDIT_MAX_EXAMINED_RATIO = float(os.getenv("AUDIT_MAX_EXAMINED_RATIO", "10"))
+
+# Equality fields first, then the sort, then ranges (keyset pages and
+# rating filters are ranges on the sort keys)
+INDEXES: Dict[str, List[IndexModel]] = {
+    "restaurants": [
+        IndexModel([("isActive", ASCENDING), ("rating", DESCENDING), ("_id", ASCENDING)]),
+        IndexModel([("isActive", ASCENDING), ("cuisine", ASCENDING), ("rating", DESCENDING), ("_id", ASCENDING)]),
+        IndexModel([("updatedAt", ASCENDING)]),
+        IndexModel([("address.location", GEOSPHERE)]),
+    ],
+    "menuItems": [
+        IndexModel([("restaurantId", ASCENDING), ("isAvailable", ASCENDING),
+                    ("category", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("updatedAt", ASCENDING)]),
+    ],
+    "deliveryEvents": [
+        IndexModel([("orderId", ASCENDING), ("version", ASCENDING)]),
+    ],
+    "deliveryPartners": [
+        IndexModel([("orderId", ASCENDING)]),
+    ],
+}
+
+# Restaurants store address.coordinates as {lat, lng}, which a 2dsphere index
+# would read as (longitude, latitude) in field order. address.location keeps
+# a GeoJSON copy for the geo index; this re-syncs it wherever it differs.
+LOCATION_FILTER = {
+    "address.coordinates.lat": {"$type": "number"},
+    "address.coordinates.lng": {"$type": "number"},
+    "$expr": {"$ne": [
+        "$address.location.coordinates",
+        ["$address.coordinates.lng", "$address.coordinates.lat"]
+    ]},
+}
+LOCATION_UPDATE = [{"$set": {"address.location": {
+    "type": "Point",
+    "coordinates": ["$address.coordinates.lng", "$address.coordinates.lat"],
+}}}]
+
+
+def location_point(address: Optional[dict]) -> Optional[dict]:
+    """
+    GeoJSON point for an address's {lat, lng} coordinates, or None
+    """
+    coordinates = (address or {}).get("coordinates") or {}
+    lat, lng = coordinates.get("lat"), coordinates.get("lng")
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+async def ensure_indexes(db) -> int:
+    """
+    Create any declared index that does not exist yet (existing ones are a
+    no-op); returns how many collections failed
+    """
+    failed = 0
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except PyMongoError as e:
+            failed += 1
+            print(f"❌ Index creation on {collection} failed: {e}")
+    if not failed:
+        print(f"✓ Indexes ensured on {len(INDEXES)} collections")
+    return failed
+
+
+class QueryShape:
+    """
+    One query the services issue. build_filter(sample) returns the filter,
+    given a document from the collection to take realistic values from.
+    """
+
+    def __init__(self, name: str, collection: str, build_filter: Callable[[dict], dict],
+                 sort: Optional[list] = None, projection: Optional[dict] = None,
+                 limit: int = 0, allow_collscan: bool = False):
+        self.name = name
+        self.collection = collection
+        self.build_filter = build_filter
+        self.sort = sort
+        self.projection = projection
+        self.limit = limit
+        self.allow_collscan = allow_collscan
+
+
+def _recently() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=5)
+
+
+def _first_cuisine(sample: dict) -> Optional[str]:
+    return (sample.get("cuisine") or [None])[0]
+
+
+RESTAURANT_SORT = [("rating", -1), ("_id", 1)]
+
+QUERY_SHAPES: List[QueryShape] = [
+    # CatalogIndex
+    QueryShape("catalog.load", "restaurants", lambda s: {}, projection=RESTAURANT_PROJECTION,
+               allow_collscan=True),
+    QueryShape("catalog.delta", "restaurants", lambda s: {"updatedAt": {"$gt": _recently()}},
+               projection=RESTAURANT_PROJECTION),
+    # RestaurantService
+    QueryShape("restaurants.get", "restaurants", lambda s: {"_id": {"$in": [s["_id"], str(s["_id"])]}},
+               projection=RESTAURANT_PROJECTION, limit=1),
+    QueryShape("restaurants.batch", "restaurants", lambda s: {"_id": {"$in": [s["_id"]]}},
+               projection=RESTAURANT_PROJECTION),
+    QueryShape("restaurants.stream", "restaurants", lambda s: {"isActive": True},
+               sort=RESTAURANT_SORT, projection=RESTAURANT_PROJECTION),
+    QueryShape("restaurants.stream.cuisine", "restaurants",
+               lambda s: {"isActive": True, "cuisine": _first_cuisine(s), "rating": {"$gte": 4.0}},
+               sort=RESTAURANT_SORT, projection=RESTAURANT_PROJECTION),
+    QueryShape("restaurants.stream.after", "restaurants", lambda s: {"$and": [
+        {"isActive": True},
+        {"$or": [{"rating": {"$lt": s.get("rating", 0)}}, {"rating": s.get("rating", 0), "_id": {"$gt": s["_id"]}}]},
+    ]}, sort=RESTAURANT_SORT, projection=RESTAURANT_PROJECTION),
+    # MenuService
+    QueryShape("menu.items", "menuItems",
+               lambda s: {"restaurantId": s.get("restaurantId"), "isAvailable": True},
+               sort=MENU_SORT, projection=MENU_ITEM_PROJECTION),
+    QueryShape("menu.batch", "menuItems",
+               lambda s: {"restaurantId": {"$in": [s.get("restaurantId")]}, "isAvailable": True},
+               sort=MENU_SORT, projection=MENU_ITEM_PROJECTION),
+    QueryShape("menu.stream.after", "menuItems", lambda s: {
+        "restaurantId": s.get("restaurantId"), "isAvailable": True,
+        "$or": [{"category": {"$gt": s.get("category")}}, {"category": s.get("category"), "_id": {"$gt": s["_id"]}}],
+    }, sort=MENU_SORT, projection=MENU_ITEM_PROJECTION),
+    # SearchIndex / MenuChangeFeed
+    QueryShape("search.load", "menuItems", lambda s: {"isAvailable": True}, allow_collscan=True),
+    QueryShape("menu.feed.delta", "menuItems", lambda s: {"updatedAt": {"$gt": _recently()}},
+               sort=[("updatedAt", 1)]),
+    # DeliveryStatusTracker / DeliveryService
+    QueryShape("delivery.state", "deliveries", lambda s: {"_id": s["_id"]}, limit=1),
+    QueryShape("delivery.write", "deliveries", lambda s: {"_id": s["_id"], "status": s.get("status"),
+                                                          "version": s.get("version", 0)}),
+    QueryShape("delivery.events", "deliveryEvents", lambda s: {"orderId": s.get("orderId")},
+               sort=[("version", 1)], limit=100),
+    QueryShape("partners.claim", "deliveryPartners",
+               lambda s: {"_id": s["_id"], "orderId": {"$in": [None, s.get("orderId")]}}),
+    QueryShape("partners.release", "deliveryPartners", lambda s: {"orderId": s.get("orderId")}),
+]
+
+
+def _stages(plan: dict):
+    """
+    Every stage in a winning plan (classic and slot-based engine layouts)
+    """
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", ()):
+        yield from _stages(child)
+
+
+def explain_shape(db, shape: QueryShape, sample: dict) -> dict:
+    command = {"find": shape.collection, "filter": shape.build_filter(sample)}
+    if shape.sort:
+        command["sort"] = dict(shape.sort)
+    if shape.projection:
+        command["projection"] = shape.projection
+    if shape.limit:
+        command["limit"] = shape.limit
+    explained = db.command({"explain": command, "verbosity": "executionStats"})
+    stages = set(_stages(explained["queryPlanner"]["winningPlan"]))
+    stats = explained["executionStats"]
+
+    problems = []
+    if "COLLSCAN" in stages and not shape.allow_collscan:
+        problems.append("COLLSCAN")
+    if "SORT" in stages:
+        problems.append("in-memory SORT")
+    examined, returned = stats["totalDocsExamined"], stats["nReturned"]
+    if examined > AUDIT_MAX_EXAMINED_RATIO * max(returned, 1) and not shape.allow_collscan:
+        problems.append(f"examined {examined} docs for {returned}")
+    return {
+        "name": shape.name,
+        "stages": sorted(s for s in stages if s),
+        "keysExamined": stats["totalKeysExamined"],
+        "docsExamined": examined,
+        "returned": returned,
+        "problems": problems,
+    }
+
+
+def _key(spec: dict) -> tuple:
+    return tuple((field, kind if isinstance(kind, str) else int(kind)) for field, kind in spec.items())
+
+
+def missing_indexes(db) -> List[str]:
+    missing = []
+    for collection, models in INDEXES.items():
+        existing = {_key(info["key"]) for info in db[collection].list_indexes()}
+        for model in models:
+            key = _key(model.document["key"])
+            if key not in existing:
+                missing.append(f"{collection} {dict(key)}")
+    return missing
+
+
+def audit(db) -> int:
+    """
+    Print the audit report; returns the number of problems found
+    """
+    problems = 0
+    for name in missing_indexes(db):
+        problems += 1
+        print(f"❌ missing index: {name}")
+
+    samples: Dict[str, Optional[dict]] = {}
+    for shape in QUERY_SHAPES:
+        if shape.collection not in samples:
+            samples[shape.collection] = db[shape.collection].find_one()
+        sample = samples[shape.collection]
+        if sample is None:
+            print(f"⚠️  {shape.name:<28} skipped: {shape.collection} is empty")
+            continue
+        result = explain_shape(db, shape, sample)
+        line = (f"{shape.name:<28} {'+'.join(result['stages']):<32} keys {result['keysExamined']:>7} "
+                f"docs {result['docsExamined']:>7} returned {result['returned']:>7}")
+        if result["problems"]:
+            problems += len(result["problems"])
+            print(f"❌ {line}  {'; '.join(result['problems'])}")
+        else:
+            print(f"✓ {line}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/fooddelivery_bench"))
+    parser.add_argument("--ensure", action="store_true", help="create the declared indexes before auditing")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    db = client.get_default_database()
+    try:
+        if args.ensure:
+            # Idempotent: only restaurants whose copy is missing or stale match
+            synced = db.restaurants.update_many(LOCATION_FILTER, LOCATION_UPDATE).modified_count
+            print(f"✓ Synced address.location on {synced} restaurants")
+            for collection, models in INDEXES.items():
+                db[collection].create_indexes(models)
+        problems = audit(db)
+    except PyMongoError as e:
+        print(f"❌ {e}")
+        problems = 1
+    finally:
+        client.close()
+    print(f"{'✓ Query plans OK' if not problems else f'❌ {problems} problem(s)'}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
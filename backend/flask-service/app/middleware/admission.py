@@ -0,0 +1,58 @@
+"""
+Admission middleware - Sheds requests its route class has no room for
+Runs before the body is read or converted, so a rejected request costs a
+path lookup and a canned 503 with Retry-After
+"""
+import time
+
+from app.services.admission import ADMISSION_RETRY_AFTER, admission_controller
+
+
+class AdmissionMiddleware:
+
+    def __init__(self, app, controller=admission_controller, retry_after: int = ADMISSION_RETRY_AFTER):
+        self.app = app
+        self.controller = controller
+        self.retry_after = str(retry_after).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = self.controller.classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        if not route_class.try_acquire():
+            await self._reject(send, route_class.name)
+            return
+
+        latency = None
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal latency
+            # Time to the response head, so streamed bodies are not counted
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route_class.release()
+            if latency is not None:
+                self.controller.observe(route_class, latency)
+
+    async def _reject(self, send, name: str):
+        body = b'{"detail":"Service busy: ' + name.encode() + b' requests are being shed"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
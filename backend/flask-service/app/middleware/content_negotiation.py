@@ -0,0 +1,107 @@
+"""
+Content negotiation middleware - MessagePack as an alternative to JSON
+Requests sending Accept: application/msgpack get FastJSONResponse bodies
+packed as MessagePack instead. Request bodies sent as application/msgpack
+are converted to JSON before routing, so every JSON endpoint accepts them
+unchanged. Plain ASGI, like the other middlewares.
+"""
+from typing import Optional
+
+import msgpack
+from fastapi.responses import JSONResponse
+
+from app.routes.responses import MSGPACK_MEDIA_TYPES, dumps, wants_msgpack
+
+_MSGPACK_TYPES = tuple(media_type.encode() for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def prefers_msgpack(accept: Optional[bytes]) -> bool:
+    """
+    Whether an Accept header ranks MessagePack at least as high as JSON
+    """
+    if not accept or b"msgpack" not in accept:
+        return False
+    msgpack_q = json_q = 0.0
+    for entry in accept.decode("latin-1").split(","):
+        media_type, _, params = entry.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type.encode() in _MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, _quality(params))
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, _quality(params))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+class ContentNegotiationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = content_type = None
+        for name, value in scope["headers"]:
+            if name == b"accept":
+                accept = value
+            elif name == b"content-type":
+                content_type = value
+
+        token = wants_msgpack.set(True) if prefers_msgpack(accept) else None
+        try:
+            if content_type is not None and content_type.split(b";")[0].strip().lower() in _MSGPACK_TYPES:
+                scope, receive = await self._as_json(scope, receive, send)
+                if scope is None:
+                    return
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                wants_msgpack.reset(token)
+
+    async def _as_json(self, scope, receive, send):
+        """
+        Read a MessagePack body and replay it as JSON; answers 400 itself
+        (returning None) when the body does not decode
+        """
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None, None
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        try:
+            body = dumps(msgpack.unpackb(b"".join(chunks), strict_map_key=False))
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            response = JSONResponse({"detail": f"Invalid MessagePack body ({type(e).__name__})"}, status_code=400)
+            await response(scope, receive, send)
+            return None, None
+
+        headers = [(name, value) for name, value in scope["headers"]
+                   if name not in (b"content-type", b"content-length")]
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return dict(scope, headers=headers), replay
@@ -0,0 +1,48 @@
+"""
+Metrics middleware - Records request count, in-flight and latency per route
+Plain ASGI (no BaseHTTPMiddleware) so the only per-request work is two
+perf_counter calls and a dict lookup
+"""
+import time
+
+from app.services.metrics import UNMATCHED_ROUTE, request_metrics
+
+
+class MetricsMiddleware:
+    """
+    Labels requests by the matched route template, e.g.
+    /internal/menu/{restaurant_id}, which FastAPI stores on the scope while
+    routing. Requests that match no route share one label.
+    """
+
+    def __init__(self, app, metrics=request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - started
+            )
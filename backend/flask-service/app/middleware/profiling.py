@@ -0,0 +1,48 @@
+"""
+Slow request middleware - Hands requests over SLOW_REQUEST_MS to the recorder
+Debug endpoints are skipped; /internal/debug/profile is slow on purpose
+"""
+import time
+
+from app.services.profiler import slow_requests
+
+
+class SlowRequestMiddleware:
+    def __init__(self, app, recorder=slow_requests):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or self.recorder.threshold <= 0
+                or scope["path"].startswith("/internal/debug/")):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        event_stream = False
+
+        async def send_with_status(message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        event_stream = True
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Live tracking streams stay open by design
+            if not event_stream:
+                route = scope.get("route")
+                self.recorder.record(
+                    scope["method"],
+                    scope["path"],
+                    route.path if route is not None else None,
+                    scope.get("endpoint"),
+                    status,
+                    started,
+                    time.perf_counter()
+                )
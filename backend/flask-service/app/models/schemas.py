@@ -27,10 +27,15 @@ class Restaurant(BaseModel):
     image: Optional[str] = None
     tags: List[str] = []
     priceRange: str = "$$"
+    prepTime: Optional[int] = None
+    deliveryRadius: Optional[float] = None
 
     class Config:
         populate_by_name = True
 
+class NearbyRestaurant(Restaurant):
+    distanceKm: float
+
 class MenuItem(BaseModel):
     id: str = Field(alias="_id")
     restaurantId: str
@@ -46,22 +51,42 @@ class MenuItem(BaseModel):
     class Config:
         populate_by_name = True
 
+class BatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
 class DeliveryAddress(BaseModel):
     line1: str
     line2: Optional[str] = None
     city: str
     state: Optional[str] = None
     pincode: str
+    coordinates: Optional[dict] = None
 
 class ETARequest(BaseModel):
     restaurantId: str
     deliveryAddress: DeliveryAddress
 
+class ETABatchItem(BaseModel):
+    restaurantId: str
+    deliveryAddress: Optional[DeliveryAddress] = None
+
+class ETABatchRequest(BaseModel):
+    # Used for every pair that doesn't carry its own deliveryAddress
+    deliveryAddress: Optional[DeliveryAddress] = None
+    pairs: List[ETABatchItem] = Field(..., min_length=1, max_length=10000)
+
 class DeliveryAssignment(BaseModel):
     orderId: str
     restaurantId: str
     deliveryAddress: DeliveryAddress
 
+class PartnerLocationUpdate(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    available: Optional[bool] = None
+    name: Optional[str] = None
+    phone: Optional[str] = None
+
 class DeliveryStatusUpdate(BaseModel):
     status: str
     
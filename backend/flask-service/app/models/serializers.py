@@ -0,0 +1,82 @@
+"""
+Serializers - Mongo projections and pre-shaped response dicts
+Shapes documents exactly like the Restaurant / MenuItem response models
+would, without a Pydantic round-trip on every request
+"""
+from typing import Optional
+
+from app.models.schemas import Restaurant, MenuItem
+
+# Only the fields the response models expose (plus updatedAt, which the
+# catalog index uses for delta polling); timings, createdAt, __v and other
+# write-side fields are never decoded from BSON
+RESTAURANT_PROJECTION = {
+    field.alias or name: 1 for name, field in Restaurant.model_fields.items()
+}
+RESTAURANT_PROJECTION["updatedAt"] = 1
+
+MENU_ITEM_PROJECTION = {"createdAt": 0, "updatedAt": 0, "__v": 0}
+
+_RESTAURANT_DEFAULTS = {
+    "description": None,
+    "cuisine": [],
+    "rating": 0.0,
+    "totalRatings": 0,
+    "eta": 30,
+    "address": None,
+    "contact": None,
+    "isActive": True,
+    "image": None,
+    "tags": [],
+    "priceRange": "$$",
+    "prepTime": None,
+    "deliveryRadius": None,
+}
+
+_ADDRESS_FIELDS = ("line1", "line2", "city", "state", "pincode", "coordinates")
+
+_MENU_ITEM_DEFAULTS = {
+    "description": None,
+    "image": None,
+    "isVeg": True,
+    "isAvailable": True,
+    "tags": [],
+}
+
+
+def _shape_address(address: Optional[dict]) -> Optional[dict]:
+    if not address:
+        return None
+    return {field: address.get(field) for field in _ADDRESS_FIELDS}
+
+
+def shape_restaurant(doc: dict) -> dict:
+    """
+    Restaurant document -> the dict Restaurant(...).model_dump(by_alias=True)
+    would produce
+    """
+    shaped = {"_id": str(doc.get("_id", doc.get("id"))), "name": doc.get("name")}
+    for field, default in _RESTAURANT_DEFAULTS.items():
+        value = doc.get(field)
+        shaped[field] = default if value is None else value
+    shaped["rating"] = float(shaped["rating"])
+    shaped["address"] = _shape_address(shaped["address"])
+    return shaped
+
+
+def shape_menu_item(doc: dict) -> dict:
+    """
+    Menu item document -> the dict MenuItem(...).model_dump(by_alias=True)
+    would produce
+    """
+    shaped = {
+        "_id": str(doc.get("_id", doc.get("id"))),
+        "restaurantId": str(doc.get("restaurantId")),
+        "name": doc.get("name"),
+        "category": doc.get("category"),
+        "price": float(doc.get("price") or 0),
+    }
+    for field, default in _MENU_ITEM_DEFAULTS.items():
+        value = doc.get(field)
+        shaped[field] = default if value is None else value
+    return shaped
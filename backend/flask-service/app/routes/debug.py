@@ -0,0 +1,69 @@
+"""
+Debug routes - Admin-only profiling endpoints for the live worker
+Disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+"""
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from app.services.admission import ADMISSION_CONTROL, admission_controller
+from app.services.profiler import PROFILE_MAX_SECONDS, loop_monitor, render_collapsed, slow_requests
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    idle: bool = Query(False, description="include samples where the loop was waiting on I/O")
+):
+    """
+    Sample the event loop for `seconds` and return collapsed stacks
+    ("frame;frame;frame count" per line) for flamegraph.pl or speedscope
+    """
+    if not loop_monitor.running:
+        raise HTTPException(status_code=503, detail="Profiler is disabled (PROFILER_SAMPLE_MS=0)")
+    folded, total = await loop_monitor.profile(seconds, include_idle=idle)
+    return PlainTextResponse(render_collapsed(folded), headers={"X-Profile-Samples": str(total)})
+
+@router.get("/slow-requests")
+async def get_slow_requests():
+    """
+    Most recent requests over SLOW_REQUEST_MS with their stack breakdown
+    """
+    return {
+        "thresholdMs": slow_requests.threshold * 1000,
+        "count": slow_requests.count,
+        "requests": list(reversed(slow_requests.entries)),
+    }
+
+@router.get("/loop-blocks")
+async def get_loop_blocks():
+    """
+    Most recent event-loop stalls over LOOP_BLOCK_MS with the blocking stack
+    """
+    return {
+        **loop_monitor.stats(),
+        "blocks": list(reversed(loop_monitor.blocks)),
+    }
+
+@router.get("/admission")
+async def get_admission():
+    """
+    Concurrency limit, in-flight and shed counts per route class
+    """
+    return {
+        "enabled": ADMISSION_CONTROL,
+        "classes": admission_controller.stats(),
+    }
@@ -1,8 +1,18 @@
 """
 Delivery routes - Internal endpoints for delivery management
 """
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import ETARequest, DeliveryAssignment, DeliveryStatusUpdate
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.models.schemas import (
+    ETARequest, ETABatchRequest, DeliveryAssignment, DeliveryStatusUpdate, PartnerLocationUpdate
+)
+from app.routes.responses import dumps, service_unavailable
+from app.services.circuit_breaker import DatabaseUnavailable
+from app.services.partner_registry import partner_registry
+from app.services.assignment_scheduler import assignment_scheduler
+from app.services.delivery_status import InvalidTransition, StatusConflict, TERMINAL_STATUSES, delivery_status
+from app.services.tracking_hub import END_EVENT, TRACKING_KEEPALIVE_SECONDS, tracking_hub
 from app.services.delivery_service import DeliveryService
 
 router = APIRouter()
@@ -19,6 +29,28 @@ async def calculate_eta(request: ETARequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/eta/batch")
+async def calculate_eta_batch(request: ETABatchRequest):
+    """
+    Calculate estimated delivery times for many (restaurant, destination) pairs
+    """
+    try:
+        pairs = [(p.restaurantId, p.deliveryAddress or request.deliveryAddress) for p in request.pairs]
+        etas = await service.calculate_etas(pairs)
+        return {
+            "etas": [{"restaurantId": rid, "eta": eta} for (rid, _), eta in zip(pairs, etas)],
+            "unit": "minutes"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/eta/cache/stats")
+async def get_eta_cache_stats():
+    """
+    ETA cache size and hit rate
+    """
+    return service.eta_cache_stats()
+
 @router.post("/delivery/assign")
 async def assign_delivery(assignment: DeliveryAssignment):
     """
@@ -27,9 +59,147 @@ async def assign_delivery(assignment: DeliveryAssignment):
     try:
         result = await service.assign_delivery(assignment)
         return result
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/partners/{partner_id}/location")
+async def update_partner_location(partner_id: str, update: PartnerLocationUpdate):
+    """
+    Record a delivery partner's live position
+    """
+    return await service.update_partner_location(
+        partner_id, update.lat, update.lng, update.available, update.name, update.phone
+    )
+
+@router.get("/partners/nearby")
+async def get_nearby_partners(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100)
+):
+    """
+    Nearest available delivery partners to a point
+    """
+    return {"partners": service.get_nearby_partners(lat, lng, k)}
+
+@router.get("/partners/stats")
+async def get_partner_stats():
+    """
+    Partner registry size and availability
+    """
+    return partner_registry.stats()
+
+@router.get("/delivery/scheduler/stats")
+async def get_scheduler_stats():
+    """
+    Batch assignment scheduler counters
+    """
+    return assignment_scheduler.stats()
+
+@router.get("/delivery/status/stats")
+async def get_status_stats():
+    """
+    Status transition counters and write buffer stats
+    """
+    return delivery_status.stats()
+
+@router.get("/delivery/{order_id}")
+async def get_delivery_status(order_id: str):
+    """
+    Current delivery status
+    """
+    try:
+        return await service.get_delivery_status(order_id)
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/delivery/{order_id}/events")
+async def get_delivery_events(order_id: str):
+    """
+    Delivery status history, oldest first
+    """
+    try:
+        events = await service.get_delivery_events(order_id)
+        return {"orderId": order_id, "events": events}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tracking/stats")
+async def get_tracking_stats():
+    """
+    Live tracking subscriber and fan-out counters
+    """
+    return tracking_hub.stats()
+
+@router.get("/delivery/{order_id}/stream")
+async def stream_delivery(order_id: str):
+    """
+    Live delivery updates as server-sent events: a snapshot, then status,
+    assigned and location events, ending with an end event once the order
+    is delivered or cancelled
+    """
+    subscription = tracking_hub.subscribe(order_id)
+    try:
+        snapshot = await service.get_tracking_snapshot(order_id)
+    except Exception as e:
+        tracking_hub.unsubscribe(subscription)
+        raise HTTPException(status_code=500, detail=str(e))
+    if snapshot["status"] in TERMINAL_STATUSES:
+        subscription.close()
+    return StreamingResponse(
+        tracking_hub.sse_stream(subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/delivery/{order_id}/ws")
+async def track_delivery(websocket: WebSocket, order_id: str):
+    """
+    Same events as /stream over a WebSocket, one JSON frame per event
+    """
+    await websocket.accept()
+    subscription = tracking_hub.subscribe(order_id)
+
+    async def watch_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscription.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        snapshot = await service.get_tracking_snapshot(order_id)
+        await websocket.send_text(dumps({"type": "snapshot", "data": snapshot}).decode())
+        if snapshot["status"] in TERMINAL_STATUSES:
+            return
+        while True:
+            event = await subscription.next(TRACKING_KEEPALIVE_SECONDS)
+            if event is None:
+                if subscription.closed:
+                    break
+                await websocket.send_text('{"type":"keepalive"}')
+                continue
+            await websocket.send_text(event.frame)
+            if event.type == END_EVENT:
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        tracking_hub.unsubscribe(subscription)
+        if not subscription.closed:
+            try:
+                await websocket.close()
+            except RuntimeError:
+                pass
+
 @router.patch("/delivery/{order_id}")
 async def update_delivery_status(order_id: str, update: DeliveryStatusUpdate):
     """
@@ -38,5 +208,9 @@ async def update_delivery_status(order_id: str, update: DeliveryStatusUpdate):
     try:
         result = await service.update_delivery_status(order_id, update.status)
         return result
+    except (InvalidTransition, StatusConflict) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,61 @@
+"""
+Ingest routes - Admin-only bulk upsert of restaurants and menu items
+The request body is streamed (CSV or JSONL) and written as it arrives
+"""
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.config.database import get_database
+from app.routes.debug import require_admin
+from app.routes.responses import FastJSONResponse, service_unavailable
+from app.services.circuit_breaker import DatabaseUnavailable, db_breaker
+from app.services.ingest import KINDS, ingest, parse, refresh
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# One ingest per worker at a time
+ingest_lock = asyncio.Lock()
+
+FORMAT_BY_MEDIA_TYPE = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+@router.post("/{kind}", response_class=FastJSONResponse)
+async def ingest_rows(
+    kind: str,
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or jsonl; defaults from Content-Type")
+):
+    """
+    Validate and upsert every row of the body by _id; kind is restaurants
+    or menu. Bad rows are listed in the report and skipped.
+    """
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown kind {kind!r}")
+    if format is None:
+        media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = FORMAT_BY_MEDIA_TYPE.get(media_type)
+        if format is None:
+            raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    db = get_database()
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    if not db_breaker.closed:
+        raise service_unavailable(DatabaseUnavailable("mongodb circuit open", db_breaker.retry_after()))
+    if ingest_lock.locked():
+        raise HTTPException(status_code=409, detail="An ingest is already running on this worker")
+
+    async with ingest_lock:
+        try:
+            report = await ingest(db, kind, parse(format, request.stream()))
+            await refresh(db, kind)
+            return FastJSONResponse(report.to_dict())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
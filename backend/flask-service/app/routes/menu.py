@@ -1,32 +1,160 @@
 """
 Menu routes - Internal endpoints for menu management
 """
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import MenuItem
-from app.services.menu_service import MenuService
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from app.models.schemas import MenuItem, BatchRequest
+from app.models.serializers import shape_menu_item
+from app.routes.responses import (FastJSONResponse, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE, accepts_gzip,
+                                  etag_matches, ndjson_stream, service_unavailable, wants_msgpack)
+from app.services.circuit_breaker import DatabaseUnavailable
+from app.services.menu_service import MENU_LIMIT, MenuService, MenuSnapshot
+from typing import List, Optional
 
 router = APIRouter()
 service = MenuService()
 
-@router.get("/{restaurant_id}", response_model=dict)
-async def get_menu(restaurant_id: str):
+@router.get("/cache/stats")
+async def get_cache_stats():
     """
-    Get menu items for a restaurant
+    Menu cache hit/miss/eviction counters
+    """
+    return service.cache_stats()
+
+@router.delete("/cache")
+async def invalidate_all_menus():
+    """
+    Drop every cached menu
+    """
+    service.invalidate_all()
+    return {"success": True}
+
+@router.delete("/{restaurant_id}/cache")
+async def invalidate_menu(restaurant_id: str):
+    """
+    Drop the cached menu for a restaurant after its items change
+    """
+    service.invalidate_menu(restaurant_id)
+    return {"success": True, "restaurantId": restaurant_id}
+
+@router.post("/batch", response_class=FastJSONResponse)
+async def get_menus_batch(request: BatchRequest):
+    """
+    Get menus for many restaurants in one call
+    """
+    try:
+        menus, failed = await service.get_menus(request.ids)
+        return FastJSONResponse({
+            "menus": {rid: menu for rid, menu in menus.items() if menu["items"]},
+            "missing": [rid for rid, menu in menus.items() if not menu["items"]],
+            # Not loaded (database error); retry rather than treat as no menu
+            "failed": failed
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def snapshot_response(request: Request, snapshot: MenuSnapshot) -> Response:
+    """
+    The snapshot's bytes as-is (MessagePack or gzip when negotiated), or 304
+    when the client already holds this version
+    """
+    packed = wants_msgpack.get()
+    gzipped = (not packed and snapshot.gzipped is not None
+               and accepts_gzip(request.headers.get("accept-encoding")))
+    etag = snapshot.msgpack_etag if packed else snapshot.gzip_etag if gzipped else snapshot.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding",
+               "X-Menu-Version": str(snapshot.version)}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if packed:
+        return Response(snapshot.packed(), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(snapshot.gzipped, media_type="application/json", headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
+@router.get("/{restaurant_id}", response_model=dict, response_class=FastJSONResponse)
+async def get_menu(
+    request: Request,
+    restaurant_id: str,
+    limit: int = Query(MENU_LIMIT, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False)
+):
+    """
+    Get menu items for a restaurant, one page at a time (follow nextCursor),
+    or every item as NDJSON with stream=true. The first page is served from
+    a pre-serialized snapshot with an ETag; send If-None-Match to get 304.
+    Its X-Menu-Version header is the version to pass to /changes.
     """
     try:
-        menu_data = await service.get_menu(restaurant_id)
-        return menu_data
+        if stream:
+            items = service.stream_menu(restaurant_id, cursor=cursor)
+            return StreamingResponse(ndjson_stream(items), media_type=NDJSON_MEDIA_TYPE)
+        if cursor is None and limit == MENU_LIMIT:
+            return snapshot_response(request, await service.get_menu_snapshot(restaurant_id))
+        menu_data = await service.get_menu(restaurant_id, limit=limit, cursor=cursor)
+        return FastJSONResponse(menu_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{restaurant_id}/category/{category}", response_model=List[MenuItem])
+@router.get("/{restaurant_id}/changes", response_class=FastJSONResponse)
+async def get_menu_changes(restaurant_id: str, since: int = Query(..., ge=0)):
+    """
+    Items changed and removed since a menu version; fetch the full menu
+    again when resync is true
+    """
+    try:
+        return FastJSONResponse(service.get_menu_changes(restaurant_id, since))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{restaurant_id}/category/{category}", response_model=List[MenuItem], response_class=FastJSONResponse)
 async def get_menu_by_category(restaurant_id: str, category: str):
     """
     Get menu items by category
     """
     try:
         items = await service.get_menu_by_category(restaurant_id, category)
-        return items
+        return FastJSONResponse([shape_menu_item(item) for item in items])
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{restaurant_id}/items", response_class=FastJSONResponse)
+async def filter_menu(
+    restaurant_id: str,
+    isVeg: Optional[bool] = Query(None),
+    isAvailable: Optional[bool] = Query(None),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    category: Optional[str] = Query(None),
+    tags: Optional[str] = Query(None, description="comma-separated; items must have all of them"),
+    sort: Optional[str] = Query(None, pattern="^-?price$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(MENU_LIMIT, ge=1, le=500)
+):
+    """
+    Menu items matching every given filter, in menu order or by price
+    (sort=price / -price); total counts all matches
+    """
+    required_tags = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+    try:
+        menu_data = await service.filter_menu(
+            restaurant_id, sort=sort, offset=offset, limit=limit,
+            is_veg=isVeg, is_available=isAvailable, min_price=minPrice, max_price=maxPrice,
+            category=category, required_tags=required_tags
+        )
+        menu_data["items"] = [shape_menu_item(item) for item in menu_data["items"]]
+        return FastJSONResponse(menu_data)
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,107 @@
+"""
+Response classes - orjson-backed JSON responses for internal routes
+Responses switch to MessagePack for requests that negotiated it (see
+app.middleware.content_negotiation).
+"""
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+import msgpack
+import numpy as np
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.services.circuit_breaker import DatabaseUnavailable
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Set for the current request by ContentNegotiationMiddleware
+wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def _msgpack_default(value: Any):
+    # Same representations orjson produces
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return _default(value)
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, or MessagePack when the request
+    asked for it. Returning one directly from a route also skips FastAPI's
+    response_model validation - use it only for trusted, already-shaped data.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if wants_msgpack.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return dumps(content)
+
+
+def service_unavailable(e: DatabaseUnavailable) -> HTTPException:
+    """
+    503 telling the client when the database is worth trying again
+    """
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def ndjson_stream(documents: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """
+    One JSON document per line, written as each document arrives
+    """
+    async for document in documents:
+        yield orjson.dumps(document, default=_default, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header names etag (weak comparison, as RFC 9110
+    requires for If-None-Match)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
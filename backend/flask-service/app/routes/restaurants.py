@@ -2,29 +2,89 @@
 Restaurant routes - Internal endpoints for restaurant management
 """
 from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import Restaurant
+from fastapi.responses import StreamingResponse
+from app.models.schemas import NearbyRestaurant, Restaurant, BatchRequest
+from app.routes.responses import FastJSONResponse, NDJSON_MEDIA_TYPE, ndjson_stream, service_unavailable
+from app.services.circuit_breaker import DatabaseUnavailable
 from app.services.restaurant_service import RestaurantService
 from typing import List, Optional
 
 router = APIRouter()
 service = RestaurantService()
 
-@router.get("/", response_model=List[Restaurant])
+# Services return documents already shaped like the response models, so
+# these routes hand them straight to orjson instead of re-validating them
+@router.get("", response_model=List[Restaurant], response_class=FastJSONResponse)
 async def get_restaurants(
     cuisine: Optional[str] = Query(None),
     rating: Optional[float] = Query(None),
-    search: Optional[str] = Query(None)
+    search: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False)
 ):
     """
-    Get list of restaurants with optional filters
+    Get list of restaurants with optional filters, one page at a time
+    (next page cursor in the X-Next-Cursor header), or every match as
+    NDJSON with stream=true
     """
     try:
-        restaurants = await service.get_restaurants(cuisine=cuisine, rating=rating, search=search)
-        return restaurants
+        if stream:
+            restaurants = service.stream_restaurants(cuisine=cuisine, rating=rating, search=search, cursor=cursor)
+            return StreamingResponse(ndjson_stream(restaurants), media_type=NDJSON_MEDIA_TYPE)
+        restaurants, next_cursor = await service.get_restaurants_page(
+            cuisine=cuisine, rating=rating, search=search, limit=limit, cursor=cursor
+        )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return FastJSONResponse(restaurants, headers=headers)
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{restaurant_id}", response_model=Restaurant)
+@router.post("/batch", response_class=FastJSONResponse)
+async def get_restaurants_batch(request: BatchRequest):
+    """
+    Get many restaurants by ID in one call
+    """
+    try:
+        restaurants, failed = await service.get_restaurants_by_ids(request.ids)
+        not_loaded = set(failed)
+        return FastJSONResponse({
+            "restaurants": {rid: r for rid, r in restaurants.items() if r is not None},
+            "missing": [rid for rid, r in restaurants.items() if r is None and rid not in not_loaded],
+            # Not looked up (database error); retry rather than treat as unknown
+            "failed": failed
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Declared before /{restaurant_id} so "nearby" is not taken for an id
+@router.get("/nearby", response_model=List[NearbyRestaurant], response_class=FastJSONResponse)
+async def get_nearby_restaurants(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10.0, gt=0, le=30, description="km"),
+    limit: int = Query(20, ge=1, le=100),
+    ratingWeight: Optional[float] = Query(None, ge=0, le=1)
+):
+    """
+    Restaurants that deliver to a point, ranked by a blend of rating and
+    live ETA (ratingWeight 1 ranks by rating only, 0 by ETA only)
+    """
+    try:
+        restaurants = await service.get_nearby_restaurants(
+            lat, lng, radius, limit=limit, rating_weight=ratingWeight
+        )
+        return FastJSONResponse(restaurants)
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{restaurant_id}", response_model=Restaurant, response_class=FastJSONResponse)
 async def get_restaurant(restaurant_id: str):
     """
     Get restaurant details by ID
@@ -33,8 +93,10 @@ async def get_restaurant(restaurant_id: str):
         restaurant = await service.get_restaurant_by_id(restaurant_id)
         if not restaurant:
             raise HTTPException(status_code=404, detail="Restaurant not found")
-        return restaurant
+        return FastJSONResponse(restaurant)
     except HTTPException:
         raise
+    except DatabaseUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
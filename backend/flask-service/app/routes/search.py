@@ -0,0 +1,31 @@
+"""
+Search routes - Typo-tolerant search over restaurants and dishes
+"""
+from fastapi import APIRouter, HTTPException, Query
+from app.routes.responses import FastJSONResponse
+from app.services.search_index import search_index
+
+router = APIRouter()
+
+@router.get("", response_class=FastJSONResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Best-matching restaurants (including those matched through a dish) and
+    dishes for a free-text query; tolerates typos and partial last words
+    """
+    if not search_index.loaded:
+        raise HTTPException(status_code=503, detail="Search index is still loading")
+    try:
+        return FastJSONResponse(search_index.search(q, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats", response_class=FastJSONResponse)
+async def search_stats():
+    """
+    Search index size
+    """
+    return FastJSONResponse(search_index.stats())
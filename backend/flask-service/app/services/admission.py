@@ -0,0 +1,165 @@
+"""
+Admission control - Per route class concurrency limits that adapt to latency
+Requests are sorted into classes by path, in priority order: checkout (ETA
+and assignment), tracking (delivery status and partner updates), then
+browsing (restaurants, menus, search). Each class admits at most `limit`
+requests at once and answers the rest with an immediate 503, so excess load
+is turned away before it queues on the event loop or the Motor pool.
+
+Limits follow AIMD: a request finishing within its class's latency target
+adds 1/limit (about +1 per round of `limit` requests) while the class is
+busy; a request over target multiplies by ADMISSION_BACKOFF the limit of
+the lowest priority class still above its floor, and only cuts the class's
+own limit once there is nothing of lower priority left to shed. Cuts to a
+class are spaced at least its target latency apart, so one slow burst
+counts once.
+"""
+import os
+import time
+from typing import Dict, List, Optional
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.75"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class RouteClass:
+    """
+    One priority class: its path prefixes and an AIMD concurrency limit
+    """
+
+    def __init__(self, name: str, priority: int, prefixes: tuple,
+                 target_ms: float, min_limit: int, max_limit: int):
+        self.name = name
+        self.priority = priority
+        self.prefixes = prefixes
+        self.target = target_ms / 1000.0
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.over_target = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def increase(self):
+        # Only grow while the limit is actually in use
+        if self.in_flight + 1 >= self.limit / 2:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def decrease(self, now: float) -> bool:
+        if self.limit <= self.min_limit or now - self._last_decrease < self.target:
+            return False
+        self.limit = max(float(self.min_limit), self.limit * ADMISSION_BACKOFF)
+        self._last_decrease = now
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "priority": self.priority,
+            "limit": int(self.limit),
+            "minLimit": self.min_limit,
+            "maxLimit": self.max_limit,
+            "targetMs": self.target * 1000.0,
+            "inFlight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "overTarget": self.over_target,
+        }
+
+
+def _route_class(name: str, priority: int, prefixes: tuple,
+                 target_ms: int, min_limit: int, max_limit: int) -> RouteClass:
+    key = f"ADMISSION_{name.upper()}"
+    return RouteClass(
+        name, priority, prefixes,
+        target_ms=_env_int(f"{key}_TARGET_MS", target_ms),
+        min_limit=_env_int(f"{key}_MIN_LIMIT", min_limit),
+        max_limit=_env_int(f"{key}_MAX_LIMIT", max_limit),
+    )
+
+
+def default_classes() -> List[RouteClass]:
+    return [
+        _route_class("checkout", 0, ("/internal/eta", "/internal/delivery/assign"),
+                     target_ms=150, min_limit=16, max_limit=256),
+        _route_class("tracking", 1, ("/internal/delivery/", "/internal/partners/", "/internal/tracking/"),
+                     target_ms=250, min_limit=4, max_limit=128),
+        _route_class("browsing", 2, ("/internal/restaurants", "/internal/menu", "/internal/search"),
+                     target_ms=400, min_limit=2, max_limit=128),
+    ]
+
+
+class AdmissionController:
+
+    def __init__(self, classes: Optional[List[RouteClass]] = None):
+        self.classes = sorted(classes if classes is not None else default_classes(),
+                              key=lambda c: c.priority)
+        # Longest prefix first, so /internal/delivery/assign beats /internal/delivery/
+        self._prefixes = sorted(
+            ((prefix, route_class) for route_class in self.classes for prefix in route_class.prefixes),
+            key=lambda entry: len(entry[0]), reverse=True
+        )
+        self._by_path: Dict[str, Optional[RouteClass]] = {}
+
+    def classify(self, path: str) -> Optional[RouteClass]:
+        """
+        The class a path belongs to; None for paths that are never limited
+        (health, metrics, stats and cache endpoints, debug, live streams)
+        """
+        try:
+            return self._by_path[path]
+        except KeyError:
+            pass
+        route_class = None
+        if not (path.endswith("/stream") or path.endswith("/stats") or "/cache" in path):
+            for prefix, candidate in self._prefixes:
+                if path.startswith(prefix):
+                    route_class = candidate
+                    break
+        # Paths carry ids, so the memo is bounded
+        if len(self._by_path) < 4096:
+            self._by_path[path] = route_class
+        return route_class
+
+    def observe(self, route_class: RouteClass, latency: float):
+        """
+        Feed one finished request's latency back into the limits
+        """
+        if latency <= route_class.target:
+            route_class.increase()
+            return
+        route_class.over_target += 1
+        now = time.monotonic()
+        # Shed the lowest priority first; a class only cuts itself when
+        # nothing below it has room left to give
+        for lower in reversed(self.classes):
+            if lower.priority <= route_class.priority:
+                break
+            if lower.limit > lower.min_limit:
+                lower.decrease(now)
+                return
+        route_class.decrease(now)
+
+    def stats(self) -> List[dict]:
+        return [route_class.stats() for route_class in self.classes]
+
+
+admission_controller = AdmissionController()
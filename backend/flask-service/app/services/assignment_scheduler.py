@@ -0,0 +1,227 @@
+"""
+Assignment scheduler - Micro-batched, globally optimal partner assignment
+Buffers incoming orders for a short window and solves the batch as a
+min-cost bipartite matching between orders and nearby available partners
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from app.services.partner_registry import Partner, PartnerRegistry, partner_registry
+
+ASSIGN_MODE = os.getenv("ASSIGN_MODE", "greedy")   # greedy | batch
+BATCH_WINDOW_MS = float(os.getenv("ASSIGN_BATCH_WINDOW_MS", "2000"))
+BATCH_MAX_ORDERS = int(os.getenv("ASSIGN_BATCH_MAX_ORDERS", "300"))
+BATCH_MAX_WAIT_MS = float(os.getenv("ASSIGN_BATCH_MAX_WAIT_MS", "5000"))
+# Fewer arrivals than this per window is low load: assign greedily, no waiting
+BATCH_MIN_ORDERS = int(os.getenv("ASSIGN_BATCH_MIN_ORDERS", "5"))
+BATCH_BUDGET_MS = float(os.getenv("ASSIGN_BATCH_BUDGET_MS", "200"))
+BATCH_CANDIDATES = int(os.getenv("ASSIGN_BATCH_CANDIDATES", "10"))
+# Batches at least this large are solved on a worker thread, off the event loop
+BATCH_OFFLOAD_ORDERS = int(os.getenv("ASSIGN_BATCH_OFFLOAD_ORDERS", "50"))
+
+# Cost for order/partner pairs that aren't candidates of each other
+_NO_EDGE = 1e9
+
+Match = Optional[Tuple[float, Partner]]
+
+
+def solve_matching(order_candidates: List[List[Tuple[float, str]]]) -> Dict[int, Tuple[float, str]]:
+    """
+    Min-total-distance matching of orders to partners.
+
+    order_candidates[i] holds (distance_km, partner_id) for the partners
+    near order i. Returns order index -> (distance_km, partner_id) for the
+    orders that could be matched.
+    """
+    columns: Dict[str, int] = {}
+    for candidates in order_candidates:
+        for _, pid in candidates:
+            columns.setdefault(pid, len(columns))
+    if not columns:
+        return {}
+
+    partner_ids = list(columns)
+    cost = np.full((len(order_candidates), len(columns)), _NO_EDGE)
+    for row, candidates in enumerate(order_candidates):
+        for distance_km, pid in candidates:
+            cost[row, columns[pid]] = distance_km
+
+    rows, cols = linear_sum_assignment(cost)
+    return {
+        int(r): (float(cost[r, c]), partner_ids[c])
+        for r, c in zip(rows, cols)
+        if cost[r, c] < _NO_EDGE
+    }
+
+
+class AssignmentScheduler:
+    """
+    Collects assignment requests into batches and resolves each waiting
+    request with its partner from the batch-optimal matching.
+
+    submit() returns None when the caller should fall back to greedy
+    assignment: under low load, when the batch ran out of time budget, or
+    when no partner could be matched.
+    """
+
+    def __init__(self, registry: PartnerRegistry,
+                 window_ms: float = BATCH_WINDOW_MS,
+                 max_orders: int = BATCH_MAX_ORDERS,
+                 max_wait_ms: float = BATCH_MAX_WAIT_MS,
+                 min_orders: int = BATCH_MIN_ORDERS,
+                 budget_ms: float = BATCH_BUDGET_MS,
+                 candidates: int = BATCH_CANDIDATES,
+                 offload_orders: int = BATCH_OFFLOAD_ORDERS):
+        self.registry = registry
+        self.window = window_ms / 1000.0
+        self.max_orders = max_orders
+        self.max_wait = max_wait_ms / 1000.0
+        self.min_orders = min_orders
+        self.budget = budget_ms / 1000.0
+        self.candidates = candidates
+        self.offload_orders = offload_orders
+        self._solving: Set[asyncio.Task] = set()
+        self._pending: List[Tuple[str, Tuple[float, float], asyncio.Future]] = []
+        self._arrivals: deque = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.greedy_fallbacks = 0
+        self.withdrawn = 0
+        self.last_batch_ms = 0.0
+
+    def _is_low_load(self, now: float) -> bool:
+        while self._arrivals and now - self._arrivals[0] > self.window:
+            self._arrivals.popleft()
+        return not self._pending and len(self._arrivals) < self.min_orders
+
+    async def submit(self, order_id: str, pickup: Tuple[float, float]) -> Match:
+        now = time.monotonic()
+        low_load = self._is_low_load(now)
+        self._arrivals.append(now)
+        if low_load:
+            self.greedy_fallbacks += 1
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((order_id, pickup, future))
+
+        if len(self._pending) >= self.max_orders:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._withdraw(order_id, future)
+            self.greedy_fallbacks += 1
+            return None
+        except asyncio.CancelledError:
+            # The request went away while waiting for its batch
+            self._withdraw(order_id, future)
+            raise
+
+    def _withdraw(self, order_id: str, future: asyncio.Future):
+        """
+        Take an order nobody is waiting for out of its batch, so a late
+        batch doesn't claim a partner for nobody, or hand back the partner
+        a batch already claimed for it
+        """
+        self.withdrawn += 1
+        if future.cancel():
+            return
+        match = future.result()
+        if match is not None:
+            self.registry.release(match[1].id, order_id)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        batch = [entry for entry in batch if not entry[2].done()]
+        if not batch:
+            return
+        if len(batch) < self.offload_orders:
+            started = time.perf_counter()
+            self._assign_batch(batch, started, self._candidates(batch))
+            return
+        task = asyncio.get_running_loop().create_task(self._assign_offloaded(batch))
+        self._solving.add(task)
+        task.add_done_callback(self._solving.discard)
+
+    async def _assign_offloaded(self, batch):
+        """
+        Solve a large batch on a worker thread. Partners taken while it
+        solves fail their claim, and their orders fall back to greedy.
+        """
+        started = time.perf_counter()
+        order_candidates = self._candidates(batch)
+        matches = {}
+        if len(order_candidates) == len(batch):
+            try:
+                matches = await asyncio.to_thread(solve_matching, order_candidates)
+            except Exception as e:
+                print(f"Error solving assignment batch: {e}")
+        self._assign_batch(batch, started, order_candidates, matches)
+
+    def _candidates(self, batch) -> List[List[Tuple[float, str]]]:
+        """
+        Nearby partners per order, until the time budget runs out (the
+        list is then shorter than the batch)
+        """
+        deadline = time.perf_counter() + self.budget
+        order_candidates = []
+        for _, (lat, lng), _ in batch:
+            if time.perf_counter() > deadline:
+                break
+            order_candidates.append([
+                (distance_km, partner.id)
+                for distance_km, partner in self.registry.nearest(lat, lng, k=self.candidates)
+            ])
+        return order_candidates
+
+    def _assign_batch(self, batch, started: float, order_candidates: List[List[Tuple[float, str]]],
+                      matches: Optional[Dict[int, Tuple[float, str]]] = None):
+        """
+        Claim the matched partners, solving the batch here first unless
+        matches are given. Claims run synchronously on the event loop and
+        check availability, so no partner is claimed twice.
+        """
+        if matches is None:
+            matches = solve_matching(order_candidates) if len(order_candidates) == len(batch) else {}
+
+        for i, (order_id, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            match = matches.get(i)
+            if match is not None and self.registry.claim(match[1], order_id):
+                future.set_result((match[0], self.registry.get(match[1])))
+            else:
+                # Over budget or unmatched: the caller assigns greedily
+                self.greedy_fallbacks += 1
+                future.set_result(None)
+
+        self.batches += 1
+        self.last_batch_ms = (time.perf_counter() - started) * 1000.0
+
+    def stats(self) -> dict:
+        return {
+            "mode": ASSIGN_MODE,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "greedyFallbacks": self.greedy_fallbacks,
+            "withdrawn": self.withdrawn,
+            "solving": len(self._solving),
+            "lastBatchMs": round(self.last_batch_ms, 3),
+        }
+
+
+assignment_scheduler = AssignmentScheduler(partner_registry)
@@ -0,0 +1,157 @@
+"""
+Cache - Bounded async read-through cache with TTL + LRU eviction
+Concurrent misses for the same key share a single loader call (single-flight)
+"""
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+# Every live cache, for /metrics
+caches: "weakref.WeakSet[AsyncLRUCache]" = weakref.WeakSet()
+
+
+def _retrieve(task: asyncio.Task):
+    # Mark a failure retrieved, so a load every caller abandoned doesn't log
+    # "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncLRUCache:
+    """
+    Read-through cache bounded by entry count, with per-entry TTL.
+
+    Entries are evicted least-recently-used first once maxsize is reached,
+    and treated as missing once older than ttl seconds.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def epoch(self) -> int:
+        """
+        Bumped on every invalidation; compare before/after a load to tell
+        whether the loaded value may already be stale
+        """
+        return self._epoch
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value or None, without loading
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """
+        Split keys into cached values and misses, counting both
+        """
+        found: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        for key in dict.fromkeys(keys):
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value, calling loader() once on a miss even when
+        many requests miss the same key concurrently. The load runs in its
+        own task, so a cancelled caller (e.g. a client disconnect) never
+        cancels it for the others.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, loader, ttl, self._epoch))
+            task.add_done_callback(_retrieve)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                    ttl: Optional[float], epoch: int) -> Any:
+        try:
+            value = await loader()
+        finally:
+            del self._inflight[key]
+        # An invalidation during the load means the value may be stale:
+        # hand it to the waiters but don't keep it
+        if epoch == self._epoch:
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop a single key
+        """
+        self._entries.pop(key, None)
+        self._epoch += 1
+
+    def clear(self):
+        """
+        Drop every key
+        """
+        self._entries.clear()
+        self._epoch += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
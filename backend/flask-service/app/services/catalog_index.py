@@ -0,0 +1,426 @@
+"""
+Catalog index - In-process restaurant catalog with inverted indexes
+Serves restaurant listing/filter queries from memory and stays fresh via
+a Mongo change stream. While the stream is down it delta-polls on updatedAt
+and retries the stream with backoff, resuming from the last resume token
+(or reloading when the token can no longer be resumed).
+When the database is down at startup it is filled from the last-known-good
+snapshot instead (stale) until a live load succeeds.
+"""
+import asyncio
+import os
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.models.serializers import RESTAURANT_PROJECTION, shape_restaurant
+from app.services.circuit_breaker import DatabaseUnavailable, db_breaker
+from app.services.last_known_good import last_known_good
+
+POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "5"))
+FULL_RELOAD_INTERVAL = float(os.getenv("CATALOG_FULL_RELOAD_INTERVAL", "600"))
+# Longest wait between attempts to re-open the change stream
+WATCH_RETRY_MAX = float(os.getenv("CATALOG_WATCH_RETRY_MAX", "60"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase word tokens
+    """
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class CatalogIndex:
+    """
+    In-memory index over active restaurants.
+
+    - cuisine / tag inverted indexes: value -> set of restaurant ids
+    - rating index: list of (-rating, id) kept sorted, so iteration yields
+      restaurants in rating-descending order (same as sort("rating", -1))
+    - token index: word token -> set of ids, over name and description
+    - gram index: every 1-3 character substring of a token -> tokens that
+      contain it, so a search word finds its tokens without scanning the
+      whole vocabulary
+    """
+
+    def __init__(self):
+        self._docs: Dict[str, dict] = {}
+        self._by_cuisine: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_token: Dict[str, Set[str]] = {}
+        self._by_gram: Dict[str, Set[str]] = {}
+        self._by_rating: List[tuple] = []
+        self._last_updated: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._listeners: List[Callable[[str, Optional[dict]], None]] = []
+        self._resume_token: Optional[dict] = None
+        self._watched = False
+        self._since_full_reload = 0.0
+        self.loaded = False
+        self.stale = False
+        self.following = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add_listener(self, listener: Callable[[str, Optional[dict]], None]):
+        """
+        Call listener(restaurant_id, shaped_doc) after every change; the doc
+        is None when the restaurant left the catalog
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, key: str, doc: Optional[dict]):
+        for listener in self._listeners:
+            listener(key, doc)
+
+    def upsert(self, doc: dict):
+        """
+        Insert or replace a restaurant; inactive restaurants are dropped.
+        Documents are stored pre-shaped for the response, so listings need
+        no per-request validation or copying.
+        """
+        key = str(doc["_id"])
+        existed = self._remove(key)
+
+        updated_at = doc.get("updatedAt")
+        if isinstance(updated_at, datetime) and (
+            self._last_updated is None or updated_at > self._last_updated
+        ):
+            self._last_updated = updated_at
+
+        if not doc.get("isActive", True):
+            if existed:
+                self._notify(key, None)
+            return
+
+        doc = shape_restaurant(doc)
+        self._docs[key] = doc
+        for cuisine in doc.get("cuisine") or []:
+            self._by_cuisine.setdefault(cuisine, set()).add(key)
+        for tag in doc.get("tags") or []:
+            self._by_tag.setdefault(tag, set()).add(key)
+        for token in self._doc_tokens(doc):
+            ids = self._by_token.get(token)
+            if ids is None:
+                ids = self._by_token[token] = set()
+                for gram in self._grams(token):
+                    self._by_gram.setdefault(gram, set()).add(token)
+            ids.add(key)
+        insort(self._by_rating, (-float(doc.get("rating") or 0), key))
+        self._notify(key, doc)
+
+    def remove(self, key: str):
+        """
+        Remove a restaurant from every index
+        """
+        if self._remove(key):
+            self._notify(key, None)
+
+    def _remove(self, key: str) -> bool:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return False
+
+        self._discard(self._by_cuisine, doc.get("cuisine") or [], key)
+        self._discard(self._by_tag, doc.get("tags") or [], key)
+        tokens = self._doc_tokens(doc)
+        self._discard(self._by_token, tokens, key)
+        for token in tokens:
+            if token not in self._by_token:
+                self._discard(self._by_gram, self._grams(token), token)
+
+        entry = (-float(doc.get("rating") or 0), key)
+        pos = bisect_left(self._by_rating, entry)
+        if pos < len(self._by_rating) and self._by_rating[pos] == entry:
+            del self._by_rating[pos]
+        return True
+
+    def replace_all(self, docs: Iterable[dict]):
+        """
+        Rebuild every index from a full snapshot of the collection
+        """
+        previous = self._docs
+        self._docs = {}
+        self._by_cuisine = {}
+        self._by_tag = {}
+        self._by_token = {}
+        self._by_gram = {}
+        self._by_rating = []
+        for doc in docs:
+            self.upsert(doc)
+        for key in previous.keys() - self._docs.keys():
+            self._notify(key, None)
+        self.loaded = True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get(self, restaurant_id: str) -> Optional[dict]:
+        return self._docs.get(str(restaurant_id))
+
+    def documents(self) -> List[dict]:
+        return list(self._docs.values())
+
+    def query(self, cuisine: Optional[str] = None,
+              rating: Optional[float] = None,
+              search: Optional[str] = None,
+              tag: Optional[str] = None,
+              limit: int = 50,
+              after: Optional[Tuple[float, str]] = None) -> List[dict]:
+        """
+        Return active restaurants matching the filters, rating descending
+        (ties by id). `after` is the (rating, id) of the last restaurant of
+        the previous page.
+        """
+        candidates: Optional[Set[str]] = None
+
+        if cuisine:
+            candidates = self._intersect(candidates, self._by_cuisine.get(cuisine, set()))
+        if tag:
+            candidates = self._intersect(candidates, self._by_tag.get(tag, set()))
+        if search:
+            candidates = self._intersect(candidates, self._search_candidates(search))
+
+        if candidates is not None and not candidates:
+            return []
+
+        # Small candidate sets are cheaper to sort directly than to find by
+        # walking the whole rating index
+        if candidates is not None and len(candidates) * 4 < len(self._by_rating):
+            ordered = sorted((-float(self._docs[k].get("rating") or 0), k) for k in candidates)
+        else:
+            ordered = self._by_rating
+
+        start = 0
+        if after is not None:
+            start = bisect_right(ordered, (-float(after[0]), str(after[1])))
+
+        needle = search.lower() if search else None
+        results = []
+        for i in range(start, len(ordered)):
+            neg_rating, key = ordered[i]
+            if rating and -neg_rating < rating:
+                break
+            if candidates is not None and key not in candidates:
+                continue
+            doc = self._docs[key]
+            if needle and not self._matches(doc, needle):
+                continue
+            results.append(doc)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _search_candidates(self, search: str) -> Set[str]:
+        """
+        Ids whose name/description tokens contain every word of the query.
+        Every query word must occur inside some document token for the full
+        query to be a substring, so this never drops a real match; the final
+        substring check in query() removes false positives.
+        """
+        words = tokenize(search)
+        if not words:
+            return set(self._docs)
+
+        result: Optional[Set[str]] = None
+        for word in words:
+            matched: Set[str] = set()
+            for token in self._tokens_containing(word):
+                matched |= self._by_token[token]
+            result = self._intersect(result, matched)
+            if not result:
+                return set()
+        return result
+
+    def _tokens_containing(self, word: str) -> List[str]:
+        """
+        Vocabulary tokens that contain word: the tokens holding all of its
+        trigrams (smallest set first), checked for the full word. Costs the
+        size of the rarest trigram's token set, not of the vocabulary.
+        """
+        if len(word) <= 3:
+            return list(self._by_gram.get(word, ()))
+        grams = sorted((self._by_gram.get(word[i:i + 3], set()) for i in range(len(word) - 2)), key=len)
+        candidates = grams[0]
+        for tokens in grams[1:]:
+            if not candidates:
+                break
+            candidates = candidates & tokens
+        return [token for token in candidates if word in token]
+
+    @staticmethod
+    def _matches(doc: dict, needle: str) -> bool:
+        name = (doc.get("name") or "").lower()
+        description = (doc.get("description") or "").lower()
+        return needle in name or needle in description
+
+    @staticmethod
+    def _grams(token: str) -> Set[str]:
+        return {token[i:i + n] for n in (1, 2, 3) for i in range(len(token) - n + 1)}
+
+    @staticmethod
+    def _doc_tokens(doc: dict) -> Set[str]:
+        return set(tokenize(doc.get("name"))) | set(tokenize(doc.get("description")))
+
+    @staticmethod
+    def _intersect(current: Optional[Set[str]], other: Set[str]) -> Set[str]:
+        if current is None:
+            return set(other)
+        return current & other
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], values: Iterable[str], key: str):
+        for value in values:
+            ids = index.get(value)
+            if ids is None:
+                continue
+            ids.discard(key)
+            if not ids:
+                del index[value]
+
+    # ------------------------------------------------------------------
+    # Loading and freshness
+    # ------------------------------------------------------------------
+
+    async def load(self, db):
+        """
+        Load the full restaurant collection into memory
+        """
+        docs = await db_breaker.call(
+            lambda: db.restaurants.find({}, RESTAURANT_PROJECTION).to_list(None), timeout=None
+        )
+        self.replace_all(docs)
+        self.stale = False
+        print(f"✓ Catalog index loaded: {len(self)} active restaurants")
+
+    async def start(self, db):
+        """
+        Load the catalog and keep it fresh in the background
+        """
+        if self._task is not None:
+            return
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            try:
+                await self.load(db)
+            except DatabaseUnavailable:
+                if not last_known_good.restaurants:
+                    raise
+                self.replace_all(last_known_good.restaurants)
+                self.stale = True
+                print(f"⚠️  Catalog index serving {len(self)} restaurants from the last-known-good snapshot")
+            self._task = asyncio.create_task(self._refresh_loop(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self, db):
+        # Replace the snapshot with live data before following changes
+        while self.stale:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                await self.load(db)
+            except DatabaseUnavailable:
+                pass
+        delay = POLL_INTERVAL
+        while True:
+            try:
+                await self._watch(db)
+                continue
+            except (PyMongoError, DatabaseUnavailable) as e:
+                if self.following:
+                    delay = POLL_INTERVAL
+                if self.following or delay == POLL_INTERVAL:
+                    # Standalone servers have no change streams; they keep
+                    # polling, with a retry every WATCH_RETRY_MAX seconds
+                    print(f"⚠️  Catalog change stream unavailable ({e}) - polling every {POLL_INTERVAL}s")
+                self.following = False
+            await self._poll(db, delay)
+            delay = min(delay * 2, WATCH_RETRY_MAX)
+
+    async def _watch(self, db):
+        token = self._resume_token
+        if token is not None:
+            try:
+                async with db.restaurants.watch(full_document="updateLookup", resume_after=token) as stream:
+                    self.following = True
+                    print("✓ Catalog index resumed restaurants change stream")
+                    await self._follow(db, stream)
+                return
+            except OperationFailure as e:
+                if self._resume_token is not token:
+                    raise
+                # Typically the oplog no longer reaches back to the token
+                print(f"⚠️  Could not resume catalog change stream ({e}) - reloading")
+                self._resume_token = None
+
+        async with db.restaurants.watch(full_document="updateLookup") as stream:
+            self.following = True
+            print("✓ Catalog index following restaurants change stream")
+            if self._watched:
+                # Polling cannot see deletes made while the stream was down
+                await self.load(db)
+            self._watched = True
+            await self._follow(db, stream)
+
+    async def _follow(self, db, stream):
+        self._resume_token = stream.resume_token
+        async for change in stream:
+            self._resume_token = stream.resume_token
+            op = change["operationType"]
+            if op == "delete":
+                self.remove(str(change["documentKey"]["_id"]))
+            elif change.get("fullDocument") is not None:
+                self.upsert(change["fullDocument"])
+            elif op in ("drop", "rename", "invalidate"):
+                # The stream ends here and cannot be resumed past this event
+                self._resume_token = None
+                await self.load(db)
+
+    async def _poll(self, db, duration: float):
+        """
+        Delta-poll for duration seconds while the change stream is down
+        """
+        elapsed = 0.0
+        while elapsed < duration:
+            await asyncio.sleep(POLL_INTERVAL)
+            elapsed += POLL_INTERVAL
+            self._since_full_reload += POLL_INTERVAL
+            try:
+                # Deletes leave no updatedAt trace, so rebuild periodically
+                if self._since_full_reload >= FULL_RELOAD_INTERVAL:
+                    await self.load(db)
+                    self._since_full_reload = 0.0
+                    continue
+
+                if self._last_updated is None:
+                    continue
+                delta_filter = {"updatedAt": {"$gt": self._last_updated}}
+                async for doc in db.restaurants.find(delta_filter, RESTAURANT_PROJECTION):
+                    self.upsert(doc)
+            except (PyMongoError, DatabaseUnavailable) as e:
+                print(f"Error refreshing catalog index: {e}")
+
+catalog_index = CatalogIndex()
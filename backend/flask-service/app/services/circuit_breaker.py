@@ -0,0 +1,143 @@
+"""
+Circuit breaker - Fails fast while MongoDB is unreachable
+Database calls on request paths run through db_breaker with a tight
+deadline. After DB_BREAKER_FAILURES consecutive connection failures or
+timeouts the circuit opens: calls fail immediately with DatabaseUnavailable
+for DB_BREAKER_OPEN_SECONDS, then a single probe call is let through
+(half-open). The probe's success closes the circuit; its failure re-opens it.
+"""
+import asyncio
+import math
+import os
+import time
+import weakref
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+DB_OPERATION_TIMEOUT_MS = float(os.getenv("DB_OPERATION_TIMEOUT_MS", "800"))
+DB_BREAKER_FAILURES = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+DB_BREAKER_OPEN_SECONDS = float(os.getenv("DB_BREAKER_OPEN_SECONDS", "5"))
+
+# Errors meaning the database is unreachable or overloaded (not a bad query)
+TRIPPING_ERRORS = (asyncio.TimeoutError, ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+T = TypeVar("T")
+
+# Every live breaker, for /metrics
+breakers: "weakref.WeakSet[CircuitBreaker]" = weakref.WeakSet()
+
+
+class DatabaseUnavailable(Exception):
+    """
+    The database could not serve the call; retry_after is in seconds
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failures: int = DB_BREAKER_FAILURES,
+                 open_seconds: float = DB_BREAKER_OPEN_SECONDS,
+                 timeout: float = DB_OPERATION_TIMEOUT_MS / 1000.0):
+        self.name = name
+        self.max_failures = failures
+        self.open_seconds = open_seconds
+        self.timeout = timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+        self.failed = 0
+        breakers.add(self)
+
+    @property
+    def closed(self) -> bool:
+        return self.state == CLOSED
+
+    def retry_after(self) -> int:
+        if self.state == CLOSED:
+            return 1
+        return max(1, math.ceil(self.open_seconds - (time.monotonic() - self._opened_at)))
+
+    def trip(self):
+        """
+        Open the circuit now (e.g. the startup ping failed)
+        """
+        if self.state != OPEN:
+            self.opened += 1
+            print(f"⚠️  {self.name} circuit open for {self.open_seconds:g}s")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+    def record_failure(self):
+        self.failed += 1
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.max_failures:
+            self.trip()
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"✓ {self.name} circuit closed")
+        self.state = CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def _allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    async def call(self, operation: Callable[[], Awaitable[T]], timeout: Optional[float] = -1.0) -> T:
+        """
+        Run operation() under the breaker with a deadline (the breaker's
+        default, or timeout seconds; None for none)
+        """
+        if not self._allow():
+            self.rejected += 1
+            raise DatabaseUnavailable(f"{self.name} circuit open", self.retry_after())
+        if timeout is not None and timeout < 0:
+            timeout = self.timeout
+        try:
+            if timeout is None:
+                result = await operation()
+            else:
+                result = await asyncio.wait_for(operation(), timeout)
+        except TRIPPING_ERRORS as e:
+            self.record_failure()
+            reason = str(e) or f"timed out after {timeout:g}s"
+            raise DatabaseUnavailable(f"{self.name} unavailable: {reason}", self.retry_after()) from e
+        except BaseException:
+            # Not a sign of an outage; let the next call probe again
+            self._probing = False
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "timeoutMs": self.timeout * 1000.0,
+        }
+
+
+db_breaker = CircuitBreaker("mongodb")
@@ -1,32 +1,289 @@
 """
 Delivery service - Business logic for delivery operations
 """
+import math
+import os
 import random
+import time
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+from pymongo.errors import DuplicateKeyError
+from app.config.database import get_database
 from app.models.schemas import DeliveryAddress
+from app.services import eta_engine
+from app.services.cache import AsyncLRUCache
+from app.services.circuit_breaker import DatabaseUnavailable, db_breaker
+from app.services.assignment_scheduler import ASSIGN_MODE, assignment_scheduler
+from app.services.delivery_status import delivery_status
+from app.services.partner_registry import haversine_km, partner_registry
+from app.services.restaurant_service import RestaurantService
+from app.services.tracking_hub import tracking_hub
+
+# Nearest partners to try before giving up on an assignment
+ASSIGN_CANDIDATES = int(os.getenv("ASSIGN_CANDIDATES", "5"))
+
+# ETA results are shared by every destination in the same geohash cell
+# (precision 7 is ~150m) for the same restaurant within a time bucket.
+# Buckets divide the hour, so one bucket never spans two speed-profile hours.
+ETA_CACHE_SIZE = int(os.getenv("ETA_CACHE_SIZE", "200000"))
+ETA_BUCKET_SECONDS = int(os.getenv("ETA_BUCKET_SECONDS", "300"))
+ETA_GEOHASH_PRECISION = int(os.getenv("ETA_GEOHASH_PRECISION", "7"))
+eta_cache = AsyncLRUCache("eta", maxsize=ETA_CACHE_SIZE, ttl=ETA_BUCKET_SECONDS)
 
 class DeliveryService:
     
+    def __init__(self):
+        self.restaurants = RestaurantService()
+    
     async def calculate_eta(self, restaurant_id: str, delivery_address: DeliveryAddress) -> int:
         """
-        Calculate estimated time of arrival based on distance and traffic
-        In production, this would use actual map APIs like Google Maps
+        Calculate estimated time of arrival from restaurant prep time and the
+        road distance to the delivery address at the current time of day
+        """
+        etas = await self.calculate_etas([(restaurant_id, delivery_address)])
+        return etas[0]
+    
+    async def calculate_etas(self, pairs: List[Tuple[str, Optional[DeliveryAddress]]]) -> List[int]:
+        """
+        Calculate ETAs for many (restaurant, destination) pairs, served from
+        the ETA cache where possible and computed in one vectorized pass
+        otherwise
         """
-        # Mock ETA calculation
-        base_eta = 25
-        distance_factor = random.randint(-5, 10)  # Simulate distance variation
-        traffic_factor = random.randint(0, 5)     # Simulate traffic
+        now = time.time()
+        bucket = int(now // ETA_BUCKET_SECONDS)
+        ttl = (bucket + 1) * ETA_BUCKET_SECONDS - now
         
-        eta = base_eta + distance_factor + traffic_factor
+        # Listing pages send one destination for many restaurants, so resolve
+        # each distinct address object only once. Misses are computed for the
+        # cell centre, so every address in a cell gets the same value.
+        cells = {}
+        centers = {}
+        keys = []
+        for rid, address in pairs:
+            if id(address) not in cells:
+                point = eta_engine.locate(address)
+                cells[id(address)] = eta_engine.geohash(*point, ETA_GEOHASH_PRECISION) if point else (None, None)
+            cell, center = cells[id(address)]
+            key = (rid, cell, bucket)
+            keys.append(key)
+            centers[key] = center
         
-        # Ensure ETA is reasonable
-        return max(15, min(eta, 60))
+        etas, missing = eta_cache.get_many(keys)
+        if missing:
+            computed, failed = await self._compute_etas([(key[0], centers[key]) for key in missing])
+            for key, eta in zip(missing, computed):
+                # A fallback ETA for a restaurant that could not be looked
+                # up is served, but not cached for the rest of the bucket
+                if key[0] not in failed:
+                    eta_cache.set(key, eta, ttl)
+                etas[key] = eta
+        return [etas[key] for key in keys]
+    
+    async def _compute_etas(self, pairs: List[Tuple[str, Optional[Tuple[float, float]]]]) -> Tuple[List[int], Set[str]]:
+        """
+        Vectorized ETAs for (restaurant id, destination point) pairs, and
+        the restaurant ids that could not be looked up (their ETAs are the
+        defaults)
+        """
+        restaurant_ids = list(dict.fromkeys(rid for rid, _ in pairs))
+        restaurants, failed = await self.restaurants.get_restaurants_by_ids(restaurant_ids)
+        
+        n = len(pairs)
+        origins = np.full((n, 2), np.nan)
+        destinations = np.full((n, 2), np.nan)
+        prep_minutes = np.full(n, eta_engine.DEFAULT_PREP_MINUTES)
+        fallback_minutes = np.full(n, float(eta_engine.DEFAULT_ETA_MINUTES))
+        
+        origin_cache = {}
+        for i, (rid, destination) in enumerate(pairs):
+            restaurant = restaurants.get(rid)
+            if restaurant is not None:
+                if rid not in origin_cache:
+                    origin_cache[rid] = eta_engine.locate(restaurant.get("address"))
+                origin = origin_cache[rid]
+                if origin is not None:
+                    origins[i] = origin
+                prep_minutes[i] = restaurant.get("prepTime") or eta_engine.DEFAULT_PREP_MINUTES
+                fallback_minutes[i] = restaurant.get("eta") or eta_engine.DEFAULT_ETA_MINUTES
+            if destination is not None:
+                destinations[i] = destination
+        
+        etas = eta_engine.estimate_minutes(origins, destinations, prep_minutes, fallback_minutes).tolist()
+        return etas, set(failed)
+    
+    def eta_cache_stats(self) -> dict:
+        return dict(eta_cache.stats(), bucketSeconds=ETA_BUCKET_SECONDS, geohashPrecision=ETA_GEOHASH_PRECISION)
     
     async def assign_delivery(self, assignment: dict) -> dict:
         """
-        Assign a delivery partner to the order
-        In production, this would match with available delivery partners
+        Assign the nearest available delivery partner to the order
+        """
+        db = get_database()
+        
+        # Without a database or any live partners there is nobody real to
+        # assign, so development keeps the mock assignment
+        if db is None and len(partner_registry) == 0:
+            return self._get_mock_assignment(assignment)
+        
+        pickup = await self._locate_pickup(assignment)
+        if pickup is None:
+            return self._unassigned(assignment)
+        
+        # A retried assign gets the partner it already holds, not a second one
+        existing = await self._existing_assignment(db, assignment, pickup)
+        if existing is not None:
+            return existing
+        
+        if ASSIGN_MODE == "batch":
+            match = await assignment_scheduler.submit(assignment.orderId, pickup)
+            if match is not None:
+                distance_km, partner = match
+                if await self._confirm_claim(db, partner, assignment.orderId):
+                    return await self._announce(self._assigned(assignment, partner, distance_km))
+        
+        candidates = partner_registry.nearest(pickup[0], pickup[1], k=ASSIGN_CANDIDATES)
+        for distance_km, partner in candidates:
+            if not partner_registry.claim(partner.id, assignment.orderId):
+                continue
+            if not await self._confirm_claim(db, partner, assignment.orderId):
+                continue
+            return await self._announce(self._assigned(assignment, partner, distance_km))
+        
+        return self._unassigned(assignment)
+    
+    async def update_partner_location(self, partner_id: str, lat: float, lng: float,
+                                      available: Optional[bool] = None,
+                                      name: Optional[str] = None,
+                                      phone: Optional[str] = None) -> dict:
+        """
+        Record a delivery partner's live position and push it to anyone
+        tracking the order the partner is carrying
+        """
+        partner = partner_registry.upsert_location(partner_id, lat, lng, available, name, phone)
+        if partner.order_id is not None:
+            await tracking_hub.publish(partner.order_id, "location", {
+                "orderId": partner.order_id,
+                "partnerId": partner.id,
+                "lat": lat,
+                "lng": lng
+            })
+        return partner.to_dict()
+    
+    def get_nearby_partners(self, lat: float, lng: float, k: int = 10) -> List[dict]:
+        """
+        Nearest available partners to a point
+        """
+        return [
+            dict(partner.to_dict(), distanceKm=round(distance_km, 2))
+            for distance_km, partner in partner_registry.nearest(lat, lng, k=k)
+        ]
+    
+    async def _locate_pickup(self, assignment) -> Optional[Tuple[float, float]]:
+        """
+        Restaurant coordinates, or the drop location when the restaurant has none
+        """
+        restaurants, failed = await self.restaurants.get_restaurants_by_ids([assignment.restaurantId])
+        if failed:
+            # The drop location is no stand-in for a restaurant that exists
+            raise DatabaseUnavailable(f"could not look up restaurant {assignment.restaurantId}",
+                                      db_breaker.retry_after())
+        restaurant = restaurants.get(assignment.restaurantId)
+        if restaurant is not None:
+            point = eta_engine.locate(restaurant.get("address"))
+            if point is not None:
+                return point
+        return eta_engine.locate(assignment.deliveryAddress)
+    
+    async def _existing_assignment(self, db, assignment, pickup: Tuple[float, float]) -> Optional[dict]:
+        """
+        The assignment an earlier request made for this order, from this
+        worker's registry or the cross-worker claims collection
+        """
+        partner = partner_registry.partner_for_order(assignment.orderId)
+        if partner is None and db is not None:
+            held = await db_breaker.call(
+                lambda: db.deliveryPartners.find_one({"orderId": assignment.orderId}, {"_id": 1})
+            )
+            if held is None:
+                return None
+            partner = partner_registry.get(held["_id"])
+            if partner is None:
+                # Claimed through another worker that knows the partner's details
+                return {
+                    "orderId": assignment.orderId,
+                    "deliveryPartnerId": held["_id"],
+                    "deliveryPartnerName": None,
+                    "phone": None,
+                    "status": "ASSIGNED"
+                }
+        if partner is None:
+            return None
+        return self._assigned(assignment, partner, haversine_km(pickup[0], pickup[1], partner.lat, partner.lng))
+    
+    async def _confirm_claim(self, db, partner, order_id: str) -> bool:
+        """
+        Back a registry claim with the cross-worker claim. On a conflict the
+        partner is busy elsewhere, so it is released and kept out of this
+        worker's pool; a database error releases it and propagates, leaving
+        the partner available.
+        """
+        if db is None:
+            return True
+        try:
+            claimed = await self._claim_in_db(db, partner.id, order_id)
+        except BaseException:
+            partner_registry.release(partner.id, order_id)
+            raise
+        if not claimed:
+            partner_registry.release(partner.id, order_id)
+            partner_registry.set_available(partner.id, False)
+        return claimed
+    
+    async def _claim_in_db(self, db, partner_id: str, order_id: str) -> bool:
+        """
+        Cross-worker claim: succeeds only if no other order holds the partner
+        (re-claiming for the same order succeeds). The upsert collides on _id
+        when the partner is already taken; database errors raise
+        DatabaseUnavailable or the driver's error, never False.
+        """
+        try:
+            await db_breaker.call(lambda: db.deliveryPartners.update_one(
+                {"_id": partner_id, "orderId": {"$in": [None, order_id]}},
+                {"$set": {"orderId": order_id, "assignedAt": datetime.now(timezone.utc)}},
+                upsert=True
+            ))
+            return True
+        except DuplicateKeyError:
+            return False
+    
+    async def _announce(self, result: dict) -> dict:
+        await tracking_hub.publish(result["orderId"], "assigned", result)
+        return result
+    
+    def _assigned(self, assignment, partner, distance_km: float) -> dict:
+        return {
+            "orderId": assignment.orderId,
+            "deliveryPartnerId": partner.id,
+            "deliveryPartnerName": partner.name,
+            "phone": partner.phone,
+            "status": "ASSIGNED",
+            "distanceKm": round(distance_km, 2),
+            "estimatedPickupTime": max(1, math.ceil(float(eta_engine.travel_minutes(distance_km))))
+        }
+    
+    def _unassigned(self, assignment) -> dict:
+        return {
+            "orderId": assignment.orderId,
+            "deliveryPartnerId": None,
+            "status": "UNASSIGNED",
+            "message": "No delivery partner available nearby"
+        }
+    
+    def _get_mock_assignment(self, assignment) -> dict:
+        """
+        Return a mock assignment for development
         """
-        # Mock delivery assignment
         return {
             "orderId": assignment.orderId,
             "deliveryPartnerId": f"DP{random.randint(1000, 9999)}",
@@ -41,11 +298,35 @@ class DeliveryService:
     
     async def update_delivery_status(self, order_id: str, status: str) -> dict:
         """
-        Update delivery status for an order
+        Move an order to a new status; raises InvalidTransition for illegal
+        moves and StatusConflict when another request moved the order first
+        """
+        return await delivery_status.update(order_id, status)
+    
+    async def get_delivery_status(self, order_id: str) -> dict:
+        """
+        Current status of an order
         """
+        state = await delivery_status.get(order_id)
+        updated_at = state.get("updatedAt")
         return {
             "orderId": order_id,
-            "status": status,
-            "updatedAt": "2024-12-23T10:30:00Z",
-            "message": f"Order status updated to {status}"
+            "status": state["status"],
+            "version": state["version"],
+            "updatedAt": updated_at.isoformat() if updated_at else None
         }
+    
+    async def get_tracking_snapshot(self, order_id: str) -> dict:
+        """
+        Current status plus the assigned partner's last known position
+        """
+        snapshot = await self.get_delivery_status(order_id)
+        partner = partner_registry.partner_for_order(order_id)
+        snapshot["partner"] = partner.to_dict() if partner is not None else None
+        return snapshot
+    
+    async def get_delivery_events(self, order_id: str) -> List[dict]:
+        """
+        Status history of an order, oldest first
+        """
+        return await delivery_status.history(order_id)
@@ -0,0 +1,267 @@
+"""
+Delivery status - Order status state machine with an append-only event log
+Current state lives in `deliveries` ({_id: orderId, status, version}) and
+is the authority: a transition is a find_one_and_update conditioned on the
+status and version it was validated against, so PATCHes for one order
+landing on different workers can neither skip a state nor roll one back.
+When nothing matches, the order moved on elsewhere; the transition is
+re-checked against the stored state and retried, or refused (409).
+Reads and transitions run through db_breaker with its deadline, so an
+outage fails the PATCH fast with DatabaseUnavailable (503). A write cut
+off by the deadline may still have applied; the retried PATCH then finds
+the order already in that status and succeeds without a second move.
+
+Every transition is also appended to `deliveryEvents` through the
+write-behind buffer, so bursts of status pings cost few event writes.
+"""
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.config.database import get_database
+from app.services.cache import AsyncLRUCache
+from app.services.circuit_breaker import db_breaker
+from app.services.partner_registry import partner_registry
+from app.services.tracking_hub import END_EVENT, tracking_hub
+from app.services.write_buffer import write_buffer
+
+PLACED = "PLACED"
+CANCELLED = "CANCELLED"
+DELIVERED = "DELIVERED"
+
+# Happy path; CANCELLED is allowed from any non-terminal state
+STATUS_FLOW = ["PLACED", "CONFIRMED", "PREPARING", "PICKED_UP", "OUT_FOR_DELIVERY", "DELIVERED"]
+TERMINAL_STATUSES = frozenset({DELIVERED, CANCELLED})
+TRANSITIONS = {
+    status: frozenset({nxt, CANCELLED})
+    for status, nxt in zip(STATUS_FLOW, STATUS_FLOW[1:])
+}
+TRANSITIONS[DELIVERED] = frozenset()
+TRANSITIONS[CANCELLED] = frozenset()
+
+DELIVERY_STATE_CACHE_SIZE = int(os.getenv("DELIVERY_STATE_CACHE_SIZE", "100000"))
+DELIVERY_STATE_CACHE_TTL = float(os.getenv("DELIVERY_STATE_CACHE_TTL", "3600"))
+DELIVERY_EVENTS_LIMIT = 100
+# Conditional writes tried per update before giving up with a conflict
+DELIVERY_TRANSITION_ATTEMPTS = 3
+
+STATE_PROJECTION = {"status": 1, "version": 1, "updatedAt": 1}
+
+
+class InvalidTransition(ValueError):
+    def __init__(self, order_id: str, current: str, requested: str):
+        allowed = sorted(TRANSITIONS.get(current, ()))
+        super().__init__(
+            f"Order {order_id} cannot move from {current} to {requested}"
+            + (f" (allowed: {', '.join(allowed)})" if allowed else f" ({current} is final)")
+        )
+        self.current = current
+        self.requested = requested
+
+
+class StatusConflict(ValueError):
+    """
+    The order changed between reading its state and writing the transition
+    """
+
+    def __init__(self, order_id: str, requested: str):
+        super().__init__(f"Order {order_id} was updated concurrently; retry the move to {requested}")
+        self.requested = requested
+
+
+class DeliveryStatusTracker:
+    """
+    Validates and applies status transitions. With a database, each worker
+    keeps the last state it saw per order only as a hint for the
+    conditional write; refusals (unchanged, illegal) are only given against
+    state just read from MongoDB. Without one, the in-memory states are
+    the store.
+    """
+
+    def __init__(self):
+        self.states = AsyncLRUCache("delivery-status", DELIVERY_STATE_CACHE_SIZE, DELIVERY_STATE_CACHE_TTL)
+        self.transitions = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.conflicts = 0
+
+    def start(self, db):
+        write_buffer.start(db)
+
+    async def stop(self):
+        await write_buffer.stop()
+
+    async def get(self, order_id: str) -> dict:
+        if get_database() is None:
+            return await self.states.get_or_load(order_id, lambda: self._load(order_id))
+        state = await self._load(order_id)
+        self.states.set(order_id, state)
+        return dict(state)
+
+    async def update(self, order_id: str, status: str) -> dict:
+        """
+        Apply a status change; raises InvalidTransition when it is not
+        legal and StatusConflict when the order kept changing underneath it
+        """
+        db = get_database()
+        if db is None:
+            return await self._update_local(order_id, status)
+        if write_buffer.running:
+            await write_buffer.wait_for_capacity()
+
+        hint = self.states.get(order_id)
+        state = dict(hint) if hint is not None else await self._load(order_id)
+        fresh = hint is None
+        attempts = 0
+        while True:
+            current = state["status"]
+            if status == current or status not in TRANSITIONS.get(current, ()):
+                if not fresh:
+                    state, fresh = await self._load(order_id), True
+                    continue
+                if status == current:
+                    self.unchanged += 1
+                    self.states.set(order_id, state)
+                    return self._result(order_id, state, None, f"Order status already {status}")
+                self.rejected += 1
+                raise InvalidTransition(order_id, current, status)
+
+            stored = await self._transition(db, order_id, state, status)
+            if stored is not None:
+                break
+            self.conflicts += 1
+            self.states.invalidate(order_id)
+            attempts += 1
+            if attempts >= DELIVERY_TRANSITION_ATTEMPTS:
+                raise StatusConflict(order_id, status)
+            state, fresh = await self._load(order_id), True
+
+        self.states.set(order_id, stored)
+        self.transitions += 1
+        if write_buffer.running:
+            self._log_event(order_id, stored, current)
+        return await self._applied(order_id, stored, current, write_buffer.running)
+
+    async def _update_local(self, order_id: str, status: str) -> dict:
+        # No database: the in-memory state is the only copy
+        state = await self.states.get_or_load(order_id, lambda: self._load(order_id))
+        current = state["status"]
+        if status == current:
+            self.unchanged += 1
+            return self._result(order_id, state, None, f"Order status already {status}")
+        if status not in TRANSITIONS.get(current, ()):
+            self.rejected += 1
+            raise InvalidTransition(order_id, current, status)
+        state["status"] = status
+        state["version"] += 1
+        state["updatedAt"] = datetime.now(timezone.utc)
+        self.transitions += 1
+        return await self._applied(order_id, state, current, False)
+
+    async def _applied(self, order_id: str, state: dict, previous: str, persist: bool) -> dict:
+        status = state["status"]
+        if status in TERMINAL_STATUSES:
+            self._release_partner(order_id, persist)
+        result = self._result(order_id, state, previous, f"Order status updated to {status}")
+        await tracking_hub.publish(order_id, "status", result)
+        if status in TERMINAL_STATUSES:
+            await tracking_hub.publish(order_id, END_EVENT, {"orderId": order_id, "status": status})
+        return result
+
+    async def history(self, order_id: str, limit: int = DELIVERY_EVENTS_LIMIT) -> List[dict]:
+        """
+        Status events for an order, oldest first
+        """
+        db = get_database()
+        if db is None:
+            return []
+        await write_buffer.flush()
+        cursor = db.deliveryEvents.find(
+            {"orderId": order_id}, {"_id": 0}
+        ).sort("version", 1).limit(limit)
+        return [event async for event in cursor]
+
+    async def _load(self, order_id: str) -> dict:
+        db = get_database()
+        if db is not None:
+            doc = await db_breaker.call(lambda: db.deliveries.find_one({"_id": order_id}, STATE_PROJECTION))
+            if doc is not None:
+                return self._state(doc)
+        # Orders are created by the Node service; the first status we hear
+        # about is a move out of PLACED
+        return {"status": PLACED, "version": 0, "updatedAt": None}
+
+    async def _transition(self, db, order_id: str, state: dict, status: str) -> Optional[dict]:
+        """
+        Write the move from state to status if the stored order is still
+        in that state; returns the new state, or None when it is not
+        """
+        now = datetime.now(timezone.utc)
+        version = state["version"]
+        try:
+            doc = await db_breaker.call(lambda: db.deliveries.find_one_and_update(
+                {"_id": order_id, "status": state["status"], "version": version},
+                {
+                    "$set": {"status": status, "version": version + 1, "updatedAt": now, f"statusAt.{status}": now},
+                    "$setOnInsert": {"createdAt": now},
+                },
+                projection=STATE_PROJECTION,
+                # Only an order we have never stored may be created here
+                upsert=version == 0,
+                return_document=ReturnDocument.AFTER,
+            ))
+        except DuplicateKeyError:
+            # The upsert lost to a document another worker already stored
+            return None
+        return self._state(doc) if doc is not None else None
+
+    @staticmethod
+    def _state(doc: dict) -> dict:
+        return {"status": doc["status"], "version": doc.get("version", 0), "updatedAt": doc.get("updatedAt")}
+
+    def _log_event(self, order_id: str, state: dict, previous: str):
+        version = state["version"]
+        # Deterministic _id keeps a retried flush from logging an event twice
+        write_buffer.put("deliveryEvents", InsertOne({
+            "_id": f"{order_id}:{version}",
+            "orderId": order_id,
+            "version": version,
+            "from": previous,
+            "status": state["status"],
+            "at": state["updatedAt"],
+        }))
+
+    def _release_partner(self, order_id: str, persist: bool):
+        partner_registry.release_order(order_id)
+        if persist:
+            write_buffer.put("deliveryPartners", UpdateOne(
+                {"orderId": order_id},
+                {"$set": {"orderId": None, "releasedAt": datetime.now(timezone.utc)}}
+            ), key=order_id)
+
+    def _result(self, order_id: str, state: dict, previous: Optional[str], message: str) -> dict:
+        updated_at = state.get("updatedAt")
+        return {
+            "orderId": order_id,
+            "status": state["status"],
+            "previousStatus": previous,
+            "version": state["version"],
+            "updatedAt": updated_at.isoformat() if updated_at else None,
+            "message": message
+        }
+
+    def stats(self) -> dict:
+        return {
+            "transitions": self.transitions,
+            "unchanged": self.unchanged,
+            "rejected": self.rejected,
+            "conflicts": self.conflicts,
+            "trackedOrders": len(self.states),
+            "writeBuffer": write_buffer.stats(),
+        }
+
+
+delivery_status = DeliveryStatusTracker()
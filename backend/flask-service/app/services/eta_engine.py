@@ -0,0 +1,198 @@
+"""
+ETA engine - Distance-based delivery time estimates
+Haversine distance scaled by a road factor, a time-of-day speed profile and
+restaurant prep time. All math is NumPy-vectorized so a whole batch of
+(restaurant, destination) pairs is computed in one pass.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Straight-line distance underestimates city road distance
+ROAD_FACTOR = float(os.getenv("ETA_ROAD_FACTOR", "1.35"))
+DEFAULT_PREP_MINUTES = float(os.getenv("ETA_DEFAULT_PREP_MINUTES", "12"))
+# Rider reaching the restaurant, handover, parking at the destination
+HANDOFF_MINUTES = float(os.getenv("ETA_HANDOFF_MINUTES", "6"))
+DEFAULT_ETA_MINUTES = 30
+MIN_ETA_MINUTES = 10
+MAX_ETA_MINUTES = 120
+# Local time for the speed profile (default IST)
+TZ_OFFSET_MINUTES = int(os.getenv("ETA_TZ_OFFSET_MINUTES", "330"))
+
+# Average two-wheeler speed in km/h for each local hour of the day
+SPEED_PROFILE_KMH = np.array([
+    28, 28, 28, 28, 28, 27,   # 00-05 night
+    24, 20, 16, 16, 17, 20,   # 06-11 morning peak
+    18, 18, 19, 22, 21, 16,   # 12-17 lunch, afternoon
+    15, 15, 16, 19, 23, 26,   # 18-23 evening peak
+], dtype=np.float64)
+
+# Fallback centroids when an address has no coordinates; extend or replace
+# with PINCODE_CENTROIDS_FILE (JSON object of pincode -> [lat, lng])
+PINCODE_CENTROIDS: Dict[str, Tuple[float, float]] = {
+    "600001": (13.0940, 80.2870),
+    "600004": (13.0339, 80.2619),
+    "600017": (13.0418, 80.2341),
+    "600020": (13.0012, 80.2565),
+    "600028": (13.0280, 80.2590),
+    "600040": (13.0850, 80.2101),
+    "600041": (12.9830, 80.2594),
+    "600042": (12.9791, 80.2209),
+    "600090": (13.0002, 80.2668),
+    "600096": (12.9654, 80.2461),
+    "600113": (12.9863, 80.2432),
+    "560001": (12.9716, 77.5946),
+    "560034": (12.9352, 77.6245),
+    "560038": (12.9784, 77.6408),
+    "560066": (12.9698, 77.7500),
+    "400001": (18.9388, 72.8354),
+    "400050": (19.0596, 72.8295),
+    "110001": (28.6328, 77.2197),
+    "500081": (17.4483, 78.3915),
+}
+
+_centroids_file = os.getenv("PINCODE_CENTROIDS_FILE")
+if _centroids_file:
+    with open(_centroids_file) as f:
+        PINCODE_CENTROIDS.update({k: tuple(v) for k, v in json.load(f).items()})
+
+
+def _build_prefix_centroids() -> Dict[str, Tuple[float, float]]:
+    """
+    Average centroid per 3-digit pincode prefix (sorting district)
+    """
+    groups: Dict[str, list] = {}
+    for pincode, point in PINCODE_CENTROIDS.items():
+        groups.setdefault(pincode[:3], []).append(point)
+    return {
+        prefix: tuple(np.mean(np.array(points), axis=0).tolist())
+        for prefix, points in groups.items()
+    }
+
+
+_PREFIX_CENTROIDS = _build_prefix_centroids()
+
+
+def parse_coordinates(coordinates) -> Optional[Tuple[float, float]]:
+    """
+    Read (lat, lng) from {lat, lng}, {latitude, longitude} or a GeoJSON point
+    """
+    if not coordinates or not isinstance(coordinates, dict):
+        return None
+    try:
+        if coordinates.get("type") == "Point":
+            lng, lat = coordinates["coordinates"][:2]
+        else:
+            lat = coordinates.get("lat", coordinates.get("latitude"))
+            lng = coordinates.get("lng", coordinates.get("longitude"))
+        if lat is None or lng is None:
+            return None
+        return float(lat), float(lng)
+    except (TypeError, ValueError, KeyError, IndexError):
+        return None
+
+
+def locate(address) -> Optional[Tuple[float, float]]:
+    """
+    Coordinates of an address (dict or model), falling back to the pincode
+    centroid and then the pincode-prefix centroid
+    """
+    if address is None:
+        return None
+    if not isinstance(address, dict):
+        address = address.dict() if hasattr(address, "dict") else dict(address)
+
+    point = parse_coordinates(address.get("coordinates"))
+    if point is not None:
+        return point
+
+    pincode = str(address.get("pincode") or "").strip()
+    if not pincode:
+        return None
+    return PINCODE_CENTROIDS.get(pincode) or _PREFIX_CENTROIDS.get(pincode[:3])
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lng: float, precision: int = 7) -> Tuple[str, Tuple[float, float]]:
+    """
+    Geohash of a point and the centre of its cell. At precision 7 a cell is
+    about 150m x 150m, so nearby addresses share a hash.
+    """
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    lat_cell = min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    lng_cell = min(int((lng + 180.0) / 360.0 * (1 << lng_bits)), (1 << lng_bits) - 1)
+
+    # Interleave bits, longitude first, most significant bit first
+    code = 0
+    for i in range(bits):
+        if i % 2 == 0:
+            bit = (lng_cell >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_cell >> (lat_bits - 1 - i // 2)) & 1
+        code = (code << 1) | bit
+    chars = [_GEOHASH_ALPHABET[(code >> (5 * (precision - 1 - i))) & 31] for i in range(precision)]
+
+    center = (
+        (lat_cell + 0.5) / (1 << lat_bits) * 180.0 - 90.0,
+        (lng_cell + 0.5) / (1 << lng_bits) * 360.0 - 180.0,
+    )
+    return "".join(chars), center
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Great-circle distance in km; accepts scalars or equal-length arrays
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def local_hour(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return (now.astimezone(timezone.utc) + timedelta(minutes=TZ_OFFSET_MINUTES)).hour
+
+
+def estimate_minutes(origins: np.ndarray, destinations: np.ndarray,
+                     prep_minutes: np.ndarray, fallback_minutes: np.ndarray,
+                     now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Vectorized ETA in whole minutes.
+
+    origins / destinations are (n, 2) arrays of (lat, lng) with NaN rows for
+    unknown locations; those rows get fallback_minutes instead.
+    """
+    distance_km = haversine_km(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+    eta = prep_minutes + HANDOFF_MINUTES + travel_minutes(distance_km, now)
+    eta = np.where(np.isnan(eta), fallback_minutes, eta)
+    return np.clip(np.ceil(eta), MIN_ETA_MINUTES, MAX_ETA_MINUTES).astype(np.int64)
+
+
+def minutes_for_distance(distance_km: np.ndarray, prep_minutes: np.ndarray,
+                         now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Vectorized ETA in whole minutes for already-known distances
+    """
+    eta = prep_minutes + HANDOFF_MINUTES + travel_minutes(distance_km, now)
+    return np.clip(np.ceil(eta), MIN_ETA_MINUTES, MAX_ETA_MINUTES).astype(np.int64)
+
+
+def travel_minutes(distance_km, now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Riding time for a straight-line distance at the current hour's speed
+    """
+    speed_kmh = SPEED_PROFILE_KMH[local_hour(now)]
+    return np.asarray(distance_km, dtype=np.float64) * ROAD_FACTOR / speed_kmh * 60.0
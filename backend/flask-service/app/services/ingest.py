@@ -0,0 +1,345 @@
+"""
+Bulk ingestion - Streams CSV / JSONL restaurants or menu items into MongoDB
+Rows are parsed as they arrive, validated against the Restaurant / MenuItem
+models and upserted by _id in unordered bulk_writes of INGEST_BATCH_SIZE.
+At most INGEST_MAX_IN_FLIGHT batches are being written at once; reading
+waits for a free slot, so memory stays flat however large the input is.
+A bad row is reported with its row number and skipped; it never aborts the
+run. Caches and indexes are refreshed once at the end, not per row.
+
+CSV: one column per field, dotted names for nested ones
+(address.city, address.coordinates.lat) and "|" between list values
+(cuisine, tags). Empty cells count as missing. Rows are numbered from 1
+in input order (CSV header and blank lines excluded).
+"""
+import asyncio
+import csv
+import os
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+
+import orjson
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.config.indexes import location_point
+from app.models.schemas import MenuItem, Restaurant
+from app.services.catalog_index import catalog_index
+from app.services.menu_feed import menu_feed
+from app.services.menu_service import menu_cache, snapshot_cache
+from app.services.pagination import cursor_id
+from app.services.search_index import search_index
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "4"))
+INGEST_MAX_ERRORS = int(os.getenv("INGEST_MAX_ERRORS", "1000"))
+
+# kind -> (model, collection)
+KINDS: Dict[str, Tuple[Type[BaseModel], str]] = {
+    "restaurants": (Restaurant, "restaurants"),
+    "menu": (MenuItem, "menuItems"),
+}
+# model -> {field name: stored key}
+ALIASES = {
+    model: {name: field.alias or name for name, field in model.model_fields.items()}
+    for model, _ in KINDS.values()
+}
+FORMATS = ("csv", "jsonl")
+LIST_FIELDS = ("cuisine", "tags")
+
+# (row number, document, error): exactly one of document / error is set
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+class IngestReport:
+
+    def __init__(self, kind: str, max_errors: int = INGEST_MAX_ERRORS):
+        self.kind = kind
+        self.max_errors = max_errors
+        self.rows = 0
+        self.valid = 0
+        self.upserted = 0
+        self.modified = 0
+        self.matched = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.batches = 0
+        self._started = time.perf_counter()
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def written(self, result: dict):
+        self.upserted += result.get("nUpserted", 0)
+        self.modified += result.get("nModified", 0)
+        self.matched += result.get("nMatched", 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "valid": self.valid,
+            "upserted": self.upserted,
+            "modified": self.modified,
+            "matched": self.matched,
+            "failed": self.failed,
+            "batches": self.batches,
+            "seconds": round(time.perf_counter() - self._started, 3),
+            "errors": self.errors,
+            "errorsTruncated": self.failed > len(self.errors),
+        }
+
+
+# ----------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines (without the newline)
+    """
+    pending = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _decode(line: bytes, first: bool) -> str:
+    text = line.decode("utf-8")
+    if first and text.startswith("\ufeff"):
+        text = text[1:]
+    return text.rstrip("\r")
+
+
+async def parse_jsonl(lines: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            doc = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(doc, dict):
+            yield row, None, "Expected a JSON object"
+            continue
+        yield row, doc, None
+
+
+def _csv_document(header: List[str], values: List[str]) -> dict:
+    doc: dict = {}
+    for name, value in zip(header, values):
+        if value == "":
+            continue
+        *parents, leaf = name.split(".")
+        target = doc
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        if leaf in LIST_FIELDS and not parents:
+            target[leaf] = [part.strip() for part in value.split("|") if part.strip()]
+        elif parents and parents[-1] == "coordinates":
+            # Coordinates are a free-form dict in the models, so coerce here
+            target[leaf] = float(value)
+        else:
+            target[leaf] = value
+    return doc
+
+
+async def parse_csv(lines: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    header: Optional[List[str]] = None
+    row = 0
+    record = ""
+    quotes = 0
+    first = True
+    async for line in lines:
+        try:
+            text = _decode(line, first)
+        except UnicodeDecodeError as e:
+            row += 1
+            yield row, None, f"Invalid UTF-8: {e}"
+            continue
+        first = False
+        # A quoted field may span lines: a record is complete once its
+        # quotes balance
+        record = f"{record}\n{text}" if record else text
+        quotes += text.count('"')
+        if quotes % 2:
+            continue
+        text, record, quotes = record, "", 0
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            values, error = None, f"Invalid CSV: {e}"
+        if header is None:
+            if values is None:
+                raise ValueError(f"Invalid CSV header: {error}")
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if values is None:
+            yield row, None, error
+            continue
+        if len(values) > len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        try:
+            doc = _csv_document(header, values)
+        except ValueError as e:
+            yield row, None, f"Invalid number: {e}"
+            continue
+        yield row, doc, None
+    if record:
+        row += 1
+        yield row, None, "Unterminated quoted field"
+
+
+def parse(fmt: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    lines = iter_lines(chunks)
+    return parse_csv(lines) if fmt == "csv" else parse_jsonl(lines)
+
+
+def describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def to_upsert(model: Type[BaseModel], doc: dict, now: datetime) -> UpdateOne:
+    """
+    Validate one row and turn it into an upsert by _id. Fields the row sets
+    overwrite; defaults for the rest only apply when the row is new.
+    ObjectId-shaped ids are stored as ObjectIds, like the documents an
+    export came from and as keyset cursors compare them. Restaurant
+    addresses get their GeoJSON address.location for the 2dsphere index.
+    """
+    item = model.model_validate(doc)
+    data = item.model_dump(by_alias=True)
+    aliases = ALIASES[model]
+    given = {aliases[name] for name in item.model_fields_set}
+    doc_id = cursor_id(data.pop("_id"))
+    point = location_point(data.get("address"))
+    if point is not None:
+        data["address"]["location"] = point
+    update_set = {key: value for key, value in data.items() if key in given}
+    update_set["updatedAt"] = now
+    on_insert = {key: value for key, value in data.items() if key not in given}
+    on_insert["createdAt"] = now
+    return UpdateOne({"_id": doc_id}, {"$set": update_set, "$setOnInsert": on_insert}, upsert=True)
+
+
+# ----------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------
+
+async def ingest(db, kind: str, rows: AsyncIterator[ParsedRow],
+                 batch_size: int = INGEST_BATCH_SIZE,
+                 max_in_flight: int = INGEST_MAX_IN_FLIGHT,
+                 report: Optional[IngestReport] = None) -> IngestReport:
+    """
+    Validate and upsert every row; returns the report once all batches
+    are written
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r} (expected one of {', '.join(KINDS)})")
+    model, collection_name = KINDS[kind]
+    collection = db[collection_name]
+    report = report or IngestReport(kind)
+    slots = asyncio.Semaphore(max_in_flight)
+    writing = set()
+
+    async def write(ops: List[UpdateOne], numbers: List[int]):
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            report.written(result.bulk_api_result)
+        except BulkWriteError as e:
+            report.written(e.details)
+            for write_error in e.details.get("writeErrors", ()):
+                report.error(numbers[write_error["index"]], write_error.get("errmsg", "Write failed"))
+        except PyMongoError as e:
+            for number in numbers:
+                report.error(number, f"Batch write failed: {e}")
+        finally:
+            slots.release()
+
+    async def submit(ops: List[UpdateOne], numbers: List[int]):
+        await slots.acquire()
+        report.batches += 1
+        task = asyncio.create_task(write(ops, numbers))
+        writing.add(task)
+        task.add_done_callback(writing.discard)
+
+    ops: List[UpdateOne] = []
+    numbers: List[int] = []
+    now = datetime.now(timezone.utc)
+    try:
+        async for row, doc, error in rows:
+            report.rows += 1
+            if error is not None:
+                report.error(row, error)
+                continue
+            try:
+                ops.append(to_upsert(model, doc, now))
+            except ValidationError as e:
+                report.error(row, describe(e))
+                continue
+            numbers.append(row)
+            report.valid += 1
+            if len(ops) >= batch_size:
+                await submit(ops, numbers)
+                ops, numbers = [], []
+                now = datetime.now(timezone.utc)
+                # Validation is CPU-bound; let other requests run between batches
+                await asyncio.sleep(0)
+        if ops:
+            await submit(ops, numbers)
+    finally:
+        if writing:
+            await asyncio.gather(*writing, return_exceptions=True)
+    return report
+
+
+async def refresh(db, kind: str):
+    """
+    One refresh of this worker's caches and indexes after an ingest
+    """
+    if kind == "restaurants":
+        if catalog_index.loaded:
+            await catalog_index.load(db)
+        return
+    menu_cache.clear()
+    snapshot_cache.clear()
+    # A followed change stream has already delivered every item to search
+    if search_index.loaded and not menu_feed.following:
+        await search_index.load(db, catalog_index)
+
+
+async def iter_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    """
+    Read a file in chunks off the event loop
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def guess_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
@@ -0,0 +1,120 @@
+"""
+Last-known-good store - Real catalog data to serve while MongoDB is down
+Menus are remembered, as the menu cache's MenuTables, as they are loaded
+(bounded, least recently loaded dropped first). While the database is healthy the catalog and those menus
+are written to LKG_SNAPSHOT_PATH every LKG_SNAPSHOT_INTERVAL seconds, so
+a worker that starts during an outage still has real data to serve.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import orjson
+
+from app.routes.responses import dumps
+from app.services.circuit_breaker import db_breaker
+from app.services.menu_table import MenuTable
+
+LKG_SNAPSHOT_PATH = os.getenv(
+    "LKG_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "fooddelivery-lkg.json")
+)
+LKG_SNAPSHOT_INTERVAL = float(os.getenv("LKG_SNAPSHOT_INTERVAL", "300"))
+LKG_MENU_SIZE = int(os.getenv("LKG_MENU_SIZE", "2048"))
+
+
+class LastKnownGood:
+
+    def __init__(self, path: str = LKG_SNAPSHOT_PATH):
+        self.path = path
+        self.restaurants: List[dict] = []
+        self._menus: "OrderedDict[str, MenuTable]" = OrderedDict()
+        self.saved_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.served = 0
+
+    def remember_menu(self, restaurant_id: str, table: MenuTable):
+        self._menus[restaurant_id] = table
+        self._menus.move_to_end(restaurant_id)
+        while len(self._menus) > LKG_MENU_SIZE:
+            self._menus.popitem(last=False)
+
+    def menu(self, restaurant_id: str) -> Optional[MenuTable]:
+        table = self._menus.get(restaurant_id)
+        if table is not None:
+            self.served += 1
+        return table
+
+    def load(self):
+        """
+        Read the snapshot file, if any, left by an earlier run
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"⚠️  Could not read last-known-good snapshot {self.path}: {e}")
+            return
+        self.restaurants = snapshot.get("restaurants") or []
+        for restaurant_id, items in (snapshot.get("menus") or {}).items():
+            self._menus.setdefault(restaurant_id, MenuTable(items))
+        self.saved_at = snapshot.get("savedAt")
+        print(f"✓ Last-known-good snapshot read: {len(self.restaurants)} restaurants, {len(self._menus)} menus")
+
+    def start(self, catalog):
+        if self._task is None and self.path:
+            self._task = asyncio.create_task(self._run(catalog))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, catalog):
+        while True:
+            await asyncio.sleep(LKG_SNAPSHOT_INTERVAL)
+            # Only a live catalog is worth saving over the previous snapshot
+            if not db_breaker.closed or not catalog.loaded or catalog.stale:
+                continue
+            await self.save(catalog.documents())
+
+    async def save(self, restaurants: List[dict]):
+        self.restaurants = restaurants
+        saved_at = time.time()
+        # Catalog documents and MenuTables are replaced, never mutated, so
+        # the thread can serialize these references while the loop runs on
+        tables = dict(self._menus)
+        try:
+            await asyncio.to_thread(self._write, saved_at, restaurants, tables)
+            self.saved_at = saved_at
+        except OSError as e:
+            print(f"Error writing last-known-good snapshot: {e}")
+
+    def _write(self, saved_at: float, restaurants: List[dict], tables: Dict[str, MenuTable]):
+        menus = {restaurant_id: table.rows() for restaurant_id, table in tables.items()}
+        body = dumps({"savedAt": saved_at, "restaurants": restaurants, "menus": menus})
+        # Write aside and rename, so a crash never leaves a torn snapshot
+        # (workers sharing the path each replace it whole)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, self.path)
+
+    def stats(self) -> dict:
+        return {
+            "restaurants": len(self.restaurants),
+            "menus": len(self._menus),
+            "savedAt": self.saved_at,
+            "served": self.served,
+        }
+
+
+last_known_good = LastKnownGood()
@@ -0,0 +1,267 @@
+"""
+Menu feed - One menuItems change follower per worker, shared by its listeners
+Follows the menuItems change stream, falling back to updatedAt polling on
+servers without change streams (standalone mongod). Polling cannot see
+deletes; listeners that must notice them should also expire what they hold
+while `following` is False.
+
+Every change carries a version taken from the server's clock (the change's
+clusterTime, or updatedAt when polling), so versions agree across workers.
+The feed keeps a bounded per-restaurant history of recent changes for
+delta sync; asking for changes older than the history reaches returns
+None, meaning the caller must fetch the whole menu again.
+
+After a lost connection the stream resumes from the last resume token, so
+no change is skipped. When it cannot (no token yet, or the oplog moved
+past it) it starts over and tells its resync listeners that changes were
+missed, so they drop whatever they derived from the old stream.
+"""
+import asyncio
+import calendar
+import os
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from bson import Timestamp
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+
+MENU_FEED_POLL_INTERVAL = float(os.getenv("MENU_FEED_POLL_INTERVAL", "5"))
+# Changes kept per restaurant, and restaurants kept (least recently changed
+# are dropped first)
+MENU_HISTORY_SIZE = int(os.getenv("MENU_HISTORY_SIZE", "256"))
+MENU_HISTORY_RESTAURANTS = int(os.getenv("MENU_HISTORY_RESTAURANTS", "10000"))
+
+# Everything the listeners need (search fields, response fields, updatedAt)
+MENU_FEED_PROJECTION = {"createdAt": 0, "__v": 0}
+
+# listener(restaurant_id, item_id, doc): doc is None when the item was
+# deleted; restaurant_id is None for a delete of an item never seen before
+MenuListener = Callable[[Optional[str], str, Optional[dict]], None]
+
+# (version, item_id, doc or None)
+Change = Tuple[int, str, Optional[dict]]
+
+
+# Versions are seconds in the high bits and an in-second counter in the low
+# VERSION_BITS, which keeps them exact as JavaScript numbers (< 2**53)
+VERSION_BITS = 21
+VERSION_MASK = (1 << VERSION_BITS) - 1
+
+
+def timestamp_version(ts: Timestamp) -> int:
+    return (ts.time << VERSION_BITS) | min(ts.inc, VERSION_MASK)
+
+
+def datetime_version(value: datetime) -> int:
+    # pymongo returns naive UTC datetimes
+    return (calendar.timegm(value.utctimetuple()) << VERSION_BITS) | (value.microsecond // 1000)
+
+
+class MenuHistory:
+    """
+    Recent changes to one restaurant's items, oldest first. Changes at or
+    before floor may be missing.
+    """
+    __slots__ = ("floor", "entries")
+
+    def __init__(self, floor: int):
+        self.floor = floor
+        self.entries: Deque[Change] = deque()
+
+    def append(self, change: Change):
+        self.entries.append(change)
+        if len(self.entries) > MENU_HISTORY_SIZE:
+            self.floor = self.entries.popleft()[0]
+
+
+class MenuChangeFeed:
+
+    def __init__(self):
+        self._listeners: List[MenuListener] = []
+        self._resync_listeners: List[Callable[[], None]] = []
+        self._resume_token: Optional[dict] = None
+        self._owners: Dict[str, str] = {}
+        self._last_updated: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._history: "OrderedDict[str, MenuHistory]" = OrderedDict()
+        # Changes at or before floor were not seen by this worker
+        self.floor = 0
+        self.position = 0
+        self.tracking = False
+        self.following = False
+        self.changes = 0
+
+    def add_listener(self, listener: MenuListener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def add_resync_listener(self, listener: Callable[[], None]):
+        """
+        Call listener() when the feed restarts without its resume point
+        """
+        if listener not in self._resync_listeners:
+            self._resync_listeners.append(listener)
+
+    def start(self, db):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.following = False
+        self.tracking = False
+
+    def publish(self, item_id: str, doc: Optional[dict], version: Optional[int] = None):
+        """
+        Record one change and hand it to every listener
+        """
+        if doc is None:
+            restaurant_id = self._owners.pop(item_id, None)
+        else:
+            restaurant_id = str(doc.get("restaurantId"))
+            self._owners[item_id] = restaurant_id
+            updated_at = doc.get("updatedAt")
+            if isinstance(updated_at, datetime) and (
+                self._last_updated is None or updated_at > self._last_updated
+            ):
+                self._last_updated = updated_at
+        if version is not None:
+            self._record(restaurant_id, item_id, doc, version)
+        self.changes += 1
+        for listener in self._listeners:
+            listener(restaurant_id, item_id, doc)
+
+    def _record(self, restaurant_id: Optional[str], item_id: str, doc: Optional[dict], version: int):
+        version = max(version, self.position)
+        self.position = version
+        if restaurant_id is None:
+            # A delete we cannot attribute: no restaurant's history is complete
+            self.floor = version
+            return
+        history = self._history.get(restaurant_id)
+        if history is None:
+            history = self._history[restaurant_id] = MenuHistory(self.floor)
+        else:
+            self._history.move_to_end(restaurant_id)
+        history.append((version, item_id, doc))
+        if len(self._history) > MENU_HISTORY_RESTAURANTS:
+            _, dropped = self._history.popitem(last=False)
+            self.floor = max(self.floor, dropped.entries[-1][0])
+
+    def _reset(self, version: int):
+        """
+        Start a new history at version (a new follower may have missed
+        changes, and the two modes' versions are not interchangeable)
+        """
+        self._history.clear()
+        self.floor = self.position = version
+        self.tracking = True
+
+    def changes_since(self, restaurant_id: str, since: int) -> Optional[List[Change]]:
+        """
+        The restaurant's changes after version since, oldest first, or None
+        when they are not all known here (the caller must resync)
+        """
+        if not self.tracking or since > self.position or since < self.floor:
+            return None
+        history = self._history.get(restaurant_id)
+        if history is None:
+            return []
+        if since < history.floor:
+            return None
+        return [change for change in history.entries if change[0] > since]
+
+    async def _run(self, db):
+        while True:
+            try:
+                await self._watch(db)
+            except ConnectionFailure as e:
+                # Server unreachable, not a server without change streams
+                self.following = False
+                print(f"⚠️  Menu change stream lost ({e}) - retrying in {MENU_FEED_POLL_INTERVAL}s")
+                await asyncio.sleep(MENU_FEED_POLL_INTERVAL)
+                continue
+            except PyMongoError as e:
+                print(f"⚠️  Menu change stream unavailable ({e}) - polling every {MENU_FEED_POLL_INTERVAL}s")
+            break
+        self.following = False
+        await self._poll(db)
+
+    async def _watch(self, db):
+        token = self._resume_token
+        if token is not None:
+            try:
+                async with db.menuItems.watch(full_document="updateLookup", resume_after=token) as stream:
+                    self.following = True
+                    print("✓ Menu feed resumed menuItems change stream")
+                    await self._follow(stream)
+                return
+            except OperationFailure as e:
+                if self._resume_token is not token:
+                    raise
+                # Typically the oplog no longer reaches back to the token
+                print(f"⚠️  Could not resume menu change stream ({e}) - starting over")
+                self._resume_token = None
+
+        # Start exactly where the history starts, so no change falls between
+        hello = await db.command("hello")
+        start = hello.get("operationTime")
+        async with db.menuItems.watch(full_document="updateLookup", start_at_operation_time=start) as stream:
+            missed = self.tracking
+            self._reset(timestamp_version(start) if start else 0)
+            self.following = True
+            print("✓ Menu feed following menuItems change stream")
+            if missed:
+                for listener in self._resync_listeners:
+                    listener()
+            await self._follow(stream)
+
+    async def _follow(self, stream):
+        self._resume_token = stream.resume_token
+        async for change in stream:
+            self._resume_token = stream.resume_token
+            if "documentKey" not in change:
+                continue
+            version = timestamp_version(change["clusterTime"]) if "clusterTime" in change else None
+            # fullDocument is None when the item was deleted before the lookup
+            self.publish(str(change["documentKey"]["_id"]), change.get("fullDocument"), version)
+
+    async def _poll(self, db):
+        try:
+            latest = await db.menuItems.find({}, {"updatedAt": 1}).sort("updatedAt", -1).limit(1).to_list(1)
+            if latest and isinstance(latest[0].get("updatedAt"), datetime):
+                self._last_updated = latest[0]["updatedAt"]
+        except PyMongoError as e:
+            print(f"Error starting menu feed: {e}")
+        self._reset(datetime_version(self._last_updated) if self._last_updated else 0)
+        while True:
+            await asyncio.sleep(MENU_FEED_POLL_INTERVAL)
+            try:
+                since = {"$gt": self._last_updated} if self._last_updated else {"$exists": True}
+                delta_filter = {"updatedAt": since}
+                async for doc in db.menuItems.find(delta_filter, MENU_FEED_PROJECTION).sort("updatedAt", 1):
+                    updated_at = doc.get("updatedAt")
+                    version = datetime_version(updated_at) if isinstance(updated_at, datetime) else None
+                    self.publish(str(doc["_id"]), doc, version)
+            except PyMongoError as e:
+                print(f"Error polling menu changes: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "following": self.following,
+            "changes": self.changes,
+            "version": self.position,
+            "floor": self.floor,
+            "restaurants": len(self._history),
+            "listeners": len(self._listeners),
+        }
+
+
+menu_feed = MenuChangeFeed()
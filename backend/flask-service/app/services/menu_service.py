@@ -1,38 +1,247 @@
 """
 Menu service - Business logic for menu operations
+Cached menus are MenuTables (columnar); item dicts are built per response.
 """
 from app.config.database import get_database
-from typing import List
+from app.models.serializers import MENU_ITEM_PROJECTION
+from app.routes.responses import dumps, packb
+from app.services.cache import AsyncLRUCache
+from app.services.circuit_breaker import DatabaseUnavailable, db_breaker
+from app.services.last_known_good import last_known_good
+from app.services.menu_feed import menu_feed
+from app.services.menu_table import MenuTable
+from app.services.pagination import MENU_CURSOR, cursor_id, decode_cursor, encode_cursor
+from bisect import bisect_right
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import orjson
+import os
+
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", "2048"))
+MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", "300"))
+# Snapshots are dropped by the menu feed on change, so while it follows the
+# change stream they only expire to bound memory held by idle restaurants
+MENU_SNAPSHOT_TTL = float(os.getenv("MENU_SNAPSHOT_TTL", "3600"))
+MENU_LIMIT = 100
+# Bodies smaller than this are not worth a gzip copy
+SNAPSHOT_GZIP_MIN_BYTES = 1024
+STREAM_BATCH_SIZE = 500
+
+# Keyset order for menu pages; cached menus are kept in this order
+MENU_SORT = [("category", 1), ("_id", 1)]
+
+# Shared by every MenuService instance, keyed by restaurant id
+menu_cache = AsyncLRUCache("menu", maxsize=MENU_CACHE_SIZE, ttl=MENU_CACHE_TTL)
+snapshot_cache = AsyncLRUCache("menu-snapshot", maxsize=MENU_CACHE_SIZE, ttl=MENU_CACHE_TTL)
+
+class MenuSnapshot:
+    """
+    A restaurant's first menu page serialized once: the JSON body, a gzip
+    copy and a strong ETag per encoding, derived from the body's hash.
+    The MessagePack form is packed on first use.
+    version is the menu feed position the page is at least as new as.
+    """
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag", "msgpack_etag", "_packed", "version")
+
+    def __init__(self, menu: dict, version: int = 0):
+        self.version = version
+        self.body = dumps(menu)
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.msgpack_etag = f'"{digest}-mp"'
+        self._packed = None
+        self.gzipped = None
+        self.gzip_etag = None
+        if len(self.body) >= SNAPSHOT_GZIP_MIN_BYTES:
+            # mtime=0 keeps the gzip bytes identical across workers
+            self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self.gzip_etag = f'"{digest}-gz"'
+
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = packb(orjson.loads(self.body))
+        return self._packed
+
+def _on_menu_change(restaurant_id: Optional[str], item_id: str, doc: Optional[dict]):
+    """
+    Menu feed listener: drop the changed restaurant's cached menu
+    """
+    if restaurant_id is None:
+        # Delete of an item this worker never saw change; its owner is unknown
+        menu_cache.clear()
+        snapshot_cache.clear()
+        return
+    menu_cache.invalidate(restaurant_id)
+    snapshot_cache.invalidate(restaurant_id)
+
+def _on_menu_resync():
+    """
+    Menu feed restarted past changes it never delivered: any cached menu
+    may be stale
+    """
+    menu_cache.clear()
+    snapshot_cache.clear()
+
+menu_feed.add_listener(_on_menu_change)
+menu_feed.add_resync_listener(_on_menu_resync)
+
+# Mock menus for running without a database, held as tables like real ones
+_MOCK_MENU_ITEMS = {
+    "res-1": [
+        {"id": "m1", "name": "Butter Chicken", "description": "Tender chicken in rich tomato gravy", "category": "Main Course", "price": 299, "isVeg": False, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
+        {"id": "m2", "name": "Paneer Tikka", "description": "Grilled cottage cheese with spices", "category": "Starters", "price": 199, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
+        {"id": "m3", "name": "Dal Makhani", "description": "Creamy black lentils", "category": "Main Course", "price": 179, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
+        {"id": "m4", "name": "Garlic Naan", "description": "Fresh bread with garlic", "category": "Breads", "price": 49, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"}
+    ],
+    "res-2": [
+        {"id": "m5", "name": "Margherita Pizza", "description": "Classic tomato and mozzarella", "category": "Pizza", "price": 349, "isVeg": True, "restaurantId": "res-2", "restaurantName": "Pizza Paradise"},
+        {"id": "m6", "name": "Pepperoni Pizza", "description": "Loaded with pepperoni", "category": "Pizza", "price": 399, "isVeg": False, "restaurantId": "res-2", "restaurantName": "Pizza Paradise"}
+    ],
+    "res-3": [
+        {"id": "m10", "name": "Classic Burger", "description": "Juicy beef patty with fresh veggies", "category": "Burgers", "price": 199, "isVeg": False, "restaurantId": "res-3", "restaurantName": "Burger Hub"},
+        {"id": "m11", "name": "Veggie Burger", "description": "Plant-based patty", "category": "Burgers", "price": 179, "isVeg": True, "restaurantId": "res-3", "restaurantName": "Burger Hub"}
+    ],
+    "res-4": [
+        {"id": "m7", "name": "Masala Dosa", "description": "Crispy crepe with spiced potatoes", "category": "South Indian", "price": 149, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"},
+        {"id": "m8", "name": "Idly Sambar", "description": "Steamed rice cakes with lentil soup", "category": "South Indian", "price": 99, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"},
+        {"id": "m9", "name": "Medu Vada", "description": "Crispy lentil donuts", "category": "Snacks", "price": 79, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"}
+    ],
+    "res-5": [
+        {"id": "m12", "name": "California Roll", "description": "Crab, avocado, cucumber", "category": "Sushi", "price": 399, "isVeg": False, "restaurantId": "res-5", "restaurantName": "Sushi Master"},
+        {"id": "m13", "name": "Veggie Roll", "description": "Fresh vegetables and rice", "category": "Sushi", "price": 299, "isVeg": True, "restaurantId": "res-5", "restaurantName": "Sushi Master"}
+    ],
+    "res-6": [
+        {"id": "m14", "name": "Chicken Tacos", "description": "Grilled chicken with salsa", "category": "Tacos", "price": 249, "isVeg": False, "restaurantId": "res-6", "restaurantName": "Taco Fiesta"},
+        {"id": "m15", "name": "Bean Burrito", "description": "Wrapped beans with cheese", "category": "Burritos", "price": 199, "isVeg": True, "restaurantId": "res-6", "restaurantName": "Taco Fiesta"}
+    ]
+}
+
+MOCK_MENUS = {rid: MenuTable(items) for rid, items in _MOCK_MENU_ITEMS.items()}
+_EMPTY_MENU = MenuTable([])
+
+def _mock_table(restaurant_id: str) -> MenuTable:
+    return MOCK_MENUS.get(restaurant_id, _EMPTY_MENU)
 
 class MenuService:
     
-    async def get_menu(self, restaurant_id: str) -> dict:
+    async def get_menu(self, restaurant_id: str, limit: int = MENU_LIMIT,
+                       cursor: Optional[str] = None) -> dict:
         """
-        Get complete menu for a restaurant
+        Get one page of a restaurant's menu, ordered by (category, id).
+        nextCursor is set when more items follow.
         """
+        after = decode_cursor(cursor, 2, MENU_CURSOR)
         db = get_database()
         
-        if not db:
+        if db is None:
             return self._get_mock_menu(restaurant_id)
         
-        try:
-            # Fetch menu items from database
-            items = await db.menuItems.find({
-                "restaurantId": restaurant_id,
-                "isAvailable": True
-            }).to_list(100)
-            
-            if not items:
-                return self._get_mock_menu(restaurant_id)
-            
+        # Mock menus are for running without a database only; with one, an
+        # empty menu is served as empty and errors propagate
+        table = await self._get_menu_table(db, restaurant_id)
+        return self._page(restaurant_id, table, limit, after)
+    
+    async def get_menu_snapshot(self, restaurant_id: str) -> MenuSnapshot:
+        """
+        The first page of get_menu, pre-serialized; rebuilt only after one of
+        the restaurant's items changes
+        """
+        db = get_database()
+        
+        if db is None:
+            return MenuSnapshot(self._get_mock_menu(restaurant_id))
+        
+        async def build():
+            # Taken before the read: later changes are all in the feed history
+            version = menu_feed.position
+            table, live = await self._load_menu_table(db, restaurant_id)
+            if not live:
+                # A last-known-good table of any age: version 0 makes a
+                # delta sync from this snapshot resync instead of skipping
+                # what changed since the table was saved
+                version = 0
+            return MenuSnapshot(self._page(restaurant_id, table, MENU_LIMIT), version)
+        
+        ttl = MENU_SNAPSHOT_TTL if menu_feed.following else None
+        return await snapshot_cache.get_or_load(restaurant_id, build, ttl=ttl)
+    
+    def get_menu_changes(self, restaurant_id: str, since: int) -> dict:
+        """
+        Items changed and removed since a menu version (X-Menu-Version of a
+        full menu, or version of an earlier delta). resync means the changes
+        are no longer all known and the full menu must be fetched again.
+        """
+        changes = menu_feed.changes_since(restaurant_id, since) if get_database() is not None else None
+        if changes is None:
             return {
                 "restaurantId": restaurant_id,
-                "items": items
+                "version": menu_feed.position,
+                "resync": True,
+                "changed": [],
+                "removed": []
             }
-            
-        except Exception as e:
-            print(f"Error fetching menu: {e}")
-            return self._get_mock_menu(restaurant_id)
+        
+        # Latest state per item, in order of last change
+        latest: Dict[str, Optional[dict]] = {}
+        for _, item_id, doc in changes:
+            latest.pop(item_id, None)
+            latest[item_id] = doc
+        changed = []
+        removed = []
+        for item_id, doc in latest.items():
+            if doc is None or not doc.get("isAvailable", True) or str(doc.get("restaurantId")) != restaurant_id:
+                removed.append(item_id)
+            else:
+                changed.append({k: v for k, v in doc.items() if k not in MENU_ITEM_PROJECTION})
+        return {
+            "restaurantId": restaurant_id,
+            "version": menu_feed.position,
+            "resync": False,
+            "changed": changed,
+            "removed": removed
+        }
+    
+    def stream_menu(self, restaurant_id: str, cursor: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Every available item straight from the Motor cursor, in
+        (category, id) order, without buffering the menu.
+        The cursor is checked up front so a bad one fails before streaming.
+        While the database circuit is open, streams the last-known-good menu.
+        """
+        after = decode_cursor(cursor, 2, MENU_CURSOR)
+        if get_database() is not None and not db_breaker.closed:
+            table = last_known_good.menu(restaurant_id)
+            if table is None:
+                raise DatabaseUnavailable("mongodb circuit open", db_breaker.retry_after())
+            return self._iter_items(self._page(restaurant_id, table, len(table), after)["items"])
+        return self._iter_menu(restaurant_id, after)
+    
+    async def _iter_items(self, items: List[dict]) -> AsyncIterator[dict]:
+        for item in items:
+            yield item
+    
+    async def _iter_menu(self, restaurant_id: str, after: Optional[Tuple]) -> AsyncIterator[dict]:
+        db = get_database()
+        
+        if db is None:
+            for item in self._get_mock_menu(restaurant_id)["items"]:
+                yield item
+            return
+        
+        filter_query = {"restaurantId": restaurant_id, "isAvailable": True}
+        if after is not None:
+            last_category, last_id = after
+            filter_query["$or"] = [
+                {"category": {"$gt": last_category}},
+                {"category": last_category, "_id": {"$gt": cursor_id(last_id)}}
+            ]
+        
+        cursor = db.menuItems.find(filter_query, MENU_ITEM_PROJECTION) \
+            .sort(MENU_SORT) \
+            .batch_size(STREAM_BATCH_SIZE)
+        async for item in cursor:
+            yield item
     
     async def get_menu_by_category(self, restaurant_id: str, category: str) -> List[dict]:
         """
@@ -40,58 +249,151 @@ class MenuService:
         """
         db = get_database()
         
-        if not db:
-            menu = self._get_mock_menu(restaurant_id)
-            return [item for item in menu.get("items", []) if item.get("category") == category]
+        if db is None:
+            return _mock_table(restaurant_id).select(category=category)[0]
         
+        # Served from the same cached menu as get_menu - no extra query
+        table = await self._get_menu_table(db, restaurant_id)
+        return table.select(category=category)[0]
+    
+    async def filter_menu(self, restaurant_id: str, sort: Optional[str] = None,
+                          offset: int = 0, limit: int = MENU_LIMIT, **conditions) -> dict:
+        """
+        Items matching MenuTable.mask conditions (isVeg, isAvailable, price
+        bounds, category, tags), optionally sorted by price; total counts
+        every match, not just this page
+        """
+        db = get_database()
+        table = _mock_table(restaurant_id) if db is None else await self._get_menu_table(db, restaurant_id)
+        items, total = table.select(sort=sort, offset=offset, limit=limit, **conditions)
+        return {
+            "restaurantId": restaurant_id,
+            "items": items,
+            "total": total
+        }
+    
+    async def get_menus(self, restaurant_ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+        """
+        Get the first menu page for many restaurants; cached menus are
+        reused and the rest are fetched with a single $in query. Also
+        returns the ids whose menus could not be loaded (database error,
+        no last-known-good copy), as opposed to menus that are empty.
+        """
+        db = get_database()
+        
+        if db is None:
+            return {rid: self._get_mock_menu(rid) for rid in restaurant_ids}, []
+        
+        cached, misses = menu_cache.get_many(restaurant_ids)
+        result = {rid: self._page(rid, table, MENU_LIMIT) for rid, table in cached.items()}
+        
+        if not misses:
+            return result, []
+        
+        fetched: Dict[str, List[dict]] = {rid: [] for rid in misses}
+        epoch = menu_cache.epoch
         try:
-            items = await db.menuItems.find({
-                "restaurantId": restaurant_id,
-                "category": category,
+            found = await db_breaker.call(lambda: db.menuItems.find({
+                "restaurantId": {"$in": misses},
                 "isAvailable": True
-            }).to_list(100)
-            
-            return items
-            
+            }, MENU_ITEM_PROJECTION).sort(MENU_SORT).to_list(None))
+            for item in found:
+                fetched.setdefault(str(item["restaurantId"]), []).append(item)
+        except DatabaseUnavailable as e:
+            print(f"Error fetching menus batch: {e}")
+            failed = []
+            for rid in misses:
+                table = last_known_good.menu(rid)
+                if table is not None:
+                    result[rid] = self._page(rid, table, MENU_LIMIT)
+                else:
+                    failed.append(rid)
+            return result, failed
         except Exception as e:
-            print(f"Error fetching menu by category: {e}")
-            return []
+            print(f"Error fetching menus batch: {e}")
+            return result, misses
+        
+        for rid in misses:
+            table = MenuTable(fetched.pop(rid))
+            if menu_cache.epoch == epoch:
+                menu_cache.set(rid, table)
+            last_known_good.remember_menu(rid, table)
+            result[rid] = self._page(rid, table, MENU_LIMIT)
+        
+        return result, []
     
-    def _get_mock_menu(self, restaurant_id: str) -> dict:
+    def _page(self, restaurant_id: str, table: MenuTable, limit: int,
+              after: Optional[Tuple] = None) -> dict:
         """
-        Return mock menu data for development
+        Slice a (category, id)-ordered menu table after a keyset position
         """
-        menus = {
-            "res-1": [
-                {"id": "m1", "name": "Butter Chicken", "description": "Tender chicken in rich tomato gravy", "category": "Main Course", "price": 299, "isVeg": False, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
-                {"id": "m2", "name": "Paneer Tikka", "description": "Grilled cottage cheese with spices", "category": "Starters", "price": 199, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
-                {"id": "m3", "name": "Dal Makhani", "description": "Creamy black lentils", "category": "Main Course", "price": 179, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"},
-                {"id": "m4", "name": "Garlic Naan", "description": "Fresh bread with garlic", "category": "Breads", "price": 49, "isVeg": True, "restaurantId": "res-1", "restaurantName": "Spice Garden"}
-            ],
-            "res-2": [
-                {"id": "m5", "name": "Margherita Pizza", "description": "Classic tomato and mozzarella", "category": "Pizza", "price": 349, "isVeg": True, "restaurantId": "res-2", "restaurantName": "Pizza Paradise"},
-                {"id": "m6", "name": "Pepperoni Pizza", "description": "Loaded with pepperoni", "category": "Pizza", "price": 399, "isVeg": False, "restaurantId": "res-2", "restaurantName": "Pizza Paradise"}
-            ],
-            "res-3": [
-                {"id": "m10", "name": "Classic Burger", "description": "Juicy beef patty with fresh veggies", "category": "Burgers", "price": 199, "isVeg": False, "restaurantId": "res-3", "restaurantName": "Burger Hub"},
-                {"id": "m11", "name": "Veggie Burger", "description": "Plant-based patty", "category": "Burgers", "price": 179, "isVeg": True, "restaurantId": "res-3", "restaurantName": "Burger Hub"}
-            ],
-            "res-4": [
-                {"id": "m7", "name": "Masala Dosa", "description": "Crispy crepe with spiced potatoes", "category": "South Indian", "price": 149, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"},
-                {"id": "m8", "name": "Idly Sambar", "description": "Steamed rice cakes with lentil soup", "category": "South Indian", "price": 99, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"},
-                {"id": "m9", "name": "Medu Vada", "description": "Crispy lentil donuts", "category": "Snacks", "price": 79, "isVeg": True, "restaurantId": "res-4", "restaurantName": "Saravana Bhavan"}
-            ],
-            "res-5": [
-                {"id": "m12", "name": "California Roll", "description": "Crab, avocado, cucumber", "category": "Sushi", "price": 399, "isVeg": False, "restaurantId": "res-5", "restaurantName": "Sushi Master"},
-                {"id": "m13", "name": "Veggie Roll", "description": "Fresh vegetables and rice", "category": "Sushi", "price": 299, "isVeg": True, "restaurantId": "res-5", "restaurantName": "Sushi Master"}
-            ],
-            "res-6": [
-                {"id": "m14", "name": "Chicken Tacos", "description": "Grilled chicken with salsa", "category": "Tacos", "price": 249, "isVeg": False, "restaurantId": "res-6", "restaurantName": "Taco Fiesta"},
-                {"id": "m15", "name": "Bean Burrito", "description": "Wrapped beans with cheese", "category": "Burritos", "price": 199, "isVeg": True, "restaurantId": "res-6", "restaurantName": "Taco Fiesta"}
-            ]
+        start = 0
+        if after is not None:
+            start = bisect_right(range(len(table)), (after[0], str(after[1])), key=table.key)
+        page = table.rows(start, start + limit)
+        next_cursor = None
+        if start + limit < len(table):
+            next_cursor = encode_cursor(*table.key(start + limit - 1))
+        return {
+            "restaurantId": restaurant_id,
+            "items": page,
+            "nextCursor": next_cursor
         }
+    
+    def invalidate_menu(self, restaurant_id: str):
+        """
+        Drop the cached menu for a restaurant after its items change
+        """
+        menu_cache.invalidate(restaurant_id)
+        snapshot_cache.invalidate(restaurant_id)
+    
+    def invalidate_all(self):
+        """
+        Drop every cached menu
+        """
+        menu_cache.clear()
+        snapshot_cache.clear()
+    
+    def cache_stats(self) -> dict:
+        return dict(menu_cache.stats(), snapshots=snapshot_cache.stats())
+    
+    async def _get_menu_table(self, db, restaurant_id: str) -> MenuTable:
+        """
+        Available items for a restaurant, read through the menu cache, or
+        the last-known-good menu while the database is unavailable
+        """
+        table, _ = await self._load_menu_table(db, restaurant_id)
+        return table
+    
+    async def _load_menu_table(self, db, restaurant_id: str) -> Tuple[MenuTable, bool]:
+        """
+        _get_menu_table, and whether the table is live (False when it is
+        the last-known-good copy)
+        """
+        async def load():
+            items = await db_breaker.call(lambda: db.menuItems.find({
+                "restaurantId": restaurant_id,
+                "isAvailable": True
+            }, MENU_ITEM_PROJECTION).sort(MENU_SORT).to_list(None))
+            table = MenuTable(items)
+            last_known_good.remember_menu(restaurant_id, table)
+            return table
         
+        try:
+            return await menu_cache.get_or_load(restaurant_id, load), True
+        except DatabaseUnavailable:
+            table = last_known_good.menu(restaurant_id)
+            if table is None:
+                raise
+            # Possibly stale: keep a snapshot being built from it out of the cache
+            snapshot_cache.invalidate(restaurant_id)
+            return table, False
+    
+    def _get_mock_menu(self, restaurant_id: str) -> dict:
+        """
+        Return mock menu data for development
+        """
         return {
             "restaurantId": restaurant_id,
-            "items": menus.get(restaurant_id, [])
+            "items": _mock_table(restaurant_id).rows()
         }
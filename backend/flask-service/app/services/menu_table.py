@@ -0,0 +1,280 @@
+"""
+Menu table - Columnar, read-only form of one restaurant's menu items
+Price is a float64 column, isVeg / isAvailable are bits in a uint8 flags
+column, categories and tags are int32 codes into shared vocabularies, and
+the remaining strings are interned, so repeated names, descriptions and
+restaurant ids are stored once per worker. Filters (veg, availability,
+price bounds, category, tags) and sorting by price run as NumPy array
+operations; item dicts are only built for the rows being returned.
+
+Rows keep the order they were built in (the menu cache builds them in
+(category, _id) order). Keys outside the known fields are kept per row,
+so rows() gives back the items the table was built from.
+"""
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VEG = 1
+AVAILABLE = 2
+HAS_VEG = 4
+HAS_AVAILABLE = 8
+INT_PRICE = 16
+HAS_TAGS = 32
+
+SORTS = ("price", "-price")
+# Pages up to this many rows slice tags per row instead of gathering them
+SMALL_TAKE = 32
+
+# Stands in for a key the item did not have
+_MISSING = object()
+
+_STRING_FIELDS = ("_id", "restaurantId", "name", "description", "image")
+_INTERNED_FIELDS = ("restaurantId", "name", "description")
+_KNOWN_FIELDS = frozenset(_STRING_FIELDS + ("category", "price", "isVeg", "isAvailable", "tags"))
+
+
+class Vocabulary:
+    """
+    Interned strings <-> int codes, shared by every table in the worker.
+    Code 0 is None (no category).
+    """
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        return self._codes.get(value)
+
+
+categories = Vocabulary()
+tags = Vocabulary()
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class MenuTable:
+    __slots__ = ("_id", "restaurantId", "name", "description", "image",
+                 "category", "price", "flags", "tag_offsets", "tag_codes", "extras")
+
+    def __init__(self, items: Sequence[dict]):
+        count = len(items)
+        for field in _STRING_FIELDS:
+            column = [item.get(field, _MISSING) for item in items]
+            if field in _INTERNED_FIELDS:
+                column = [_intern(value) for value in column]
+            setattr(self, field, column)
+
+        category_codes = np.zeros(count, dtype=np.int32)
+        price = np.full(count, np.nan)
+        flags = np.zeros(count, dtype=np.uint8)
+        tag_counts = np.zeros(count, dtype=np.int32)
+        tag_codes: List[int] = []
+        extras: List[Optional[dict]] = [None] * count
+        has_extras = False
+
+        for row, item in enumerate(items):
+            category_codes[row] = categories.code(item.get("category"))
+            bits = 0
+            value = item.get("price")
+            if value is not None:
+                price[row] = value
+                if isinstance(value, int) and not isinstance(value, bool):
+                    bits |= INT_PRICE
+            if "isVeg" in item:
+                bits |= HAS_VEG | (VEG if item["isVeg"] else 0)
+            if "isAvailable" in item:
+                bits |= HAS_AVAILABLE | (AVAILABLE if item["isAvailable"] else 0)
+            item_tags = item.get("tags")
+            if item_tags is not None:
+                bits |= HAS_TAGS
+                tag_counts[row] = len(item_tags)
+                tag_codes.extend(tags.code(tag) for tag in item_tags)
+            flags[row] = bits
+            if len(item) > len(_KNOWN_FIELDS) or not _KNOWN_FIELDS.issuperset(item):
+                rest = {key: value for key, value in item.items() if key not in _KNOWN_FIELDS}
+                if rest:
+                    extras[row] = rest
+                    has_extras = True
+
+        self.category = category_codes
+        self.price = price
+        self.flags = flags
+        self.tag_offsets = np.zeros(count + 1, dtype=np.int32)
+        np.cumsum(tag_counts, out=self.tag_offsets[1:])
+        self.tag_codes = np.array(tag_codes, dtype=np.int32)
+        self.extras = extras if has_extras else None
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    # ------------------------------------------------------------------
+    # Rows
+    # ------------------------------------------------------------------
+
+    def row(self, index: int) -> dict:
+        """
+        The item at index as a dict (keys the source item lacked stay absent)
+        """
+        return self.take(np.array([index]))[0]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        return self.take(np.arange(*slice(start, stop).indices(len(self))))
+
+    def take(self, indices: np.ndarray) -> List[dict]:
+        """
+        Item dicts for the given rows, filled one column at a time from
+        values gathered for all of them at once
+        """
+        rows = indices.tolist()
+        items = [{} for _ in rows]
+        for field in ("_id", "restaurantId", "name", "description"):
+            column = getattr(self, field)
+            for item, row in zip(items, rows):
+                value = column[row]
+                if value is not _MISSING:
+                    item[field] = value
+
+        category_values = categories.values
+        for item, code in zip(items, self.category[indices].tolist()):
+            value = category_values[code]
+            if value is not None:
+                item["category"] = value
+
+        flags = self.flags[indices].tolist()
+        for item, price, bits in zip(items, self.price[indices].tolist(), flags):
+            if price == price:
+                item["price"] = int(price) if bits & INT_PRICE else price
+
+        column = self.image
+        for item, row in zip(items, rows):
+            value = column[row]
+            if value is not _MISSING:
+                item["image"] = value
+
+        for item, bits in zip(items, flags):
+            if bits & HAS_VEG:
+                item["isVeg"] = bool(bits & VEG)
+            if bits & HAS_AVAILABLE:
+                item["isAvailable"] = bool(bits & AVAILABLE)
+
+        tag_values = tags.values
+        tag_offsets = self.tag_offsets
+        if len(rows) <= SMALL_TAKE:
+            # A few slices cost less than the gather's fixed overhead
+            tag_codes = self.tag_codes
+            for item, row, bits in zip(items, rows, flags):
+                if bits & HAS_TAGS:
+                    item["tags"] = [tag_values[code] for code in tag_codes[tag_offsets[row]:tag_offsets[row + 1]].tolist()]
+        else:
+            # Every selected row's tag codes in one gather
+            starts = tag_offsets[indices]
+            lengths = tag_offsets[indices + 1] - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            codes = self.tag_codes[positions].tolist()
+            at = 0
+            for item, bits, length in zip(items, flags, lengths.tolist()):
+                if bits & HAS_TAGS:
+                    item["tags"] = [tag_values[code] for code in codes[at:at + length]]
+                    at += length
+
+        if self.extras is not None:
+            extras = self.extras
+            for item, row in zip(items, rows):
+                if extras[row] is not None:
+                    item.update(extras[row])
+        return items
+
+    def key(self, index: int) -> Tuple[str, str]:
+        """
+        (category, id) of a row, the menu's keyset order
+        """
+        return (categories.values[self.category[index]] or "", str(self._id[index]))
+
+    # ------------------------------------------------------------------
+    # Filtering
+    # ------------------------------------------------------------------
+
+    def mask(self, is_veg: Optional[bool] = None, is_available: Optional[bool] = None,
+             min_price: Optional[float] = None, max_price: Optional[float] = None,
+             category: Optional[str] = None, required_tags: Sequence[str] = ()) -> np.ndarray:
+        """
+        Rows matching every given condition. Items without isVeg /
+        isAvailable count as True (the MenuItem defaults); items without a
+        price never match a price bound. All required_tags must be present.
+        """
+        flags = self.flags
+        keep = np.ones(len(self), dtype=bool)
+        if is_veg is not None:
+            # VEG is only ever set together with HAS_VEG
+            veg = (flags & (VEG | HAS_VEG)) != HAS_VEG
+            keep &= veg if is_veg else ~veg
+        if is_available is not None:
+            available = (flags & (AVAILABLE | HAS_AVAILABLE)) != HAS_AVAILABLE
+            keep &= available if is_available else ~available
+        if min_price is not None:
+            keep &= self.price >= min_price
+        if max_price is not None:
+            keep &= self.price <= max_price
+        if category is not None:
+            code = categories.lookup(category)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            keep &= self.category == code
+        for tag in required_tags:
+            code = tags.lookup(tag)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            # Rows owning the matching tag positions
+            positions = np.flatnonzero(self.tag_codes == code)
+            has_tag = np.zeros(len(self), dtype=bool)
+            has_tag[np.searchsorted(self.tag_offsets, positions, side="right") - 1] = True
+            keep &= has_tag
+        return keep
+
+    def select(self, sort: Optional[str] = None, offset: int = 0, limit: Optional[int] = None,
+               **conditions) -> Tuple[List[dict], int]:
+        """
+        Matching rows (see mask) in table order or by price ("price" /
+        "-price", ties kept in table order), one page of them, and the
+        number of matches
+        """
+        if sort is not None and sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r} (expected one of {', '.join(SORTS)})")
+        indices = np.flatnonzero(self.mask(**conditions))
+        if sort is not None:
+            prices = self.price[indices]
+            indices = indices[np.argsort(-prices if sort == "-price" else prices, kind="stable")]
+        stop = None if limit is None else offset + limit
+        return self.take(indices[offset:stop]), len(indices)
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the table itself (interned strings and vocabularies
+        are shared, so not counted)
+        """
+        total = sum(getattr(self, name).nbytes
+                    for name in ("category", "price", "flags", "tag_offsets", "tag_codes"))
+        total += sum(sys.getsizeof(getattr(self, field)) for field in _STRING_FIELDS)
+        total += sum(sys.getsizeof(value) for value in self._id if value is not _MISSING)
+        total += sum(sys.getsizeof(value) for value in self.image if value is not _MISSING and value is not None)
+        if self.extras is not None:
+            total += sys.getsizeof(self.extras)
+        return total
@@ -0,0 +1,276 @@
+"""
+Metrics - Per-route request latency and per-collection Mongo command timing
+Rendered in Prometheus text exposition format by render()
+
+Counters are plain ints updated without locks. Request metrics are only
+touched from the event loop; Mongo command events arrive on Motor's executor
+threads, where a rare lost increment under contention is an accepted
+trade-off for keeping the hot path lock-free. Each worker process keeps its
+own numbers, so scrape every worker (or run one) when WEB_CONCURRENCY > 1.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+from app.services.admission import admission_controller
+from app.services.cache import caches
+from app.services.circuit_breaker import breakers
+
+# Upper bounds in seconds; the +Inf bucket is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram; observe() is a bisect and two adds
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        out = []
+        running = 0
+        for bound, n in zip(self.bounds, self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {running}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RouteStats:
+    """
+    Counters for one (method, route template) pair; the label string is
+    built once here rather than per request
+    """
+
+    __slots__ = ("labels", "latency", "statuses")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{method}",route="{_label(route)}"'
+        self.latency = Histogram()
+        self.statuses: Dict[int, int] = {}
+
+    def observe(self, status: int, seconds: float):
+        self.latency.observe(seconds)
+        statuses = self.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+class RequestMetrics:
+    """
+    HTTP request counters keyed by route template
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats(method, route)
+        stats.observe(status, seconds)
+
+    def lines(self) -> List[str]:
+        out = [
+            "# HELP http_requests_in_flight Requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests served, by route template and status",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = sorted(self.routes.values(), key=lambda s: s.labels)
+        for stats in routes:
+            for status, n in sorted(stats.statuses.items()):
+                out.append(f'http_requests_total{{{stats.labels},status="{status}"}} {n}')
+        out.append("# HELP http_request_duration_seconds Request latency, by route template")
+        out.append("# TYPE http_request_duration_seconds histogram")
+        for stats in routes:
+            out.extend(stats.latency.lines("http_request_duration_seconds", stats.labels))
+        return out
+
+
+class CommandStats:
+    __slots__ = ("labels", "latency", "documents", "failures")
+
+    def __init__(self, collection: str, operation: str):
+        self.labels = f'collection="{_label(collection)}",operation="{operation}"'
+        self.latency = Histogram()
+        self.documents = 0
+        self.failures = 0
+
+
+# Commands whose first field names the target collection
+_COLLECTION_COMMANDS = frozenset({
+    "find", "aggregate", "count", "distinct", "insert", "update", "delete",
+    "findAndModify", "createIndexes", "listIndexes",
+})
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    pymongo command listener; pass it to the client via event_listeners.
+    Records latency and documents returned per (collection, operation),
+    ignoring handshakes, pings and other admin traffic.
+    """
+
+    def __init__(self):
+        self.commands: Dict[Tuple[str, str], CommandStats] = {}
+        self._pending: Dict[Tuple, Tuple[str, str]] = {}
+
+    def started(self, event):
+        name = event.command_name
+        if name in _COLLECTION_COMMANDS:
+            collection = event.command.get(name)
+        elif name == "getMore":
+            collection = event.command.get("collection")
+        else:
+            return
+        if not isinstance(collection, str):
+            return
+        self._pending[(event.connection_id, event.request_id)] = (collection, name)
+
+    def succeeded(self, event):
+        key = self._pending.pop((event.connection_id, event.request_id), None)
+        if key is None:
+            return
+        stats = self._stats(key)
+        stats.latency.observe(event.duration_micros / 1e6)
+        stats.documents += _documents_returned(event.reply)
+
+    def failed(self, event):
+        key = self._pending.pop((event.connection_id, event.request_id), None)
+        if key is None:
+            return
+        stats = self._stats(key)
+        stats.latency.observe(event.duration_micros / 1e6)
+        stats.failures += 1
+
+    def _stats(self, key: Tuple[str, str]) -> CommandStats:
+        stats = self.commands.get(key)
+        if stats is None:
+            stats = self.commands[key] = CommandStats(*key)
+        return stats
+
+    def lines(self) -> List[str]:
+        commands = sorted(self.commands.values(), key=lambda s: s.labels)
+        out = [
+            "# HELP mongo_command_duration_seconds MongoDB command latency, by collection and operation",
+            "# TYPE mongo_command_duration_seconds histogram",
+        ]
+        for stats in commands:
+            out.extend(stats.latency.lines("mongo_command_duration_seconds", stats.labels))
+        out.append("# HELP mongo_command_documents_returned_total Documents returned in command replies")
+        out.append("# TYPE mongo_command_documents_returned_total counter")
+        for stats in commands:
+            out.append(f"mongo_command_documents_returned_total{{{stats.labels}}} {stats.documents}")
+        out.append("# HELP mongo_command_failures_total Failed MongoDB commands")
+        out.append("# TYPE mongo_command_failures_total counter")
+        for stats in commands:
+            out.append(f"mongo_command_failures_total{{{stats.labels}}} {stats.failures}")
+        return out
+
+
+def _documents_returned(reply) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        batch = cursor.get("firstBatch")
+        if batch is None:
+            batch = cursor.get("nextBatch", ())
+        return len(batch)
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+
+def cache_lines() -> List[str]:
+    out = []
+    stats = sorted((cache.stats() for cache in list(caches)), key=lambda c: c["name"])
+    for metric, key, kind, help_text in (
+        ("cache_hits_total", "hits", "counter", "Cache lookups served from the cache"),
+        ("cache_misses_total", "misses", "counter", "Cache lookups that had to load"),
+        ("cache_coalesced_total", "coalesced", "counter", "Misses that joined an in-flight load"),
+        ("cache_evictions_total", "evictions", "counter", "Entries evicted to stay under maxsize"),
+        ("cache_entries", "size", "gauge", "Entries currently cached"),
+    ):
+        out.append(f"# HELP {metric} {help_text}")
+        out.append(f"# TYPE {metric} {kind}")
+        for cache in stats:
+            out.append(f'{metric}{{cache="{_label(cache["name"])}"}} {cache[key]}')
+    return out
+
+
+def breaker_lines() -> List[str]:
+    out = []
+    stats = sorted((breaker.stats() for breaker in list(breakers)), key=lambda b: b["name"])
+    for metric, kind, help_text, value in (
+        ("circuit_breaker_open", "gauge", "1 while the circuit is open or half-open",
+         lambda b: int(b["state"] != "closed")),
+        ("circuit_breaker_opened_total", "counter", "Times the circuit opened", lambda b: b["opened"]),
+        ("circuit_breaker_rejected_total", "counter", "Calls failed fast while open", lambda b: b["rejected"]),
+        ("circuit_breaker_failures_total", "counter", "Calls that timed out or lost the connection",
+         lambda b: b["failed"]),
+    ):
+        out.append(f"# HELP {metric} {help_text}")
+        out.append(f"# TYPE {metric} {kind}")
+        for breaker in stats:
+            out.append(f'{metric}{{breaker="{_label(breaker["name"])}"}} {value(breaker)}')
+    return out
+
+
+def admission_lines() -> List[str]:
+    out = []
+    stats = admission_controller.stats()
+    for metric, key, kind, help_text in (
+        ("admission_limit", "limit", "gauge", "Current concurrency limit of the route class"),
+        ("admission_in_flight", "inFlight", "gauge", "Admitted requests of the route class in progress"),
+        ("admission_admitted_total", "admitted", "counter", "Requests admitted"),
+        ("admission_rejected_total", "rejected", "counter", "Requests shed with 503"),
+        ("admission_over_target_total", "overTarget", "counter", "Admitted requests slower than the class target"),
+    ):
+        out.append(f"# HELP {metric} {help_text}")
+        out.append(f"# TYPE {metric} {kind}")
+        for route_class in stats:
+            out.append(f'{metric}{{class="{route_class["name"]}"}} {route_class[key]}')
+    return out
+
+
+request_metrics = RequestMetrics()
+mongo_metrics = MongoCommandMetrics()
+_started_at = time.time()
+
+
+def render() -> str:
+    lines = [
+        "# HELP process_start_time_seconds Start time of the worker since the epoch",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {_started_at:.3f}",
+    ]
+    lines.extend(request_metrics.lines())
+    lines.extend(mongo_metrics.lines())
+    lines.extend(cache_lines())
+    lines.extend(breaker_lines())
+    lines.extend(admission_lines())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,195 @@
+"""
+Nearby index - Restaurants that deliver to a point, ranked by rating and live ETA
+Restaurant locations from the catalog index are bucketed into a uniform
+lat/lng grid (like the partner registry), so a query only looks at the
+cells within its radius. Distances, delivery-radius checks, ETAs and the
+ranking score for the candidates are computed in one NumPy pass.
+"""
+import math
+import os
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services import eta_engine
+
+NEARBY_CELL_DEG = float(os.getenv("NEARBY_GRID_CELL_DEG", "0.01"))   # ~1.1 km
+# Used for restaurants without their own deliveryRadius
+DEFAULT_DELIVERY_RADIUS_KM = float(os.getenv("DEFAULT_DELIVERY_RADIUS_KM", "7"))
+# Share of the ranking score that comes from rating; the rest from ETA
+NEARBY_RATING_WEIGHT = float(os.getenv("NEARBY_RATING_WEIGHT", "0.5"))
+
+KM_PER_DEG = math.pi * eta_engine.EARTH_RADIUS_KM / 180.0
+MAX_RATING = 5.0
+
+
+class NearbyIndex:
+    """
+    Restaurant positions by grid cell, with per-slot NumPy columns for the
+    fields the ranking needs. Slots of removed restaurants are reused.
+    """
+
+    def __init__(self, cell_deg: float = NEARBY_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._cell_of: List[Optional[Tuple[int, int]]] = []
+        self._lat = np.zeros(0)
+        self._lng = np.zeros(0)
+        self._rating = np.zeros(0)
+        self._prep = np.zeros(0)
+        self._radius = np.zeros(0)
+        self._catalog = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._ids))
+        for name in ("_lat", "_lng", "_rating", "_prep", "_radius"):
+            column = np.zeros(capacity)
+            column[:len(self._ids)] = getattr(self, name)[:len(self._ids)]
+            setattr(self, name, column)
+
+    def upsert(self, doc: dict):
+        """
+        Index a shaped restaurant; one without a usable location is dropped
+        """
+        key = str(doc["_id"])
+        point = eta_engine.locate(doc.get("address"))
+        if point is None:
+            self.remove(key)
+            return
+        lat, lng = point
+        cell = self._cell(lat, lng)
+
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = key
+                self._cell_of[slot] = None
+            else:
+                slot = len(self._ids)
+                if slot >= len(self._lat):
+                    self._grow()
+                self._ids.append(key)
+                self._cell_of.append(None)
+            self._slots[key] = slot
+
+        if self._cell_of[slot] != cell:
+            self._leave_cell(slot)
+            self._cells.setdefault(cell, set()).add(slot)
+            self._cell_of[slot] = cell
+        self._lat[slot] = lat
+        self._lng[slot] = lng
+        self._rating[slot] = float(doc.get("rating") or 0)
+        self._prep[slot] = float(doc.get("prepTime") or eta_engine.DEFAULT_PREP_MINUTES)
+        self._radius[slot] = float(doc.get("deliveryRadius") or DEFAULT_DELIVERY_RADIUS_KM)
+
+    def remove(self, key: str):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._leave_cell(slot)
+        self._cell_of[slot] = None
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def _leave_cell(self, slot: int):
+        cell = self._cell_of[slot]
+        if cell is None:
+            return
+        slots = self._cells.get(cell)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del self._cells[cell]
+
+    def on_catalog_change(self, restaurant_id: str, doc: Optional[dict]):
+        """
+        Catalog index listener: doc is the shaped restaurant, or None on removal
+        """
+        if doc is None:
+            self.remove(restaurant_id)
+        else:
+            self.upsert(doc)
+
+    def start(self, catalog):
+        """
+        Index the catalog's restaurants and follow its changes
+        """
+        if self._catalog is not None:
+            return
+        self._catalog = catalog
+        catalog.add_listener(self.on_catalog_change)
+        for doc in catalog.documents():
+            self.upsert(doc)
+        print(f"✓ Nearby index loaded: {len(self)} located restaurants")
+
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """
+        Slots in the grid cells overlapping the radius' bounding box
+        """
+        lat_deg = radius_km / KM_PER_DEG
+        lng_deg = lat_deg / max(math.cos(math.radians(min(abs(lat) + lat_deg, 89.0))), 0.01)
+        i0, j0 = self._cell(lat - lat_deg, lng - lng_deg)
+        i1, j1 = self._cell(lat + lat_deg, lng + lng_deg)
+        cells = self._cells
+
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            # A wide radius over a sparse grid: walk the occupied cells
+            groups = [slots for (i, j), slots in cells.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            groups = [cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in cells]
+        count = sum(len(slots) for slots in groups)
+        return np.fromiter(chain.from_iterable(groups), dtype=np.int64, count=count)
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int = 20,
+               rating_weight: Optional[float] = None) -> List[Tuple[str, float, int]]:
+        """
+        Up to limit restaurants within radius_km of (lat, lng) that also
+        deliver that far, best first, as (restaurant id, distance km, ETA
+        minutes). The score blends rating (out of 5) and ETA (between the
+        ETA engine's bounds), weighted by rating_weight.
+        """
+        weight = NEARBY_RATING_WEIGHT if rating_weight is None else rating_weight
+        slots = self._candidates(lat, lng, radius_km)
+        if not len(slots):
+            return []
+
+        distance = eta_engine.haversine_km(lat, lng, self._lat[slots], self._lng[slots])
+        reachable = distance <= np.minimum(self._radius[slots], radius_km)
+        slots = slots[reachable]
+        distance = distance[reachable]
+        if not len(slots):
+            return []
+
+        eta = eta_engine.minutes_for_distance(distance, self._prep[slots])
+        eta_span = eta_engine.MAX_ETA_MINUTES - eta_engine.MIN_ETA_MINUTES
+        score = (weight * self._rating[slots] / MAX_RATING
+                 + (1.0 - weight) * (eta_engine.MAX_ETA_MINUTES - eta) / eta_span)
+
+        if len(slots) > limit:
+            top = np.argpartition(-score, limit - 1)[:limit]
+        else:
+            top = np.arange(len(slots))
+        # Best score first; nearer first among equals
+        top = top[np.lexsort((distance[top], -score[top]))]
+        return [(self._ids[slots[i]], float(distance[i]), int(eta[i])) for i in top]
+
+    def stats(self) -> dict:
+        return {
+            "restaurants": len(self),
+            "cells": len(self._cells),
+            "cellDeg": self.cell_deg,
+        }
+
+
+nearby_index = NearbyIndex()
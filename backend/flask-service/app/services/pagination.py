@@ -0,0 +1,54 @@
+"""
+Pagination - Opaque keyset cursors
+A cursor encodes the sort key of the last item on a page, e.g. (rating, id)
+for restaurants or (category, id) for menu items
+"""
+import base64
+from typing import Any, Optional, Tuple, Type, Union
+
+import orjson
+from bson import ObjectId
+
+TypeSpec = Union[Type, Tuple[Type, ...]]
+# Value types of each cursor, in sort-key order
+MENU_CURSOR = (str, str)                  # (category, id)
+RESTAURANT_CURSOR = ((int, float), str)   # (rating, id)
+
+
+def encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int,
+                  types: Optional[Tuple[TypeSpec, ...]] = None) -> Optional[Tuple]:
+    """
+    Decode a cursor into a tuple of `size` values, each an instance of its
+    entry in types when given; raises ValueError when the cursor is
+    malformed, so a tampered cursor is a 400 rather than a TypeError when
+    compared against real sort keys
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    if types is not None:
+        for value, expected in zip(values, types):
+            # bool is an int subclass but never a sort key
+            if isinstance(value, bool) or not isinstance(value, expected):
+                raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+def cursor_id(value: Any) -> Any:
+    """
+    Ids travel through cursors as strings; turn ObjectId-shaped ones back
+    into ObjectIds so keyset comparisons in Mongo compare like with like
+    """
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
@@ -0,0 +1,252 @@
+"""
+Partner registry - In-memory spatial index of live delivery partners
+Partners are bucketed into a uniform lat/lng grid so location upserts are
+O(1) and k-nearest queries only look at the cells around the pickup point
+"""
+import heapq
+import math
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+CELL_DEG = float(os.getenv("PARTNER_GRID_CELL_DEG", "0.0025"))   # ~280 m
+STALE_SECONDS = float(os.getenv("PARTNER_STALE_SECONDS", "120"))
+MAX_SEARCH_KM = float(os.getenv("PARTNER_MAX_SEARCH_KM", "10"))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Scalar great-circle distance in km
+    """
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+class Partner:
+    __slots__ = ("id", "name", "phone", "lat", "lng", "cell", "available", "order_id", "seen_at")
+
+    def __init__(self, partner_id: str, name: Optional[str], phone: Optional[str],
+                 lat: float, lng: float, cell: Tuple[int, int]):
+        self.id = partner_id
+        self.name = name
+        self.phone = phone
+        self.lat = lat
+        self.lng = lng
+        self.cell = cell
+        self.available = True
+        self.order_id: Optional[str] = None
+        self.seen_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "phone": self.phone,
+            "coordinates": {"lat": self.lat, "lng": self.lng},
+            "available": self.available,
+            "orderId": self.order_id,
+        }
+
+
+class PartnerRegistry:
+    """
+    Live partner positions indexed by grid cell.
+
+    Everything runs on the worker's event loop, so a check-and-set with no
+    await in between (claim) is atomic within the worker.
+    """
+
+    def __init__(self, cell_deg: float = CELL_DEG):
+        self.cell_deg = cell_deg
+        self._partners: Dict[str, Partner] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._orders: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._partners)
+
+    def __contains__(self, partner_id: str) -> bool:
+        return partner_id in self._partners
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def get(self, partner_id: str) -> Optional[Partner]:
+        return self._partners.get(partner_id)
+
+    def upsert_location(self, partner_id: str, lat: float, lng: float,
+                        available: Optional[bool] = None,
+                        name: Optional[str] = None,
+                        phone: Optional[str] = None) -> Partner:
+        """
+        Record a partner's position, moving it between grid cells if needed
+        """
+        cell = self._cell(lat, lng)
+        partner = self._partners.get(partner_id)
+
+        if partner is None:
+            partner = Partner(partner_id, name, phone, lat, lng, cell)
+            self._partners[partner_id] = partner
+            self._cells.setdefault(cell, set()).add(partner_id)
+        else:
+            if cell != partner.cell:
+                old = self._cells.get(partner.cell)
+                if old is not None:
+                    old.discard(partner_id)
+                    if not old:
+                        del self._cells[partner.cell]
+                self._cells.setdefault(cell, set()).add(partner_id)
+                partner.cell = cell
+            partner.lat = lat
+            partner.lng = lng
+            partner.seen_at = time.monotonic()
+            if name is not None:
+                partner.name = name
+            if phone is not None:
+                partner.phone = phone
+
+        if available is not None and partner.order_id is None:
+            partner.available = available
+        return partner
+
+    def remove(self, partner_id: str):
+        partner = self._partners.pop(partner_id, None)
+        if partner is None:
+            return
+        if partner.order_id is not None:
+            self._orders.pop(partner.order_id, None)
+        ids = self._cells.get(partner.cell)
+        if ids is not None:
+            ids.discard(partner_id)
+            if not ids:
+                del self._cells[partner.cell]
+
+    def nearest(self, lat: float, lng: float, k: int = 5,
+                available_only: bool = True,
+                max_km: float = MAX_SEARCH_KM) -> List[Tuple[float, Partner]]:
+        """
+        Up to k partners closest to (lat, lng) as (distance_km, partner),
+        nearest first. Searches outward ring by ring and stops once no
+        unvisited cell can hold anything closer than the current k-th best.
+        """
+        ci, cj = self._cell(lat, lng)
+        now = time.monotonic()
+        # Rank by equirectangular distance in degrees (no trig per candidate;
+        # accurate at city scale), reporting haversine km for the winners
+        cos_lat = math.cos(math.radians(lat))
+        max_deg = max_km / KM_PER_DEG
+        max_d2 = max_deg * max_deg
+        best: List[Tuple[float, str]] = []   # max-heap via negated distance
+        lng_scale = max(math.cos(math.radians(min(abs(lat) + 1.0, 89.0))), 0.01)
+        partners = self._partners
+        cells = self._cells
+
+        ring = 0
+        while True:
+            for cell in self._ring_cells(ci, cj, ring):
+                ids = cells.get(cell)
+                if not ids:
+                    continue
+                for pid in ids:
+                    partner = partners[pid]
+                    if available_only and not partner.available:
+                        continue
+                    if now - partner.seen_at > STALE_SECONDS:
+                        continue
+                    dy = partner.lat - lat
+                    dx = (partner.lng - lng) * cos_lat
+                    d2 = dx * dx + dy * dy
+                    if d2 > max_d2:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, pid))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, pid))
+
+            # Anything outside the rings scanned so far is at least this far
+            bound_deg = ring * self.cell_deg * lng_scale
+            if bound_deg > max_deg or (len(best) >= k and -best[0][0] <= bound_deg * bound_deg):
+                break
+            if not cells:
+                break
+            ring += 1
+
+        result = []
+        for _, pid in sorted(best, reverse=True):
+            partner = partners[pid]
+            result.append((haversine_km(lat, lng, partner.lat, partner.lng), partner))
+        return result
+
+    @staticmethod
+    def _ring_cells(ci: int, cj: int, ring: int):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield (ci - ring, j)
+            yield (ci + ring, j)
+        for i in range(ci - ring + 1, ci + ring):
+            yield (i, cj - ring)
+            yield (i, cj + ring)
+
+    def claim(self, partner_id: str, order_id: str) -> bool:
+        """
+        Atomically take an available partner for an order
+        """
+        partner = self._partners.get(partner_id)
+        if partner is None or not partner.available:
+            return False
+        partner.available = False
+        partner.order_id = order_id
+        self._orders[order_id] = partner_id
+        return True
+
+    def set_available(self, partner_id: str, available: bool):
+        partner = self._partners.get(partner_id)
+        if partner is not None and partner.order_id is None:
+            partner.available = available
+
+    def release(self, partner_id: str, order_id: Optional[str] = None):
+        """
+        Make a partner available again once a delivery ends or a claim is undone
+        """
+        partner = self._partners.get(partner_id)
+        if partner is None:
+            return
+        if order_id is not None and partner.order_id != order_id:
+            return
+        if partner.order_id is not None:
+            self._orders.pop(partner.order_id, None)
+        partner.available = True
+        partner.order_id = None
+
+    def partner_for_order(self, order_id: str) -> Optional[Partner]:
+        partner_id = self._orders.get(order_id)
+        return self._partners.get(partner_id) if partner_id is not None else None
+
+    def release_order(self, order_id: str) -> Optional[str]:
+        """
+        Release whichever partner holds the order; returns its id
+        """
+        partner_id = self._orders.get(order_id)
+        if partner_id is not None:
+            self.release(partner_id, order_id)
+        return partner_id
+
+    def stats(self) -> dict:
+        available = sum(1 for p in self._partners.values() if p.available)
+        return {
+            "partners": len(self._partners),
+            "available": available,
+            "cells": len(self._cells),
+            "cellDeg": self.cell_deg,
+        }
+
+
+partner_registry = PartnerRegistry()
@@ -0,0 +1,245 @@
+"""
+Profiler - Sampling profiler and event-loop watchdog for the live worker
+A daemon thread samples the event-loop thread's Python stack every
+PROFILER_SAMPLE_MS into a ring buffer. The same thread watches a heartbeat
+coroutine and reports when something holds the loop for more than
+LOOP_BLOCK_MS (e.g. a synchronous MongoClient call or CPU-bound work).
+
+Samples are stored as tuples of code objects and only formatted when a
+profile or slow-request report is requested.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+PROFILER_SAMPLE_MS = float(os.getenv("PROFILER_SAMPLE_MS", "10"))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+LOOP_BLOCK_MS = float(os.getenv("LOOP_BLOCK_MS", "100"))
+LOOP_BLOCK_KEEP = int(os.getenv("LOOP_BLOCK_KEEP", "50"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_KEEP = int(os.getenv("SLOW_REQUEST_KEEP", "50"))
+
+HEARTBEAT_SECONDS = 0.02
+
+# Frames at the bottom of an idle loop: waiting in select/epoll (asyncio) or
+# inside run_until_complete itself (uvloop runs its loop in C)
+_IDLE_FILES = ("selectors.py", "base_events.py", "runners.py")
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _walk(frame) -> Tuple:
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+
+def _frames(frame) -> List:
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def is_idle(stack: Tuple) -> bool:
+    return not stack or os.path.basename(stack[-1].co_filename) in _IDLE_FILES
+
+
+class LoopMonitor:
+    """
+    Samples the loop thread and detects loop blocking. Start it from a
+    coroutine running on the loop to be watched.
+    """
+
+    def __init__(self, sample_ms: float = PROFILER_SAMPLE_MS, block_ms: float = LOOP_BLOCK_MS,
+                 max_seconds: int = PROFILE_MAX_SECONDS):
+        self.interval = sample_ms / 1000.0
+        self.block_threshold = block_ms / 1000.0
+        self._samples: deque = deque(maxlen=max(1, int(max_seconds / max(self.interval, 1e-3))))
+        self._lock = threading.Lock()
+        self._names: Dict[object, str] = {}
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._last_tick = 0.0
+        self._blocking: Optional[dict] = None
+        self.blocks: deque = deque(maxlen=LOOP_BLOCK_KEEP)
+        self.block_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    async def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._run, name="loop-monitor", daemon=True)
+        self._thread.start()
+        print(f"✓ Loop monitor started (sample {self.interval * 1000:.0f}ms, block {self.block_threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat_task.cancel()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while True:
+            now = time.perf_counter()
+            blocking = self._blocking
+            if blocking is not None:
+                blocking["durationMs"] = round((now - self._last_tick - HEARTBEAT_SECONDS) * 1000, 1)
+                self._blocking = None
+            self._last_tick = now
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    def _run(self):
+        interval = self.interval
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            now = time.perf_counter()
+            stack = _walk(frame)
+            with self._lock:
+                self._samples.append((now, stack))
+
+            lag = now - self._last_tick - HEARTBEAT_SECONDS
+            if lag > self.block_threshold and self._blocking is None:
+                self._report_block(frame, lag)
+
+    def _report_block(self, frame, lag: float):
+        where = f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        entry = {
+            "at": time.time(),
+            "durationMs": None,
+            "detectedAfterMs": round(lag * 1000, 1),
+            "stack": [
+                f"{f.f_code.co_filename}:{f.f_lineno} in {f.f_code.co_name}"
+                for f in _frames(frame)
+            ],
+        }
+        self._blocking = entry
+        self.blocks.append(entry)
+        self.block_count += 1
+        print(f"⚠️  Event loop blocked for >{self.block_threshold * 1000:.0f}ms at {where}")
+
+    def samples_between(self, start: float, end: float) -> List[Tuple]:
+        with self._lock:
+            samples = list(self._samples)
+        return [stack for t, stack in samples if start <= t <= end]
+
+    def collapse(self, stacks: List[Tuple], include_idle: bool = False) -> Counter:
+        """
+        Fold stacks into flamegraph "root;...;leaf" keys with sample counts
+        """
+        names = self._names
+        folded: Counter = Counter()
+        for stack in stacks:
+            if not include_idle and is_idle(stack):
+                continue
+            parts = []
+            for code in stack:
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = _frame_name(code)
+                parts.append(name)
+            folded[";".join(parts)] += 1
+        return folded
+
+    async def profile(self, seconds: float, include_idle: bool = False) -> Tuple[Counter, int]:
+        """
+        Collect samples for `seconds` and return (folded stacks, total samples)
+        """
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        stacks = self.samples_between(start, time.perf_counter())
+        return self.collapse(stacks, include_idle), len(stacks)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "sampleIntervalMs": self.interval * 1000,
+            "blockThresholdMs": self.block_threshold * 1000,
+            "bufferedSamples": len(self._samples),
+            "loopBlocks": self.block_count,
+        }
+
+
+def render_collapsed(folded: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in folded.most_common())
+
+
+class SlowRequestRecorder:
+    """
+    Keeps the last SLOW_REQUEST_KEEP requests slower than SLOW_REQUEST_MS,
+    each with the loop samples taken while it was in flight, split into:
+      handler     - the loop was running this request's endpoint
+      waitingIO   - the loop was idle (awaiting Mongo, network, timers)
+      otherTasks  - the loop was busy with something else
+    Concurrent requests to the same endpoint share handler samples.
+    """
+
+    def __init__(self, monitor: LoopMonitor, threshold_ms: float = SLOW_REQUEST_MS,
+                 keep: int = SLOW_REQUEST_KEEP):
+        self.monitor = monitor
+        self.threshold = threshold_ms / 1000.0
+        self.entries: deque = deque(maxlen=keep)
+        self.count = 0
+
+    def record(self, method: str, path: str, route: Optional[str], endpoint, status: int,
+               start: float, end: float):
+        if self.threshold <= 0 or end - start < self.threshold:
+            return
+        handler_code = getattr(endpoint, "__code__", None)
+        handler, other = [], []
+        idle = 0
+        for stack in self.monitor.samples_between(start, end):
+            if handler_code is not None and handler_code in stack:
+                handler.append(stack)
+            elif is_idle(stack):
+                idle += 1
+            else:
+                other.append(stack)
+
+        duration_ms = round((end - start) * 1000, 1)
+        self.entries.append({
+            "at": time.time(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "durationMs": duration_ms,
+            "samples": {
+                "intervalMs": self.monitor.interval * 1000,
+                "handler": dict(self.monitor.collapse(handler).most_common(20)),
+                "waitingIO": idle,
+                "otherTasks": dict(self.monitor.collapse(other).most_common(20)),
+            },
+        })
+        self.count += 1
+        print(f"⚠️  Slow request {method} {route or path} took {duration_ms:.0f}ms "
+              f"(handler {len(handler)}, io {idle}, other {len(other)} samples)")
+
+
+loop_monitor = LoopMonitor()
+slow_requests = SlowRequestRecorder(loop_monitor)
@@ -2,8 +2,30 @@
 Restaurant service - Business logic for restaurant operations
 """
 from app.config.database import get_database
-from typing import List, Optional
+from app.models.serializers import RESTAURANT_PROJECTION, shape_restaurant
+from app.services.catalog_index import catalog_index
+from app.services.circuit_breaker import DatabaseUnavailable, db_breaker
+from app.services.nearby_index import NearbyIndex, nearby_index
+from app.services.pagination import RESTAURANT_CURSOR, cursor_id, decode_cursor, encode_cursor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import random
+import re
+
+PAGE_SIZE = 50
+STREAM_BATCH_SIZE = 200
+
+def _id_values(restaurant_ids: List[str]) -> List[Any]:
+    """
+    Ids as stored: ObjectId-shaped ids are ObjectIds (as ingest writes
+    them), kept as strings too for documents stored before that
+    """
+    values = []
+    for rid in restaurant_ids:
+        oid = cursor_id(rid)
+        values.append(oid)
+        if oid is not rid:
+            values.append(rid)
+    return values
 
 class RestaurantService:
     
@@ -13,40 +35,132 @@ class RestaurantService:
         """
         Get filtered list of restaurants
         """
+        restaurants, _ = await self.get_restaurants_page(cuisine=cuisine, rating=rating, search=search)
+        return restaurants
+    
+    async def get_restaurants_page(self, cuisine: Optional[str] = None,
+                                   rating: Optional[float] = None,
+                                   search: Optional[str] = None,
+                                   limit: int = PAGE_SIZE,
+                                   cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Get one page of filtered restaurants, ordered by (rating desc, id).
+        Returns the page and the cursor for the next one (None on the last page).
+        """
+        after = decode_cursor(cursor, 2, RESTAURANT_CURSOR)
         db = get_database()
         
         # If no database, return mock data
-        if not db:
-            return self._get_mock_restaurants()
+        if db is None:
+            return self._get_shaped_mock_restaurants(), None
         
-        try:
-            # Build filter query
-            filter_query = {"isActive": True}
-            
-            if cuisine:
-                filter_query["cuisine"] = cuisine
-            
-            if rating:
-                filter_query["rating"] = {"$gte": rating}
-            
-            if search:
-                filter_query["$or"] = [
-                    {"name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
-            
-            # Query database
-            restaurants = await db.restaurants.find(filter_query).sort("rating", -1).to_list(50)
-            
-            # If no restaurants found, return mock data
-            if not restaurants:
-                return self._get_mock_restaurants()
-            
-            return restaurants
-            
-        except Exception as e:
-            print(f"Error fetching restaurants: {e}")
-            return self._get_mock_restaurants()
+        # Serve from the in-memory catalog index; first use loads it.
+        # Mock data is for running without a database only: with one, no
+        # match is an empty page and errors propagate.
+        await catalog_index.start(db)
+        restaurants = catalog_index.query(
+            cuisine=cuisine, rating=rating, search=search, limit=limit + 1, after=after
+        )
+        return self._page(restaurants, limit)
+    
+    async def get_nearby_restaurants(self, lat: float, lng: float, radius_km: float,
+                                     limit: int = 20, rating_weight: Optional[float] = None) -> List[dict]:
+        """
+        Restaurants that deliver to (lat, lng) within radius_km, ranked by a
+        blend of rating and live ETA; eta is replaced by the live estimate
+        """
+        db = get_database()
+        
+        if db is None:
+            return self._nearby_mock(lat, lng, radius_km, limit, rating_weight)
+        
+        await catalog_index.start(db)
+        nearby_index.start(catalog_index)
+        ranked = nearby_index.nearby(lat, lng, radius_km, limit, rating_weight)
+        restaurants = []
+        for rid, distance_km, eta in ranked:
+            doc = catalog_index.get(rid)
+            if doc is not None:
+                restaurants.append(dict(doc, eta=eta, distanceKm=round(distance_km, 2)))
+        return restaurants
+    
+    def _nearby_mock(self, lat: float, lng: float, radius_km: float, limit: int,
+                     rating_weight: Optional[float]) -> List[dict]:
+        mocks = {r["_id"]: r for r in self._get_shaped_mock_restaurants()}
+        index = NearbyIndex()
+        for doc in mocks.values():
+            index.upsert(doc)
+        return [
+            dict(mocks[rid], eta=eta, distanceKm=round(distance_km, 2))
+            for rid, distance_km, eta in index.nearby(lat, lng, radius_km, limit, rating_weight)
+        ]
+    
+    def stream_restaurants(self, cuisine: Optional[str] = None,
+                           rating: Optional[float] = None,
+                           search: Optional[str] = None,
+                           cursor: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Every matching restaurant straight from the Motor cursor, in
+        (rating desc, id) order, without buffering the result set.
+        The cursor is checked up front so a bad one fails before streaming.
+        While the database circuit is open, streams from the catalog index.
+        """
+        after = decode_cursor(cursor, 2, RESTAURANT_CURSOR)
+        if get_database() is not None and not db_breaker.closed:
+            if not catalog_index.loaded:
+                raise DatabaseUnavailable("mongodb circuit open", db_breaker.retry_after())
+            return self._iter_catalog(cuisine, rating, search, after)
+        return self._iter_restaurants(cuisine, rating, search, after)
+    
+    async def _iter_catalog(self, cuisine: Optional[str], rating: Optional[float],
+                            search: Optional[str], after: Optional[Tuple]) -> AsyncIterator[dict]:
+        restaurants = catalog_index.query(
+            cuisine=cuisine, rating=rating, search=search, limit=len(catalog_index), after=after
+        )
+        for restaurant in restaurants:
+            yield restaurant
+    
+    async def _iter_restaurants(self, cuisine: Optional[str], rating: Optional[float],
+                                search: Optional[str], after: Optional[Tuple]) -> AsyncIterator[dict]:
+        db = get_database()
+        
+        if db is None:
+            for restaurant in self._get_shaped_mock_restaurants():
+                yield restaurant
+            return
+        
+        filter_query = {"isActive": True}
+        
+        if cuisine:
+            filter_query["cuisine"] = cuisine
+        
+        if rating:
+            filter_query["rating"] = {"$gte": rating}
+        
+        if search:
+            pattern = {"$regex": re.escape(search), "$options": "i"}
+            filter_query["$or"] = [{"name": pattern}, {"description": pattern}]
+        
+        if after is not None:
+            last_rating, last_id = after
+            keyset = {"$or": [
+                {"rating": {"$lt": last_rating}},
+                {"rating": last_rating, "_id": {"$gt": cursor_id(last_id)}}
+            ]}
+            filter_query = {"$and": [filter_query, keyset]}
+        
+        cursor = db.restaurants.find(filter_query, RESTAURANT_PROJECTION) \
+            .sort([("rating", -1), ("_id", 1)]) \
+            .batch_size(STREAM_BATCH_SIZE)
+        async for restaurant in cursor:
+            yield shape_restaurant(restaurant)
+    
+    def _page(self, restaurants: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+        if len(restaurants) <= limit:
+            return restaurants, None
+        page = restaurants[:limit]
+        last = page[-1]
+        return page, encode_cursor(last["rating"], last["_id"])
     
     async def get_restaurant_by_id(self, restaurant_id: str) -> Optional[dict]:
         """
@@ -54,17 +168,62 @@ class RestaurantService:
         """
         db = get_database()
         
-        if not db:
+        if db is None:
             # Return mock data
-            mock_restaurants = self._get_mock_restaurants()
-            return next((r for r in mock_restaurants if r.get("id") == restaurant_id), None)
+            mock_restaurants = self._get_shaped_mock_restaurants()
+            return next((r for r in mock_restaurants if r["_id"] == restaurant_id), None)
+        
+        cached = catalog_index.get(restaurant_id)
+        if cached is not None:
+            return cached
+        
+        # Errors propagate: a failed lookup is not a restaurant that doesn't exist
+        restaurant = await db_breaker.call(
+            lambda: db.restaurants.find_one({"_id": {"$in": _id_values([restaurant_id])}}, RESTAURANT_PROJECTION)
+        )
+        return shape_restaurant(restaurant) if restaurant else None
+    
+    async def get_restaurants_by_ids(self, restaurant_ids: List[str]) -> Tuple[Dict[str, Optional[dict]], List[str]]:
+        """
+        Get many restaurants in one call; unknown ids map to None. Also
+        returns the ids that could not be looked up (database error), which
+        map to None too but must not be taken as not found.
+        """
+        result: Dict[str, Optional[dict]] = {rid: None for rid in restaurant_ids}
+        db = get_database()
+        
+        if db is None:
+            for restaurant in self._get_shaped_mock_restaurants():
+                if restaurant["_id"] in result:
+                    result[restaurant["_id"]] = restaurant
+            return result, []
+        
+        misses = []
+        for rid in result:
+            cached = catalog_index.get(rid)
+            if cached is not None:
+                result[rid] = cached
+            else:
+                misses.append(rid)
+        
+        if not misses:
+            return result, []
         
         try:
-            restaurant = await db.restaurants.find_one({"_id": restaurant_id})
-            return restaurant
+            # One $in query for everything the catalog index didn't have
+            found = await db_breaker.call(
+                lambda: db.restaurants.find({"_id": {"$in": _id_values(misses)}}, RESTAURANT_PROJECTION).to_list(None)
+            )
         except Exception as e:
-            print(f"Error fetching restaurant {restaurant_id}: {e}")
-            return None
+            print(f"Error fetching restaurants batch: {e}")
+            return result, misses
+        
+        for restaurant in found:
+            result[str(restaurant["_id"])] = shape_restaurant(restaurant)
+        return result, []
+    
+    def _get_shaped_mock_restaurants(self) -> List[dict]:
+        return [shape_restaurant(r) for r in self._get_mock_restaurants()]
     
     def _get_mock_restaurants(self) -> List[dict]:
         """
@@ -79,6 +238,14 @@ class RestaurantService:
                 "rating": 4.3,
                 "totalRatings": 250,
                 "eta": 30,
+                "address": {
+                    "line1": "12 Usman Road",
+                    "line2": "T. Nagar",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600017",
+                    "coordinates": {"lat": 13.0418, "lng": 80.2341}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1585937421612-70a008356fbe",
                 "tags": ["Popular", "Fast Delivery"],
@@ -92,6 +259,14 @@ class RestaurantService:
                 "rating": 4.5,
                 "totalRatings": 380,
                 "eta": 25,
+                "address": {
+                    "line1": "45 Besant Avenue",
+                    "line2": "Adyar",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600020",
+                    "coordinates": {"lat": 13.0012, "lng": 80.2565}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1513104890138-7c749659a591",
                 "tags": ["Trending", "Premium"],
@@ -105,6 +280,14 @@ class RestaurantService:
                 "rating": 4.2,
                 "totalRatings": 190,
                 "eta": 20,
+                "address": {
+                    "line1": "8 2nd Avenue",
+                    "line2": "Anna Nagar",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600040",
+                    "coordinates": {"lat": 13.085, "lng": 80.2101}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1568901346375-23c9450c58cd",
                 "tags": ["Quick Bites"],
@@ -118,6 +301,14 @@ class RestaurantService:
                 "rating": 4.6,
                 "totalRatings": 420,
                 "eta": 25,
+                "address": {
+                    "line1": "21 Sir Thyagaraya Road",
+                    "line2": "T. Nagar",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600017",
+                    "coordinates": {"lat": 13.0405, "lng": 80.2337}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1589301760014-d929f3979dbc",
                 "tags": ["Vegetarian", "Highly Rated"],
@@ -131,6 +322,14 @@ class RestaurantService:
                 "rating": 4.7,
                 "totalRatings": 310,
                 "eta": 35,
+                "address": {
+                    "line1": "3 Vijayaraghava Road",
+                    "line2": "T. Nagar",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600017",
+                    "coordinates": {"lat": 13.045, "lng": 80.24}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1579584425555-c3ce17fd4351",
                 "tags": ["Premium", "Exotic"],
@@ -144,6 +343,14 @@ class RestaurantService:
                 "rating": 4.1,
                 "totalRatings": 150,
                 "eta": 28,
+                "address": {
+                    "line1": "77 Velachery Main Road",
+                    "line2": "Velachery",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "pincode": "600042",
+                    "coordinates": {"lat": 12.9791, "lng": 80.2209}
+                },
                 "isActive": True,
                 "image": "https://images.unsplash.com/photo-1565299585323-38d6b0865b47",
                 "tags": ["Spicy", "Street Food"],
@@ -0,0 +1,684 @@
+"""
+Search index - Typo-tolerant full-text search over restaurants and dishes
+BM25 ranking over word postings held in NumPy arrays, with query terms
+expanded to nearby vocabulary terms through a trigram index over the
+vocabulary and a bounded edit distance ("biriyani" -> "biryani"). The last
+query word also matches as a prefix, for search-as-you-type.
+
+Restaurants arrive from the catalog index; available menu items are loaded
+from menuItems and kept fresh by the menu feed. A restaurant is also ranked
+by its best-matching dish.
+"""
+import asyncio
+import os
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo.errors import PyMongoError
+
+from app.services.catalog_index import tokenize
+from app.services.menu_feed import MENU_FEED_POLL_INTERVAL, menu_feed
+
+SEARCH_FULL_RELOAD_INTERVAL = float(os.getenv("SEARCH_FULL_RELOAD_INTERVAL", "900"))
+# Terms found in more documents than this only contribute their highest-
+# scoring postings (champion lists), which bounds the cost of common words
+SEARCH_CHAMPION_SIZE = int(os.getenv("SEARCH_CHAMPION_SIZE", "10000"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+RESTAURANT = 0
+DISH = 1
+
+# Field weights (BM25F-style: weighted term frequency and length)
+RESTAURANT_FIELDS = (("name", 3.0), ("cuisine", 2.0), ("tags", 1.5), ("description", 1.0))
+DISH_FIELDS = (("name", 3.0), ("category", 1.0), ("tags", 1.0), ("description", 0.5))
+
+# A restaurant's score includes this share of its best dish's score
+DISH_MATCH_WEIGHT = 0.6
+PREFIX_WEIGHT = 0.8
+PREFIX_EXPANSIONS = 10
+PREFIX_SCAN = 256
+FUZZY_PENALTY = 0.3
+MAX_QUERY_TERMS = 8
+EXPANSION_CACHE_SIZE = 4096
+
+DISH_PROJECTION = {"name": 1, "category": 1, "tags": 1, "description": 1, "restaurantId": 1,
+                   "price": 1, "isVeg": 1, "isAvailable": 1, "image": 1, "updatedAt": 1}
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase and strip accents, so "Crème" and "creme" index alike
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=65536)
+def _cached_terms(text: str) -> Tuple[str, ...]:
+    # Categories, tags and stock descriptions repeat across many items
+    return tuple(t for t in tokenize(normalize(text)) if len(t) > 1)
+
+
+def terms(text: Optional[str]) -> List[str]:
+    if not text or not isinstance(text, str):
+        return []
+    return list(_cached_terms(text))
+
+
+def trigrams(term: str) -> List[str]:
+    padded = f"^{term}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def max_edits(term: str) -> int:
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 7:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance counting insertions, deletions, substitutions and swaps of
+    adjacent letters ("biryani" -> "birynai" is one edit), or limit + 1 as
+    soon as it must exceed limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit and min(previous) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class Postings:
+    """
+    Slots and weighted term frequencies for one term. New postings collect
+    in Python lists and are folded into the arrays on the next query.
+    champions caches (slots, BM25 impacts, average lengths used) for
+    queries; postings merged since are kept in fresh until folded into it.
+    """
+
+    __slots__ = ("slots", "tfs", "champions", "fresh", "_new_slots", "_new_tfs")
+
+    def __init__(self):
+        self.slots = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.champions: Optional[tuple] = None
+        self.fresh: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._new_slots: List[int] = []
+        self._new_tfs: List[float] = []
+
+    def add(self, slot: int, tf: float):
+        self._new_slots.append(slot)
+        self._new_tfs.append(tf)
+
+    def arrays(self, alive: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self._new_slots:
+            new_slots = np.asarray(self._new_slots, dtype=np.int32)
+            new_tfs = np.asarray(self._new_tfs, dtype=np.float32)
+            slots = np.concatenate([self.slots, new_slots])
+            tfs = np.concatenate([self.tfs, new_tfs])
+            keep = alive[slots]
+            self.slots, self.tfs = slots[keep], tfs[keep]
+            self._new_slots, self._new_tfs = [], []
+            if self.champions is not None:
+                self.fresh.append((new_slots, new_tfs))
+        return self.slots, self.tfs
+
+    def remap(self, alive: np.ndarray, new_slot: np.ndarray):
+        self.arrays(alive)
+        keep = alive[self.slots]
+        self.slots = new_slot[self.slots[keep]]
+        self.tfs = self.tfs[keep]
+        self.champions = None
+        self.fresh = []
+
+    def __len__(self) -> int:
+        return len(self.slots) + len(self._new_slots)
+
+
+class SearchIndex:
+
+    def __init__(self):
+        self._reset()
+        self._task: Optional[asyncio.Task] = None
+        # Set when the menu feed missed changes; the next pass rebuilds
+        self._missed = asyncio.Event()
+        # Menu changes seen while load() builds, replayed onto the new index
+        self._pending: Optional[List[Tuple[str, Optional[dict]]]] = None
+        self.loaded = False
+
+    def _reset(self):
+        self._slot_of: Dict[Tuple[int, str], int] = {}
+        self._meta: List[Optional[dict]] = []
+        self._signature: List[Optional[int]] = []
+        capacity = 1024
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._owner = np.full(capacity, -1, dtype=np.int32)
+        self._doc_len = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self._dead = 0
+        self._live = [0, 0]
+        self._total_len = [0.0, 0.0]
+        # Restaurants get a stable key so dishes can point at them across re-indexing
+        self._restaurant_key: Dict[str, int] = {}
+        self._restaurant_slot = np.full(1024, -1, dtype=np.int32)
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._sorted_terms: List[str] = []
+        self._postings: List[Postings] = []
+        self._by_trigram: Dict[str, List[int]] = {}
+        self._expansions: Dict[Tuple[str, bool], List[Tuple[int, float]]] = {}
+        self._scratch: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __len__(self) -> int:
+        return self._live[RESTAURANT] + self._live[DISH]
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def upsert_restaurant(self, doc: dict):
+        # Catalog documents are already shaped for responses; keep a reference
+        rid = str(doc["_id"])
+        self._upsert(RESTAURANT, rid, doc, RESTAURANT_FIELDS, doc, -1)
+
+    def upsert_dish(self, doc: dict):
+        if not doc.get("isAvailable", True):
+            self.remove_dish(str(doc["_id"]))
+            return
+        item_id = str(doc["_id"])
+        rid = str(doc.get("restaurantId"))
+        meta = {
+            "_id": item_id,
+            "restaurantId": rid,
+            "name": doc.get("name"),
+            "category": doc.get("category"),
+            "price": doc.get("price"),
+            "isVeg": doc.get("isVeg", True),
+            "image": doc.get("image"),
+        }
+        self._upsert(DISH, item_id, doc, DISH_FIELDS, meta, self._restaurant_key_for(rid))
+
+    def remove_restaurant(self, restaurant_id: str):
+        self._remove(RESTAURANT, str(restaurant_id))
+
+    def remove_dish(self, item_id: str):
+        self._remove(DISH, str(item_id))
+
+    def _upsert(self, kind: int, doc_id: str, doc: dict, fields, meta: dict, owner: int):
+        weighted: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in fields:
+            value = doc.get(field)
+            texts = value if isinstance(value, list) else [value]
+            for text in texts:
+                if not text or not isinstance(text, str):
+                    continue
+                for term in _cached_terms(text):
+                    weighted[term] = weighted.get(term, 0.0) + weight
+                    length += weight
+
+        signature = hash(tuple(sorted(weighted.items())))
+        slot = self._slot_of.get((kind, doc_id))
+        if slot is not None and self._signature[slot] == signature and self._owner[slot] == owner:
+            # Same searchable text: refresh what results display, keep postings
+            self._meta[slot] = meta
+            return
+        self._remove(kind, doc_id)
+        if not weighted:
+            return
+
+        slot = self._new_slot()
+        self._slot_of[(kind, doc_id)] = slot
+        self._meta.append(meta)
+        self._signature.append(signature)
+        self._kind[slot] = kind
+        self._owner[slot] = owner
+        self._doc_len[slot] = length
+        self._alive[slot] = True
+        self._live[kind] += 1
+        self._total_len[kind] += length
+        if kind == RESTAURANT:
+            key = self._restaurant_key_for(doc_id)
+            self._restaurant_slot[key] = slot
+
+        for term, tf in weighted.items():
+            self._postings[self._term_id(term)].add(slot, tf)
+
+    def _remove(self, kind: int, doc_id: str):
+        slot = self._slot_of.pop((kind, doc_id), None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._meta[slot] = None
+        self._signature[slot] = None
+        self._live[kind] -= 1
+        self._total_len[kind] -= float(self._doc_len[slot])
+        self._dead += 1
+        if kind == RESTAURANT:
+            self._restaurant_slot[self._restaurant_key[doc_id]] = -1
+        if self._dead > 10_000 and self._dead > self._size // 2:
+            self.compact()
+
+    def _new_slot(self) -> int:
+        slot = self._size
+        if slot == len(self._kind):
+            grow = len(self._kind)
+            self._kind = np.concatenate([self._kind, np.zeros(grow, dtype=np.int8)])
+            self._owner = np.concatenate([self._owner, np.full(grow, -1, dtype=np.int32)])
+            self._doc_len = np.concatenate([self._doc_len, np.zeros(grow, dtype=np.float32)])
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        self._size += 1
+        return slot
+
+    def _restaurant_key_for(self, restaurant_id: str) -> int:
+        key = self._restaurant_key.get(restaurant_id)
+        if key is None:
+            key = self._restaurant_key[restaurant_id] = len(self._restaurant_key)
+            if key == len(self._restaurant_slot):
+                self._restaurant_slot = np.concatenate([
+                    self._restaurant_slot, np.full(len(self._restaurant_slot), -1, dtype=np.int32)
+                ])
+        return key
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = self._vocab[term] = len(self._terms)
+            self._terms.append(term)
+            self._postings.append(Postings())
+            insort(self._sorted_terms, term)
+            for gram in set(trigrams(term)):
+                self._by_trigram.setdefault(gram, []).append(term_id)
+            self._expansions.clear()
+        return term_id
+
+    def compact(self):
+        """
+        Drop removed documents from every posting list and renumber slots
+        """
+        alive = self._alive[:self._size]
+        new_slot = np.cumsum(alive, dtype=np.int32) - 1
+        for postings in self._postings:
+            postings.remap(self._alive, new_slot)
+
+        keep = np.flatnonzero(alive)
+        size = len(keep)
+        capacity = max(1024, size * 2)
+
+        def packed(array, fill):
+            out = np.full(capacity, fill, dtype=array.dtype)
+            out[:size] = array[keep]
+            return out
+
+        self._kind = packed(self._kind[:self._size], 0)
+        self._owner = packed(self._owner[:self._size], -1)
+        self._doc_len = packed(self._doc_len[:self._size], 0)
+        self._alive = packed(alive, False)
+        self._meta = [self._meta[i] for i in keep]
+        self._signature = [self._signature[i] for i in keep]
+        self._slot_of = {key: int(new_slot[slot]) for key, slot in self._slot_of.items()}
+        live_restaurants = self._restaurant_slot >= 0
+        self._restaurant_slot[live_restaurants] = new_slot[self._restaurant_slot[live_restaurants]]
+        self._size = size
+        self._dead = 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _expand(self, term: str, prefix: bool) -> List[Tuple[int, float]]:
+        """
+        Vocabulary terms a query term should match, with weights: exact 1.0,
+        fuzzy matches lowered per edit, prefix completions PREFIX_WEIGHT
+        """
+        cache_key = (term, prefix)
+        cached = self._expansions.get(cache_key)
+        if cached is not None:
+            return cached
+
+        matches: Dict[int, float] = {}
+        exact = self._vocab.get(term)
+        if exact is not None:
+            matches[exact] = 1.0
+
+        edits = max_edits(term)
+        if edits:
+            grams = trigrams(term)
+            shared: Counter = Counter()
+            for gram in set(grams):
+                shared.update(self._by_trigram.get(gram, ()))
+            # An edit changes at most four trigrams (a swap of neighbours)
+            needed = max(1, len(grams) - 4 * edits)
+            for term_id, count in shared.items():
+                if count < needed or term_id in matches:
+                    continue
+                distance = edit_distance(term, self._terms[term_id], edits)
+                if distance <= edits:
+                    matches[term_id] = max(0.1, 1.0 - FUZZY_PENALTY * distance)
+
+        if prefix:
+            # The most common completions: "chi" should find "chicken" first
+            start = bisect_left(self._sorted_terms, term)
+            completions = []
+            for candidate in self._sorted_terms[start:start + PREFIX_SCAN]:
+                if not candidate.startswith(term):
+                    break
+                term_id = self._vocab[candidate]
+                completions.append((-len(self._postings[term_id]), term_id))
+            for _, term_id in sorted(completions)[:PREFIX_EXPANSIONS]:
+                matches[term_id] = max(matches.get(term_id, 0.0), PREFIX_WEIGHT)
+
+        expansion = list(matches.items())
+        if len(self._expansions) >= EXPANSION_CACHE_SIZE:
+            self._expansions.clear()
+        self._expansions[cache_key] = expansion
+        return expansion
+
+    def _impacts(self, slots: np.ndarray, tfs: np.ndarray, avg_len: np.ndarray) -> np.ndarray:
+        """
+        BM25 term-frequency component of each posting (idf is applied per query)
+        """
+        norm = 1.0 - B + B * self._doc_len[slots] / avg_len[self._kind[slots]]
+        return (tfs * (K1 + 1.0) / (tfs + K1 * norm)).astype(np.float32)
+
+    def _champions(self, term_id: int, avg_len: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        A term's slots and impacts, cut down to the SEARCH_CHAMPION_SIZE
+        highest for very common terms. Rebuilt when average document lengths
+        drift by over 5%; new postings are folded in without a rebuild.
+        """
+        postings = self._postings[term_id]
+        slots, tfs = postings.arrays(self._alive)
+        cached = postings.champions
+        if cached is None or np.any(np.abs(cached[2] / avg_len - 1.0) > 0.05):
+            postings.fresh = []
+            champions = self._cut(slots, self._impacts(slots, tfs, avg_len), SEARCH_CHAMPION_SIZE)
+        elif postings.fresh:
+            champion_slots, champion_impacts = cached[0], cached[1]
+            for new_slots, new_tfs in postings.fresh:
+                champion_slots = np.concatenate([champion_slots, new_slots])
+                champion_impacts = np.concatenate([champion_impacts, self._impacts(new_slots, new_tfs, avg_len)])
+            postings.fresh = []
+            keep = self._alive[champion_slots]
+            champions = self._cut(champion_slots[keep], champion_impacts[keep], SEARCH_CHAMPION_SIZE)
+        else:
+            return cached[0], cached[1]
+        postings.champions = (champions[0], champions[1], avg_len)
+        return champions
+
+    @staticmethod
+    def _cut(slots: np.ndarray, impacts: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(slots) > size:
+            top = np.argpartition(-impacts, size)[:size]
+            # Slot order keeps the per-query scatter/gather cache friendly
+            top.sort()
+            slots, impacts = slots[top], impacts[top]
+        return slots, impacts
+
+    def _average_lengths(self) -> np.ndarray:
+        return np.array([
+            max(1.0, self._total_len[RESTAURANT] / max(1, self._live[RESTAURANT])),
+            max(1.0, self._total_len[DISH] / max(1, self._live[DISH])),
+        ], dtype=np.float32)
+
+    def _scratch_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        Per-slot work arrays reused across queries; search() leaves them
+        zeroed again, touching only the slots it used
+        """
+        if self._scratch is None or len(self._scratch[0]) < self._size:
+            capacity = len(self._kind)
+            self._scratch = tuple(np.zeros(capacity, dtype=np.float32) for _ in range(4)) + (
+                np.zeros(capacity, dtype=np.int32),
+            )
+        return self._scratch
+
+    def _distinct(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Drop repeated slots without sorting
+        """
+        marks = self._scratch_arrays()[4]
+        order = np.arange(len(slots), dtype=np.int32)
+        marks[slots] = order
+        return slots[marks[slots] == order]
+
+    def search(self, query: str, limit: int = 10) -> dict:
+        """
+        Top restaurants and dishes for a free-text query. Only slots found in
+        a matched term's postings are touched, never the whole index.
+        """
+        empty = {"restaurants": [], "dishes": []}
+        words = terms(query)[:MAX_QUERY_TERMS]
+        if not words or not len(self):
+            return empty
+
+        n_docs = max(1, len(self))
+        avg_len = self._average_lengths()
+
+        total, matched, best, best_dish, _ = self._scratch_arrays()
+        touched = []
+        as_you_type = not query[-1:].isspace()
+        for i, word in enumerate(words):
+            matches = []
+            for term_id, weight in self._expand(word, prefix=as_you_type and i == len(words) - 1):
+                df = len(self._postings[term_id])
+                slots, impacts = self._champions(term_id, avg_len)
+                if len(slots):
+                    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+                    matches.append((slots, impacts * np.float32(idf * weight)))
+            if not matches:
+                continue
+            if len(matches) == 1:
+                slots, scores = matches[0]
+                total[slots] += scores
+            else:
+                # A word scores its best-matching variant once per document;
+                # repeated indexes in a fancy-indexed += apply once
+                for slots, scores in matches:
+                    best[slots] = np.maximum(best[slots], scores)
+                slots = np.concatenate([slots for slots, _ in matches])
+                total[slots] += best[slots]
+                best[slots] = 0.0
+            matched[slots] += 1.0
+            touched.append(slots)
+
+        if not touched:
+            return empty
+        hits = self._distinct(np.concatenate(touched))
+        # Documents matching more of the query words rank higher
+        scores = total[hits] * (matched[hits] / np.float32(len(words)))
+        total[hits] = 0.0
+        matched[hits] = 0.0
+        live = self._alive[hits]
+        hits, scores = hits[live], scores[live]
+        kinds = self._kind[hits]
+
+        own = kinds == RESTAURANT
+        dishes, dish_scores = hits[~own], scores[~own]
+        owners = self._restaurant_slot[self._owner[dishes]]
+        listed = owners >= 0
+        dishes, dish_scores, owners = dishes[listed], dish_scores[listed], owners[listed]
+
+        # A restaurant ranks by its own match plus a share of its best dish
+        restaurant_scores = best
+        restaurant_scores[hits[own]] = scores[own]
+        np.maximum.at(best_dish, owners, dish_scores)
+        restaurants = self._distinct(np.concatenate([hits[own], owners]))
+        combined = restaurant_scores[restaurants] + np.float32(DISH_MATCH_WEIGHT) * best_dish[restaurants]
+        restaurant_scores[restaurants] = 0.0
+        best_dish[restaurants] = 0.0
+
+        top_restaurants, top_restaurant_scores = self._top(restaurants, combined, limit)
+        top_dishes, top_dish_scores = self._top(dishes, dish_scores, limit)
+        return {
+            "restaurants": [
+                dict(self._meta[slot], score=round(score, 4))
+                for slot, score in zip(top_restaurants, top_restaurant_scores)
+            ],
+            "dishes": [
+                dict(
+                    self._meta[slot],
+                    restaurantName=self._meta[self._restaurant_slot[self._owner[slot]]]["name"],
+                    score=round(score, 4)
+                )
+                for slot, score in zip(top_dishes, top_dish_scores)
+            ],
+        }
+
+    @staticmethod
+    def _top(slots: np.ndarray, scores: np.ndarray, limit: int) -> Tuple[List[int], List[float]]:
+        if len(slots) > limit:
+            part = np.argpartition(-scores, limit)[:limit]
+            slots, scores = slots[part], scores[part]
+        order = np.lexsort((slots, -scores))
+        return slots[order].tolist(), scores[order].tolist()
+
+    def prepare(self):
+        """
+        Merge pending postings and build champion lists ahead of queries
+        """
+        avg_len = self._average_lengths()
+        for term_id in range(len(self._postings)):
+            self._champions(term_id, avg_len)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "restaurants": self._live[RESTAURANT],
+            "dishes": self._live[DISH],
+            "terms": len(self._terms),
+            "slots": self._size,
+            "deadSlots": self._dead,
+        }
+
+    # ------------------------------------------------------------------
+    # Loading and freshness
+    # ------------------------------------------------------------------
+
+    def on_menu_change(self, restaurant_id: Optional[str], item_id: str, doc: Optional[dict]):
+        """
+        Menu feed listener: doc is the full item, or None on delete
+        """
+        if self._pending is not None:
+            self._pending.append((item_id, doc))
+        if doc is None:
+            self.remove_dish(item_id)
+        else:
+            self.upsert_dish(doc)
+
+    def on_catalog_change(self, restaurant_id: str, doc: Optional[dict]):
+        """
+        Catalog index listener: doc is the shaped restaurant, or None on removal
+        """
+        if doc is None:
+            self.remove_restaurant(restaurant_id)
+        else:
+            self.upsert_restaurant(doc)
+
+    def _on_resync(self):
+        # Looked up on each call: load() must not leave the feed holding a
+        # stale event
+        self._missed.set()
+
+    async def load(self, db, catalog):
+        """
+        Rebuild from every available menu item and the catalog's restaurants.
+        The new index is built aside and swapped in, so queries keep using
+        the old one meanwhile.
+        """
+        fresh = SearchIndex()
+        count = 0
+        self._pending = []
+        try:
+            async for doc in db.menuItems.find({"isAvailable": True}, DISH_PROJECTION).batch_size(5000):
+                fresh.upsert_dish(doc)
+                count += 1
+                # Let requests run while a large menu collection loads
+                if count % 1000 == 0:
+                    await asyncio.sleep(0)
+            # No await from here on, so no catalog or menu change is missed
+            for item_id, doc in self._pending:
+                fresh.on_menu_change(None, item_id, doc)
+        finally:
+            self._pending = None
+        for doc in catalog.documents():
+            fresh.upsert_restaurant(doc)
+        fresh.prepare()
+
+        # The task and the resync flag belong to this index, not the build
+        task, missed = self._task, self._missed
+        self.__dict__.update(fresh.__dict__)
+        self._task, self._missed, self._pending = task, missed, None
+        self.loaded = True
+        print(f"✓ Search index loaded: {self._live[RESTAURANT]} restaurants, "
+              f"{self._live[DISH]} dishes, {len(self._terms)} terms")
+
+    def start(self, db, catalog):
+        """
+        Build in the background; changes arrive through the catalog index
+        and menu feed listeners
+        """
+        if self._task is not None:
+            return
+        catalog.add_listener(self.on_catalog_change)
+        menu_feed.add_listener(self.on_menu_change)
+        menu_feed.add_resync_listener(self._on_resync)
+        self._task = asyncio.create_task(self._run(db, catalog))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db, catalog):
+        try:
+            await self.load(db, catalog)
+        except PyMongoError as e:
+            print(f"❌ Search index load failed: {e}")
+        while True:
+            # Retry soon when the first load failed (database down at startup)
+            try:
+                await asyncio.wait_for(self._missed.wait(),
+                                       SEARCH_FULL_RELOAD_INTERVAL if self.loaded else MENU_FEED_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            missed = self._missed.is_set()
+            self._missed.clear()
+            # A polling menu feed misses deletes, so rebuild periodically, and
+            # after the change stream restarted past changes
+            if menu_feed.following and self.loaded and not missed:
+                continue
+            try:
+                await self.load(db, catalog)
+            except PyMongoError as e:
+                print(f"Error reloading search index: {e}")
+
+
+search_index = SearchIndex()
@@ -0,0 +1,238 @@
+"""
+Tracking hub - Per-order pub/sub for live delivery updates
+Publishers (status changes, partner locations) hand events to a broker; the
+broker delivers them to every worker's hub, which fans them out to that
+worker's subscribers. Each event is encoded once and shared by all
+subscribers of the order.
+
+Subscriber queues are bounded; a slow consumer loses its oldest events
+rather than holding memory or slowing the publisher.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+import orjson
+
+TRACKING_QUEUE_SIZE = int(os.getenv("TRACKING_QUEUE_SIZE", "32"))
+TRACKING_BROKER = os.getenv("TRACKING_BROKER", "local")
+TRACKING_KEEPALIVE_SECONDS = float(os.getenv("TRACKING_KEEPALIVE_SECONDS", "15"))
+
+# Sent after a terminal status; streams close once they forward it
+END_EVENT = "end"
+
+
+class TrackingEvent:
+    """
+    One encoded event; the SSE frame is built on first use and reused
+    """
+
+    __slots__ = ("type", "data", "_sse", "_frame")
+
+    def __init__(self, event_type: str, data: bytes):
+        self.type = event_type
+        self.data = data
+        self._sse: Optional[bytes] = None
+        self._frame: Optional[str] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = b"event: " + self.type.encode() + b"\ndata: " + self.data + b"\n\n"
+        return self._sse
+
+    @property
+    def frame(self) -> str:
+        """
+        WebSocket text frame: {"type": ..., "data": ...}
+        """
+        if self._frame is None:
+            self._frame = '{"type":"' + self.type + '","data":' + self.data.decode() + "}"
+        return self._frame
+
+
+class Subscription:
+    """
+    Bounded per-subscriber queue with drop-oldest overflow
+    """
+
+    __slots__ = ("topic", "_events", "_ready", "dropped", "closed")
+
+    def __init__(self, topic: str, maxsize: int = TRACKING_QUEUE_SIZE):
+        self.topic = topic
+        self._events: deque = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, event: TrackingEvent):
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[TrackingEvent]:
+        """
+        Next event, or None when the timeout passes first or the
+        subscription was closed
+        """
+        while not self._events:
+            if self.closed:
+                return None
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._events.popleft()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+
+class Broker:
+    """
+    Moves encoded events between workers. publish() must eventually call
+    the deliver callback given to start() in every worker, this one included.
+    Set local_only when events never leave the process, so the hub can skip
+    topics nobody in this worker is watching.
+    """
+
+    local_only = False
+
+    async def start(self, deliver: Callable[[str, str, bytes], None]):
+        raise NotImplementedError
+
+    async def publish(self, topic: str, event_type: str, data: bytes):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class LocalBroker(Broker):
+    """
+    In-process broker: delivers straight to this worker's hub. With more
+    than one worker, subscribers only see events published by their own
+    worker; plug in a shared broker for cross-worker fan-out.
+    """
+
+    local_only = True
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str, str, bytes], None]] = None
+
+    async def start(self, deliver: Callable[[str, str, bytes], None]):
+        self._deliver = deliver
+
+    async def publish(self, topic: str, event_type: str, data: bytes):
+        if self._deliver is not None:
+            self._deliver(topic, event_type, data)
+
+
+BROKERS: Dict[str, Callable[[], Broker]] = {
+    "local": LocalBroker,
+}
+
+
+def create_broker(name: str = TRACKING_BROKER) -> Broker:
+    factory = BROKERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown tracking broker '{name}' (available: {', '.join(BROKERS)})")
+    return factory()
+
+
+class TrackingHub:
+    """
+    Topic (order id) -> subscriptions in this worker
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker or create_broker()
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._started = False
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self):
+        if not self._started:
+            await self.broker.start(self._deliver)
+            self._started = True
+
+    async def stop(self):
+        if self._started:
+            await self.broker.stop()
+            self._started = False
+        for subscribers in self._topics.values():
+            for subscription in subscribers:
+                subscription.close()
+        self._topics.clear()
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic)
+        self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._topics[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    async def publish(self, topic: str, event_type: str, payload: dict):
+        if self.broker.local_only and topic not in self._topics:
+            return
+        self.published += 1
+        await self.broker.publish(topic, event_type, orjson.dumps(payload))
+
+    async def sse_stream(self, subscription: Subscription, initial: Optional[dict] = None) -> AsyncIterator[bytes]:
+        """
+        Server-sent events for a subscription: the initial snapshot, then
+        every event, with comment keepalives while idle. Ends after the
+        end event, and always unsubscribes.
+        """
+        try:
+            if initial is not None:
+                yield TrackingEvent("snapshot", orjson.dumps(initial)).sse
+            while True:
+                event = await subscription.next(TRACKING_KEEPALIVE_SECONDS)
+                if event is None:
+                    if subscription.closed:
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                yield event.sse
+                if event.type == END_EVENT:
+                    break
+        finally:
+            self.unsubscribe(subscription)
+
+    def _deliver(self, topic: str, event_type: str, data: bytes):
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        event = TrackingEvent(event_type, data)
+        for subscription in subscribers:
+            subscription.push(event)
+        self.delivered += len(subscribers)
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "topics": len(self._topics),
+            "subscribers": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(sub.dropped for subs in self._topics.values() for sub in subs),
+            "queueSize": TRACKING_QUEUE_SIZE,
+        }
+
+
+tracking_hub = TrackingHub()
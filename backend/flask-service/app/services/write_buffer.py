@@ -0,0 +1,197 @@
+"""
+Write buffer - Write-behind batching of MongoDB writes
+Writes are queued per collection and flushed with one unordered bulk_write
+per collection every WRITE_BUFFER_FLUSH_MS (or sooner once
+WRITE_BUFFER_MAX_BATCH ops are queued). Ops queued under the same key
+replace each other, so a burst of updates to one document costs one write.
+
+Flushes run one at a time, so a later write to a key never reaches MongoDB
+before an earlier one. Duplicate-key errors are treated as writes that were
+already applied (a retried insert with a deterministic _id, such as a
+delivery event) rather than failures.
+"""
+import asyncio
+import itertools
+import os
+from typing import Dict, Hashable, Optional
+
+from pymongo.errors import BulkWriteError
+
+WRITE_BUFFER_FLUSH_MS = float(os.getenv("WRITE_BUFFER_FLUSH_MS", "5"))
+WRITE_BUFFER_MAX_BATCH = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "1000"))
+WRITE_BUFFER_MAX_PENDING = int(os.getenv("WRITE_BUFFER_MAX_PENDING", "50000"))
+WRITE_BUFFER_RETRY_SECONDS = float(os.getenv("WRITE_BUFFER_RETRY_SECONDS", "0.5"))
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindBuffer:
+    """
+    Per-worker queue of pending writes; start() it with the database once
+    connected and stop() it on shutdown to flush the tail
+    """
+
+    def __init__(self, flush_ms: float = WRITE_BUFFER_FLUSH_MS,
+                 max_batch: int = WRITE_BUFFER_MAX_BATCH,
+                 max_pending: int = WRITE_BUFFER_MAX_PENDING):
+        self.interval = flush_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._db = None
+        self._pending: Dict[str, Dict[Hashable, object]] = {}
+        self._count = 0
+        self._seq = itertools.count()
+        self._has_work = asyncio.Event()
+        self._full = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.coalesced = 0
+        self.written = 0
+        self.stale = 0
+        self.flushes = 0
+        self.round_trips = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, db):
+        if self.running:
+            return
+        self._db = db
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop and write whatever is still queued
+        """
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+        self._db = None
+
+    async def wait_for_capacity(self):
+        """
+        Backpressure: wait for a flush while more than max_pending ops are
+        queued. Call it before building ops, not between put() calls that
+        must stay together.
+        """
+        while self._count >= self.max_pending:
+            self._drained.clear()
+            await self._drained.wait()
+
+    def put(self, collection: str, op, key: Optional[Hashable] = None):
+        """
+        Queue a pymongo write op (UpdateOne, InsertOne, ...). With a key, the
+        op replaces any op still queued under the same key; without one it
+        is always written.
+        """
+        ops = self._pending.get(collection)
+        if ops is None:
+            ops = self._pending[collection] = {}
+        if key is None:
+            key = ("_seq", next(self._seq))
+        elif key in ops:
+            del ops[key]
+            self._count -= 1
+            self.coalesced += 1
+        ops[key] = op
+        self._count += 1
+        self.queued += 1
+
+        self._has_work.set()
+        if self._count >= self.max_batch:
+            self._full.set()
+
+    async def _run(self):
+        while True:
+            await self._has_work.wait()
+            if self._count < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            if await self.flush():
+                # Back off instead of retrying every few ms while Mongo is down
+                await asyncio.sleep(WRITE_BUFFER_RETRY_SECONDS)
+
+    async def flush(self) -> int:
+        """
+        Write everything queued now; returns how many collections failed
+        """
+        failed = 0
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            self._count = 0
+            self._has_work.clear()
+            self._full.clear()
+            if batch and self._db is not None:
+                self.flushes += 1
+                results = await asyncio.gather(
+                    *[self._write(collection, ops) for collection, ops in batch.items()],
+                    return_exceptions=True
+                )
+                for (collection, ops), result in zip(batch.items(), results):
+                    if isinstance(result, Exception):
+                        # Transient failure (e.g. primary stepdown): queue the
+                        # ops again unless a newer op for the key is waiting
+                        failed += 1
+                        self.errors += 1
+                        print(f"❌ bulk_write to {collection} failed, retrying: {result}")
+                        self._requeue(collection, ops)
+            self._drained.set()
+        return failed
+
+    async def _write(self, collection: str, ops: Dict[Hashable, object]):
+        requests = list(ops.values())
+        self.round_trips += 1
+        try:
+            result = await self._db[collection].bulk_write(requests, ordered=False)
+            self.written += len(requests)
+            return result
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            stale = sum(1 for err in errors if err.get("code") == DUPLICATE_KEY)
+            self.stale += stale
+            self.written += len(requests) - len(errors)
+            failed = [err for err in errors if err.get("code") != DUPLICATE_KEY]
+            if failed:
+                self.errors += len(failed)
+                print(f"❌ {len(failed)} write(s) to {collection} rejected: {failed[0].get('errmsg')}")
+
+    def _requeue(self, collection: str, ops: Dict[Hashable, object]):
+        pending = self._pending.setdefault(collection, {})
+        for key, op in ops.items():
+            if key not in pending:
+                pending[key] = op
+                self._count += 1
+        if self._count:
+            self._has_work.set()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._count,
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "stale": self.stale,
+            "flushes": self.flushes,
+            "roundTrips": self.round_trips,
+            "errors": self.errors,
+            "flushIntervalMs": self.interval * 1000,
+        }
+
+
+write_buffer = WriteBehindBuffer()
@@ -0,0 +1,96 @@
+"""
+Admission benchmark - checkout latency while browsing floods the worker
+Drives AdmissionMiddleware around a stand-in app whose requests share one
+Motor-like connection pool (a semaphore) and hold it for their service
+time. Closed-loop clients: many browsing, a few checkout; a shed client
+waits --backoff-ms before trying again. Runs once without and once with
+admission control and reports per-class latency, throughput and sheds.
+Run from backend/flask-service:  python -m benchmarks.admission
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from app.middleware.admission import AdmissionMiddleware
+from app.services.admission import AdmissionController, default_classes
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def make_app(pool: asyncio.Semaphore, service_ms: Dict[str, float]):
+    async def app(scope, receive, send):
+        async with pool:
+            await asyncio.sleep(service_ms[scope["path"]] / 1000.0)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+async def client(app, path: str, until: float, backoff: float, latencies: List[float], shed: List[int]):
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    while time.perf_counter() < until:
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        if status == 503:
+            shed[0] += 1
+            await asyncio.sleep(backoff)
+        else:
+            latencies.append((time.perf_counter() - started) * 1e3)
+
+
+async def run(args, admission: bool) -> dict:
+    paths = {"checkout": "/internal/eta", "browsing": "/internal/restaurants"}
+    app = make_app(asyncio.Semaphore(args.pool), {paths["checkout"]: args.checkout_ms,
+                                                  paths["browsing"]: args.browsing_ms})
+    controller = AdmissionController(default_classes())
+    if admission:
+        app = AdmissionMiddleware(app, controller=controller)
+    clients = {"checkout": args.checkout_clients, "browsing": args.browsing_clients}
+    latencies = {name: [] for name in clients}
+    shed = {name: [0] for name in clients}
+    until = time.perf_counter() + args.seconds
+    await asyncio.gather(*(
+        client(app, paths[name], until, args.backoff_ms / 1000.0, latencies[name], shed[name])
+        for name, count in clients.items() for _ in range(count)
+    ))
+    limits = {c["name"]: c["limit"] for c in controller.stats()}
+    return {name: (latencies[name], shed[name][0], limits[name] if admission else None) for name in clients}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--pool", type=int, default=50, help="shared connection pool size")
+    parser.add_argument("--browsing-clients", type=int, default=400)
+    parser.add_argument("--checkout-clients", type=int, default=20)
+    parser.add_argument("--browsing-ms", type=float, default=20.0)
+    parser.add_argument("--checkout-ms", type=float, default=5.0)
+    parser.add_argument("--backoff-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"{'admission':<11}{'class':<10}{'req/s':>8}{'shed/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'limit':>7}")
+    for admission in (False, True):
+        results = asyncio.run(run(args, admission))
+        for name, (latencies, shed, limit) in results.items():
+            print(f"{'on' if admission else 'off':<11}{name:<10}"
+                  f"{len(latencies) / args.seconds:>8,.0f}{shed / args.seconds:>8,.0f}"
+                  f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 99):>9.1f}"
+                  f"{'-' if limit is None else limit:>7}")
+
+
+if __name__ == "__main__":
+    main()
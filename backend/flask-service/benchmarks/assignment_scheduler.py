@@ -0,0 +1,81 @@
+"""
+Assignment scheduler benchmark - greedy vs batch-optimal total pickup distance
+Run from backend/flask-service:  python -m benchmarks.assignment_scheduler
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.assignment_scheduler import AssignmentScheduler
+from app.services.partner_registry import PartnerRegistry
+
+# Greater Chennai bounding box
+LAT_MIN, LAT_MAX = 12.85, 13.20
+LNG_MIN, LNG_MAX = 80.10, 80.32
+
+
+def build_registry(rng: random.Random, partners: int) -> PartnerRegistry:
+    registry = PartnerRegistry()
+    for i in range(partners):
+        registry.upsert_location(
+            f"DP{i}", rng.uniform(LAT_MIN, LAT_MAX), rng.uniform(LNG_MIN, LNG_MAX), available=True
+        )
+    return registry
+
+
+def run_greedy(registry: PartnerRegistry, pickups) -> tuple:
+    total_km = 0.0
+    assigned = 0
+    for n, (lat, lng) in enumerate(pickups):
+        for distance_km, partner in registry.nearest(lat, lng, k=5):
+            if registry.claim(partner.id, f"ORD{n}"):
+                total_km += distance_km
+                assigned += 1
+                break
+    return total_km, assigned
+
+
+async def run_batch(registry: PartnerRegistry, pickups, candidates: int) -> tuple:
+    scheduler = AssignmentScheduler(
+        registry, window_ms=50, max_orders=len(pickups), min_orders=0,
+        budget_ms=10_000, candidates=candidates
+    )
+    results = await asyncio.gather(*[
+        scheduler.submit(f"ORD{n}", pickup) for n, pickup in enumerate(pickups)
+    ])
+    matched = [r for r in results if r is not None]
+    return sum(d for d, _ in matched), len(matched), scheduler.last_batch_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--partners", type=int, default=3000)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pickups = [
+        (rng.uniform(LAT_MIN, LAT_MAX), rng.uniform(LNG_MIN, LNG_MAX))
+        for _ in range(args.orders)
+    ]
+
+    registry = build_registry(random.Random(args.seed + 1), args.partners)
+    start = time.perf_counter()
+    greedy_km, greedy_assigned = run_greedy(registry, pickups)
+    greedy_ms = (time.perf_counter() - start) * 1000.0
+
+    registry = build_registry(random.Random(args.seed + 1), args.partners)
+    batch_km, batch_assigned, batch_ms = asyncio.run(run_batch(registry, pickups, args.candidates))
+
+    print(f"orders x partners:  {args.orders} x {args.partners} ({args.candidates} candidates/order)")
+    print(f"greedy:             {greedy_assigned} assigned, {greedy_km:.1f} km total, {greedy_ms:.1f} ms")
+    print(f"batch (matching):   {batch_assigned} assigned, {batch_km:.1f} km total, {batch_ms:.1f} ms per batch")
+    if greedy_km:
+        print(f"distance saved:     {(1 - batch_km / greedy_km) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Load test - drives every /internal endpoint at fixed concurrency
+Starts main:app under uvicorn against a local MongoDB seeded with a
+synthetic catalog, reports p50/p95/p99 latency and requests/second per
+endpoint, and writes the results as JSON.
+
+Run from backend/flask-service (needs a local mongod):
+    python -m benchmarks.load_test --seed-db --output results.json
+    python -m benchmarks.load_test --output new.json --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks import seed as catalog
+
+DEFAULT_URI = "mongodb://localhost:27017/fooddelivery_bench"
+
+
+class Scenario:
+    """
+    One endpoint under load: build_request(rng) returns (method, path, json_body).
+    after(client, response), when given, runs untimed after every request
+    (e.g. to undo its side effects) and returns an outcome label to count.
+    """
+
+    def __init__(self, name: str, build_request: Callable, setup: Optional[Callable] = None,
+                 after: Optional[Callable] = None):
+        self.name = name
+        self.build_request = build_request
+        self.setup = setup
+        self.after = after
+
+
+def build_scenarios(restaurants: int) -> List[Scenario]:
+    def rid(rng):
+        return catalog.restaurant_id(rng.randrange(restaurants))
+
+    def point(rng):
+        return {
+            "lat": rng.uniform(catalog.LAT_MIN, catalog.LAT_MAX),
+            "lng": rng.uniform(catalog.LNG_MIN, catalog.LNG_MAX),
+        }
+
+    def address(rng):
+        return {"line1": "1 Test Street", "city": "Chennai", "pincode": rng.choice(catalog.PINCODES),
+                "coordinates": point(rng)}
+
+    async def seed_partners(client: httpx.AsyncClient):
+        rng = random.Random(5)
+        for n in range(5000):
+            await client.post(f"/internal/partners/DP{n}/location",
+                              json=dict(point(rng), available=True, name=f"Partner {n}"))
+
+    async def release_partner(client: httpx.AsyncClient, response: Optional[httpx.Response]) -> str:
+        # Cancel each assigned order so its partner goes back to the pool;
+        # otherwise the pool drains and only the UNASSIGNED path is measured
+        if response is None or response.status_code != 200:
+            return "error"
+        assignment = response.json()
+        if assignment.get("status") != "ASSIGNED":
+            return "unassigned"
+        await client.patch(f"/internal/delivery/{assignment['orderId']}", json={"status": "CANCELLED"})
+        return "assigned"
+
+    async def wait_for_search(client: httpx.AsyncClient):
+        # The search index builds in the background after startup
+        for _ in range(600):
+            stats = (await client.get("/internal/search/stats")).json()
+            if stats.get("loaded"):
+                return
+            await asyncio.sleep(1)
+
+    order_counter = iter(range(10 ** 9))
+    statuses = ["CONFIRMED", "PREPARING", "PICKED_UP", "OUT_FOR_DELIVERY", "DELIVERED"]
+    # Walk each order through the legal status flow
+    status_updates = ((f"bench-s{n}", status) for n in range(10 ** 9) for status in statuses)
+
+    def status_update(rng):
+        order_id, status = next(status_updates)
+        return ("PATCH", f"/internal/delivery/{order_id}", {"status": status})
+
+    return [
+        Scenario("restaurants.list", lambda rng: ("GET", "/internal/restaurants", None)),
+        Scenario("restaurants.list.cuisine", lambda rng: (
+            "GET", f"/internal/restaurants?cuisine={rng.choice(catalog.CUISINES)}", None)),
+        Scenario("restaurants.list.search", lambda rng: (
+            "GET", f"/internal/restaurants?search={rng.choice(catalog.NAME_WORDS).lower()}", None)),
+        Scenario("restaurants.get", lambda rng: ("GET", f"/internal/restaurants/{rid(rng)}", None)),
+        Scenario("restaurants.batch", lambda rng: (
+            "POST", "/internal/restaurants/batch", {"ids": [rid(rng) for _ in range(20)]})),
+        Scenario("menu.get", lambda rng: ("GET", f"/internal/menu/{rid(rng)}", None)),
+        Scenario("menu.category", lambda rng: (
+            "GET", f"/internal/menu/{rid(rng)}/category/{rng.choice(catalog.CATEGORIES)}", None)),
+        Scenario("menu.batch", lambda rng: (
+            "POST", "/internal/menu/batch", {"ids": [rid(rng) for _ in range(20)]})),
+        Scenario("search", lambda rng: (
+            "GET", f"/internal/search?q={rng.choice(catalog.DISH_WORDS).lower()}", None), setup=wait_for_search),
+        Scenario("search.typo", lambda rng: (
+            "GET", f"/internal/search?q={rng.choice(['biriyani', 'panner', 'noodels', 'tandori', 'chiken'])}", None),
+            setup=wait_for_search),
+        Scenario("restaurants.nearby", lambda rng: (
+            "GET", "/internal/restaurants/nearby?lat={lat}&lng={lng}&radius=8".format(**point(rng)), None)),
+        Scenario("eta", lambda rng: (
+            "POST", "/internal/eta", {"restaurantId": rid(rng), "deliveryAddress": address(rng)})),
+        Scenario("eta.batch", lambda rng: (
+            "POST", "/internal/eta/batch",
+            {"deliveryAddress": address(rng), "pairs": [{"restaurantId": rid(rng)} for _ in range(200)]})),
+        Scenario("partners.location", lambda rng: (
+            "POST", f"/internal/partners/DP{rng.randrange(5000)}/location", point(rng)), setup=seed_partners),
+        Scenario("partners.nearby", lambda rng: (
+            "GET", "/internal/partners/nearby?lat={lat}&lng={lng}&k=10".format(**point(rng)), None)),
+        Scenario("delivery.assign", lambda rng: (
+            "POST", "/internal/delivery/assign",
+            {"orderId": f"bench-o{next(order_counter)}", "restaurantId": rid(rng), "deliveryAddress": address(rng)}),
+            setup=seed_partners, after=release_partner),
+        Scenario("delivery.status", status_update),
+    ]
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, concurrency: int,
+                       duration: float, warmup: float, seed_value: int) -> dict:
+    if scenario.setup is not None:
+        await scenario.setup(client)
+
+    latencies: List[float] = []
+    errors = 0
+    status_counts: Dict[int, int] = {}
+    outcomes: Dict[str, int] = {}
+    warm_until = time.perf_counter() + warmup
+    stop_at = warm_until + duration
+
+    async def worker(n: int):
+        nonlocal errors
+        rng = random.Random(seed_value * 1000 + n)
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            method, path, body = scenario.build_request(rng)
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            elapsed = time.perf_counter() - started
+            outcome = None
+            if scenario.after is not None:
+                try:
+                    outcome = await scenario.after(client, response)
+                except httpx.HTTPError:
+                    outcome = "error"
+            if started < warm_until:
+                continue
+            if outcome is not None:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            latencies.append(elapsed * 1000.0)
+            status_counts[status] = status_counts.get(status, 0) + 1
+            if status == 0 or status >= 500:
+                errors += 1
+
+    await asyncio.gather(*[worker(n) for n in range(concurrency)])
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(status_counts.items())},
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+    if outcomes:
+        result["outcomes"] = dict(sorted(outcomes.items()))
+    return result
+
+
+def start_server(port: int, uri: str, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, MONGODB_URI=uri, PORT=str(port))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--no-access-log"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Service at {base_url} did not become ready")
+
+
+async def run(args) -> dict:
+    await wait_ready(args.base_url)
+    scenarios = build_scenarios(args.restaurants)
+    if args.only:
+        scenarios = [s for s in scenarios if s.name in args.only]
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        for scenario in scenarios:
+            result = await run_scenario(client, scenario, args.concurrency, args.duration,
+                                        args.warmup, args.seed)
+            results[scenario.name] = result
+            print(f"{scenario.name:28s} {result['rps']:>9,.1f} req/s   p50 {result['p50_ms']:>8.2f} ms   "
+                  f"p95 {result['p95_ms']:>8.2f} ms   p99 {result['p99_ms']:>8.2f} ms   errors {result['errors']}"
+                  + (f"   {result['outcomes']}" if "outcomes" in result else ""))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "restaurants": args.restaurants,
+            "items": args.items,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Regressions beyond threshold (fraction): higher p50/p95/p99, lower
+    throughput, or new errors
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] > 0 and now[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {now[metric]:.2f}")
+        if base["rps"] > 0 and now["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {now['rps']:.1f}")
+        if now["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {now['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("BENCH_MONGODB_URI", DEFAULT_URI))
+    parser.add_argument("--seed-db", dest="seed_db", action="store_true", help="(re)seed the catalog first")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for catalog and request mix")
+    parser.add_argument("--restaurants", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--base-url", help="use an already running service instead of starting one")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per endpoint")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds discarded per endpoint")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed regression fraction")
+    args = parser.parse_args()
+
+    if args.seed_db:
+        catalog.seed(args.uri, args.restaurants, args.items, args.seed)
+
+    server = None
+    if not args.base_url:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.uri, args.workers)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✓ No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
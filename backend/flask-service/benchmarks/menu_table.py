@@ -0,0 +1,106 @@
+"""
+Menu table benchmark - memory per item and filter speed, dicts vs MenuTable
+Builds the synthetic catalog's menus the way the menu cache holds them
+(one entry per restaurant, items decoded fresh as from Motor) and reports
+retained bytes per item for lists of dicts and for MenuTables. Then times
+a veg + price range + tag filter sorted by price returning the first page
+(as /internal/menu/{id}/items does), as a Python loop over dicts and as
+MenuTable.select, on one restaurant's menu and on one large table.
+Run from backend/flask-service:  python -m benchmarks.menu_table
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import orjson
+
+from app.services.menu_table import MenuTable
+from benchmarks.seed import make_menu_item, restaurant_id
+
+
+def make_menus(rng: random.Random, restaurants: int, per_restaurant: int) -> dict:
+    now = datetime.now(timezone.utc)
+    menus = {}
+    for n in range(restaurants):
+        rid = restaurant_id(n)
+        items = [make_menu_item(rng, rid, m, now) for m in range(per_restaurant)]
+        for item in items:
+            del item["createdAt"], item["updatedAt"]
+        items.sort(key=lambda item: (item["category"], item["_id"]))
+        # Encoded, so each build decodes fresh objects like a Motor read
+        menus[rid] = orjson.dumps(items)
+    return menus
+
+
+def retained(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def python_filter(items, min_price, max_price, tag, limit):
+    matches = [item for item in items
+               if item.get("isVeg", True) and min_price <= item["price"] <= max_price and tag in item["tags"]]
+    matches.sort(key=lambda item: item["price"])
+    return matches[:limit], len(matches)
+
+
+def bench(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=100, help="items per restaurant")
+    parser.add_argument("--large", type=int, default=100_000, help="items in the single large table")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    menus = make_menus(random.Random(args.seed), args.restaurants, args.items)
+    total = args.restaurants * args.items
+
+    dicts, dict_bytes = retained(lambda: {rid: orjson.loads(blob) for rid, blob in menus.items()})
+    del dicts
+    tables, table_bytes = retained(lambda: {rid: MenuTable(orjson.loads(blob)) for rid, blob in menus.items()})
+
+    print(f"items:            {total:,} in {args.restaurants:,} menus")
+    print(f"list of dicts:    {dict_bytes / total:,.0f} B/item  ({dict_bytes / 1e6:,.1f} MB)")
+    print(f"MenuTable:        {table_bytes / total:,.0f} B/item  ({table_bytes / 1e6:,.1f} MB)")
+    print(f"saved:            {1 - table_bytes / dict_bytes:.0%}")
+
+    conditions = dict(is_veg=True, min_price=150, max_price=450, required_tags=["Popular"])
+    large_items = [item for blob in menus.values() for item in orjson.loads(blob)][:args.large]
+    cases = (
+        (f"one menu ({args.items})", orjson.loads(next(iter(menus.values())))),
+        (f"large ({len(large_items):,})", large_items),
+    )
+    limit = args.limit
+    print(f"\n{'filter':<18}{'dicts us':>10}{'table us':>10}{'mask us':>9}{'matches':>9}")
+    for name, items in cases:
+        table = MenuTable(items)
+        expected, expected_count = python_filter(items, 150, 450, "Popular", limit)
+        got, count = table.select(sort="price", limit=limit, **conditions)
+        assert got == expected and count == expected_count
+        iterations = max(5, 200_000 // len(items))
+        dict_us = bench(lambda: python_filter(items, 150, 450, "Popular", limit), iterations)
+        table_us = bench(lambda: table.select(sort="price", limit=limit, **conditions), iterations)
+        mask_us = bench(lambda: table.mask(**conditions), iterations)
+        print(f"{name:<18}{dict_us:>10,.1f}{table_us:>10,.1f}{mask_us:>9,.1f}{count:>9,}")
+
+
+if __name__ == "__main__":
+    main()
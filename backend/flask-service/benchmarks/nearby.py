@@ -0,0 +1,65 @@
+"""
+Nearby index benchmark - query latency for restaurants near a point
+Run from backend/flask-service:  python -m benchmarks.nearby
+Restaurants are spread over the synthetic catalog's metro bounding box;
+query points are drawn uniformly from the same box.
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from app.models.serializers import shape_restaurant
+from app.services.nearby_index import NearbyIndex
+from benchmarks.seed import LAT_MAX, LAT_MIN, LNG_MAX, LNG_MIN, make_restaurant
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--radius", type=float, default=10.0, help="query radius in km")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    index = NearbyIndex()
+
+    start = time.perf_counter()
+    for n in range(args.restaurants):
+        doc = make_restaurant(rng, n, now)
+        doc["isActive"] = True
+        index.upsert(shape_restaurant(doc))
+    build_seconds = time.perf_counter() - start
+    gc.collect()
+
+    points = [(rng.uniform(LAT_MIN, LAT_MAX), rng.uniform(LNG_MIN, LNG_MAX)) for _ in range(args.queries)]
+    latencies = []
+    returned = 0
+    for lat, lng in points:
+        t0 = time.perf_counter()
+        result = index.nearby(lat, lng, args.radius, args.limit)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+        returned += len(result)
+
+    stats = index.stats()
+    print(f"restaurants:    {stats['restaurants']:,} in {stats['cells']:,} cells")
+    print(f"build:          {build_seconds * 1e3:.0f} ms")
+    print(f"query latency:  p50 {percentile(latencies, 50):.2f} ms  "
+          f"p95 {percentile(latencies, 95):.2f} ms  "
+          f"p99 {percentile(latencies, 99):.2f} ms  "
+          f"mean {statistics.fmean(latencies):.2f} ms")
+    print(f"mean results:   {returned / len(points):.1f} of {args.limit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Partner registry benchmark - location upsert throughput and assignment latency
+Run from backend/flask-service:  python -m benchmarks.partner_registry
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.partner_registry import PartnerRegistry
+
+# Greater Chennai bounding box
+LAT_MIN, LAT_MAX = 12.85, 13.20
+LNG_MIN, LNG_MAX = 80.10, 80.32
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--partners", type=int, default=50_000)
+    parser.add_argument("--updates", type=int, default=500_000)
+    parser.add_argument("--assignments", type=int, default=20_000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    registry = PartnerRegistry()
+    positions = [
+        (rng.uniform(LAT_MIN, LAT_MAX), rng.uniform(LNG_MIN, LNG_MAX))
+        for _ in range(args.partners)
+    ]
+    ids = [f"DP{i}" for i in range(args.partners)]
+    for pid, (lat, lng) in zip(ids, positions):
+        registry.upsert_location(pid, lat, lng, available=True, name=pid)
+
+    # Location pings: each partner moves up to ~100 m per update
+    moves = [
+        (rng.randrange(args.partners), rng.uniform(-0.001, 0.001), rng.uniform(-0.001, 0.001))
+        for _ in range(args.updates)
+    ]
+    start = time.perf_counter()
+    for idx, dlat, dlng in moves:
+        lat, lng = positions[idx]
+        lat += dlat
+        lng += dlng
+        positions[idx] = (lat, lng)
+        registry.upsert_location(ids[idx], lat, lng)
+    update_seconds = time.perf_counter() - start
+
+    # Assignment: k-NN lookup + claim, released again so availability stays flat
+    pickups = [
+        (rng.uniform(LAT_MIN, LAT_MAX), rng.uniform(LNG_MIN, LNG_MAX))
+        for _ in range(args.assignments)
+    ]
+    latencies = []
+    misses = 0
+    for n, (lat, lng) in enumerate(pickups):
+        order_id = f"ORD{n}"
+        t0 = time.perf_counter()
+        claimed = None
+        for _, partner in registry.nearest(lat, lng, k=args.k):
+            if registry.claim(partner.id, order_id):
+                claimed = partner.id
+                break
+        latencies.append((time.perf_counter() - t0) * 1e6)
+        if claimed is None:
+            misses += 1
+        else:
+            registry.release(claimed, order_id)
+
+    print(f"partners:            {args.partners:,} ({registry.stats()['cells']:,} grid cells)")
+    print(f"location updates/s:  {args.updates / update_seconds:,.0f}")
+    print(f"assignment latency:  p50 {percentile(latencies, 50):.1f} us  "
+          f"p95 {percentile(latencies, 95):.1f} us  "
+          f"p99 {percentile(latencies, 99):.1f} us  "
+          f"mean {statistics.fmean(latencies):.1f} us")
+    print(f"assignments/s:       {args.assignments / (sum(latencies) / 1e6):,.0f}")
+    print(f"unassigned:          {misses}")
+
+
+if __name__ == "__main__":
+    main()
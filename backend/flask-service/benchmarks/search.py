@@ -0,0 +1,94 @@
+"""
+Search index benchmark - build time and query latency on a synthetic corpus
+Run from backend/flask-service:  python -m benchmarks.search
+Queries mix exact words, one-typo words, multi-word phrases and
+search-as-you-type prefixes drawn from the corpus vocabulary.
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from app.models.serializers import shape_restaurant
+from app.services.search_index import SearchIndex
+from benchmarks.seed import CUISINES, DISH_WORDS, NAME_WORDS, make_menu_item, make_restaurant, restaurant_id
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def typo(rng: random.Random, word: str) -> str:
+    i = rng.randrange(1, len(word))
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + rng.choice("aeiourst") + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def make_query(rng: random.Random) -> str:
+    word = rng.choice(rng.choice([DISH_WORDS, CUISINES, NAME_WORDS])).split()[0].lower()
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word
+    if kind == 1:
+        return typo(rng, word) if len(word) > 4 else word
+    if kind == 2:
+        return f"{rng.choice(DISH_WORDS)} {rng.choice(DISH_WORDS)}".lower()
+    return word[:rng.randint(2, max(2, len(word) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=490_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    for n in range(args.restaurants):
+        doc = make_restaurant(rng, n, now)
+        doc["isActive"] = True
+        index.upsert_restaurant(shape_restaurant(doc))
+    per_restaurant = max(1, args.items // max(1, args.restaurants))
+    for n in range(args.items):
+        item = make_menu_item(rng, restaurant_id(n // per_restaurant % args.restaurants), n % per_restaurant, now)
+        item["_id"] = f"bench-m{n:07d}"
+        index.upsert_dish(item)
+    index.prepare()
+    build_seconds = time.perf_counter() - start
+    gc.collect()
+
+    queries = [make_query(rng) for _ in range(args.queries)]
+    latencies = []
+    empty = 0
+    for query in queries:
+        t0 = time.perf_counter()
+        result = index.search(query, args.limit)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+        if not result["restaurants"] and not result["dishes"]:
+            empty += 1
+
+    stats = index.stats()
+    print(f"documents:      {stats['restaurants']:,} restaurants + {stats['dishes']:,} dishes, {stats['terms']:,} terms")
+    print(f"build:          {build_seconds:.1f} s")
+    print(f"query latency:  p50 {percentile(latencies, 50):.2f} ms  "
+          f"p95 {percentile(latencies, 95):.2f} ms  "
+          f"p99 {percentile(latencies, 99):.2f} ms  "
+          f"mean {statistics.fmean(latencies):.2f} ms")
+    print(f"empty results:  {empty}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
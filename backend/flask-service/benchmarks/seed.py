@@ -0,0 +1,142 @@
+"""
+Synthetic catalog - deterministic restaurants and menu items for benchmarks
+Run from backend/flask-service:
+    python -m benchmarks.seed --uri mongodb://localhost:27017/fooddelivery_bench
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+
+# Greater Chennai bounding box
+LAT_MIN, LAT_MAX = 12.85, 13.20
+LNG_MIN, LNG_MAX = 80.10, 80.32
+PINCODES = ["600001", "600004", "600017", "600020", "600028", "600040", "600041", "600042", "600090", "600096"]
+
+CUISINES = [
+    "North Indian", "South Indian", "Chinese", "Italian", "Pizza", "Biryani", "Desserts",
+    "Cafe", "Burgers", "Japanese", "Mexican", "Thai", "Healthy", "Street Food", "Bakery",
+]
+TAGS = ["Popular", "Fast Delivery", "Premium", "Vegetarian", "Trending", "Budget", "New", "Highly Rated"]
+CATEGORIES = ["Starters", "Main Course", "Breads", "Rice", "Desserts", "Beverages", "Combos", "Sides"]
+DISH_WORDS = [
+    "Paneer", "Chicken", "Mutton", "Veg", "Egg", "Prawn", "Masala", "Tikka", "Biryani", "Dosa",
+    "Idly", "Vada", "Noodles", "Fried Rice", "Pizza", "Burger", "Wrap", "Roll", "Curry", "Kebab",
+    "Butter", "Garlic", "Chilli", "Schezwan", "Tandoori", "Hyderabadi", "Malabar", "Chettinad",
+]
+NAME_WORDS = ["Spice", "Garden", "Kitchen", "Bhavan", "Palace", "House", "Corner", "Express", "Grill", "Cafe", "Diner", "Hub"]
+
+
+def restaurant_id(n: int) -> str:
+    return f"bench-r{n:05d}"
+
+
+def make_restaurant(rng: random.Random, n: int, updated_at: datetime) -> dict:
+    return {
+        "_id": restaurant_id(n),
+        "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {n}",
+        "description": f"{' and '.join(rng.sample(CUISINES, 2))} food, freshly made",
+        "cuisine": rng.sample(CUISINES, rng.randint(1, 3)),
+        "rating": round(rng.uniform(2.5, 5.0), 1),
+        "totalRatings": rng.randint(0, 5000),
+        "eta": rng.randint(15, 50),
+        "prepTime": rng.randint(8, 25),
+        "deliveryRadius": rng.choice([4.0, 5.0, 6.0, 8.0]),
+        "address": {
+            "line1": f"{rng.randint(1, 200)} Main Road",
+            "city": "Chennai",
+            "state": "Tamil Nadu",
+            "pincode": rng.choice(PINCODES),
+            "coordinates": {"lat": rng.uniform(LAT_MIN, LAT_MAX), "lng": rng.uniform(LNG_MIN, LNG_MAX)},
+        },
+        "contact": {"phone": f"+91 98{rng.randint(10000000, 99999999)}", "email": f"r{n}@example.com"},
+        "isActive": rng.random() > 0.03,
+        "image": f"https://images.example.com/restaurants/{n}.jpg",
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        "priceRange": rng.choice(["$", "$$", "$$$"]),
+        "createdAt": updated_at,
+        "updatedAt": updated_at,
+    }
+
+
+def make_menu_item(rng: random.Random, restaurant: str, n: int, updated_at: datetime) -> dict:
+    return {
+        "_id": f"{restaurant}-m{n:03d}",
+        "restaurantId": restaurant,
+        "name": f"{rng.choice(DISH_WORDS)} {rng.choice(DISH_WORDS)}",
+        "description": "House special, serves one",
+        "category": rng.choice(CATEGORIES),
+        "price": float(rng.randrange(49, 799, 10)),
+        "image": None,
+        "isVeg": rng.random() < 0.55,
+        "isAvailable": rng.random() > 0.08,
+        "tags": rng.sample(TAGS, rng.randint(0, 2)),
+        "createdAt": updated_at,
+        "updatedAt": updated_at,
+    }
+
+
+def seed(uri: str, restaurants: int, items: int, seed_value: int = 42, chunk: int = 10_000):
+    """
+    Drop and recreate the restaurants / menuItems collections with a
+    deterministic synthetic catalog
+    """
+    rng = random.Random(seed_value)
+    client = MongoClient(uri)
+    db = client.get_default_database()
+    db.restaurants.drop()
+    db.menuItems.drop()
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    started = time.perf_counter()
+
+    batch = []
+    for n in range(restaurants):
+        batch.append(make_restaurant(rng, n, base + timedelta(seconds=n)))
+        if len(batch) >= chunk:
+            db.restaurants.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.restaurants.insert_many(batch, ordered=False)
+
+    per_restaurant = max(1, items // max(1, restaurants))
+    batch = []
+    written = 0
+    for n in range(restaurants):
+        rid = restaurant_id(n)
+        for m in range(per_restaurant):
+            batch.append(make_menu_item(rng, rid, m, base))
+            if len(batch) >= chunk:
+                db.menuItems.insert_many(batch, ordered=False)
+                written += len(batch)
+                batch = []
+    if batch:
+        db.menuItems.insert_many(batch, ordered=False)
+        written += len(batch)
+
+    # Same indexes the Node models declare
+    db.restaurants.create_index([("rating", -1)])
+    db.restaurants.create_index([("cuisine", 1)])
+    db.restaurants.create_index([("isActive", 1)])
+    db.menuItems.create_index([("restaurantId", 1), ("category", 1)])
+    db.menuItems.create_index([("restaurantId", 1), ("isAvailable", 1)])
+
+    print(f"✓ Seeded {restaurants:,} restaurants and {written:,} menu items "
+          f"into {db.name} in {time.perf_counter() - started:.1f}s")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uri", default="mongodb://localhost:27017/fooddelivery_bench")
+    parser.add_argument("--restaurants", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    seed(args.uri, args.restaurants, args.items, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Serialization benchmark - cost per 50-restaurant page, before vs after
+Before: response_model=List[Restaurant] validation + jsonable_encoder + json
+After:  pre-shaped dicts rendered by FastJSONResponse (orjson)
+Run from backend/flask-service:  python -m benchmarks.serialization
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.schemas import Restaurant
+from app.models.serializers import shape_restaurant
+from app.routes.responses import FastJSONResponse
+
+CUISINES = ["North Indian", "South Indian", "Chinese", "Italian", "Pizza", "Biryani", "Desserts", "Cafe"]
+TAGS = ["Popular", "Fast Delivery", "Premium", "Vegetarian", "Trending", "Budget"]
+
+
+def make_restaurant(rng: random.Random, n: int) -> dict:
+    return {
+        "_id": f"{n:024x}",
+        "name": f"Restaurant {n}",
+        "description": "Freshly cooked meals with locally sourced ingredients " * 2,
+        "cuisine": rng.sample(CUISINES, 2),
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "totalRatings": rng.randint(10, 5000),
+        "eta": rng.randint(15, 50),
+        "address": {
+            "line1": f"{n} Main Road", "line2": "T. Nagar", "city": "Chennai",
+            "state": "Tamil Nadu", "pincode": "600017",
+            "coordinates": {"lat": 13.04 + rng.random() / 10, "lng": 80.23 + rng.random() / 10},
+        },
+        "contact": {"phone": "+91 9876543210", "email": f"r{n}@example.com"},
+        "isActive": True,
+        "image": f"https://images.example.com/restaurants/{n}.jpg",
+        "tags": rng.sample(TAGS, 2),
+        "priceRange": "$$",
+    }
+
+
+def bench(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    docs = [make_restaurant(rng, n) for n in range(args.page)]
+    shaped = [shape_restaurant(d) for d in docs]
+    field = create_response_field(name="Response", type_=List[Restaurant], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def before():
+        content = loop.run_until_complete(serialize_response(field=field, response_content=docs))
+        return JSONResponse(content).body
+
+    def after():
+        return FastJSONResponse(shaped).body
+
+    assert len(before()) and len(after())
+    before_us = bench(before, args.iterations)
+    after_us = bench(after, args.iterations)
+    shape_us = bench(lambda: [shape_restaurant(d) for d in docs], args.iterations)
+
+    print(f"page size:                     {args.page} restaurants, {len(after()):,} bytes")
+    print(f"before (pydantic + json):      {before_us:,.1f} us/page")
+    print(f"after (pre-shaped + orjson):   {after_us:,.1f} us/page  ({before_us / after_us:.1f}x faster)")
+    print(f"one-off shaping at cache load: {shape_us:,.1f} us/page")
+
+
+if __name__ == "__main__":
+    main()
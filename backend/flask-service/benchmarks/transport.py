@@ -0,0 +1,96 @@
+"""
+Transport benchmark - JSON vs MessagePack for the gateway's largest payloads
+Reports bytes on the wire (raw and gzip) and CPU per request: the service
+rendering the response (FastJSONResponse, as negotiated) and the client
+decoding it; for request bodies, the client encoding and the service's
+MessagePack -> JSON conversion. Client-side costs use the Python codecs,
+as a proxy for the gateway's.
+Run from backend/flask-service:  python -m benchmarks.transport
+"""
+import argparse
+import gzip
+import random
+import time
+from datetime import datetime, timezone
+
+import msgpack
+import orjson
+
+from app.models.serializers import shape_restaurant
+from app.routes.responses import FastJSONResponse, dumps, packb, wants_msgpack
+from benchmarks.seed import make_menu_item, make_restaurant, restaurant_id
+
+
+def bench(fn, iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def render(content, packed: bool) -> bytes:
+    token = wants_msgpack.set(packed)
+    try:
+        return FastJSONResponse(content).body
+    finally:
+        wants_msgpack.reset(token)
+
+
+def make_payloads(rng: random.Random) -> dict:
+    now = datetime.now(timezone.utc)
+    restaurants = []
+    for n in range(50):
+        doc = make_restaurant(rng, n, now)
+        doc["isActive"] = True
+        restaurants.append(shape_restaurant(doc))
+    menu = {
+        "restaurantId": restaurant_id(0),
+        "items": [make_menu_item(rng, restaurant_id(0), n, now) for n in range(100)],
+        "nextCursor": None,
+    }
+    for item in menu["items"]:
+        del item["createdAt"], item["updatedAt"]
+    eta_batch = {
+        "deliveryAddress": {"line1": "1 Test Street", "city": "Chennai", "pincode": "600017",
+                            "coordinates": {"lat": 13.04, "lng": 80.23}},
+        "pairs": [{"restaurantId": restaurant_id(rng.randrange(10_000))} for _ in range(200)],
+    }
+    return {"restaurants page (50)": restaurants, "menu (100 items)": menu, "eta batch body (200)": eta_batch}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    payloads = make_payloads(random.Random(args.seed))
+    print(f"{'payload':<24}{'format':<10}{'bytes':>9}{'gzip':>9}{'service us':>12}{'client us':>11}")
+    for name, content in payloads.items():
+        json_body = render(content, False)
+        packed_body = render(content, True)
+        assert msgpack.unpackb(packed_body) == orjson.loads(json_body)
+
+        if name.startswith("eta"):
+            # Request body: client encodes, the service turns MessagePack into JSON
+            rows = [
+                ("json", json_body, 0.0, bench(lambda: dumps(content), args.iterations)),
+                ("msgpack", packed_body,
+                 bench(lambda: dumps(msgpack.unpackb(packed_body, strict_map_key=False)), args.iterations),
+                 bench(lambda: packb(content), args.iterations)),
+            ]
+        else:
+            rows = [
+                ("json", json_body, bench(lambda: render(content, False), args.iterations),
+                 bench(lambda: orjson.loads(json_body), args.iterations)),
+                ("msgpack", packed_body, bench(lambda: render(content, True), args.iterations),
+                 bench(lambda: msgpack.unpackb(packed_body), args.iterations)),
+            ]
+        for fmt, body, service_us, client_us in rows:
+            print(f"{name:<24}{fmt:<10}{len(body):>9,}{len(gzip.compress(body)):>9,}"
+                  f"{service_us:>12,.1f}{client_us:>11,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration - production process manager for the FastAPI service
+Usage: gunicorn -c gunicorn.conf.py main:app
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Every worker must build its own Motor client and in-memory indexes after
+# fork, in the app startup event - never preload the app in the master
+preload_app = False
+
+# Startup connects to Mongo, warms the pool and loads the catalog index
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
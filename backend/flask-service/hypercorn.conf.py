@@ -0,0 +1,23 @@
+"""
+Hypercorn configuration - serves HTTP/1.1 and cleartext HTTP/2 (h2c) on one port
+Usage: hypercorn -c file:hypercorn.conf.py main:app
+HTTP/2 clients connect with prior knowledge or an h2c upgrade and multiplex
+many requests over a few long-lived connections; HTTP/1.1 clients are
+served as before.
+"""
+import multiprocessing
+import os
+
+bind = [f"0.0.0.0:{os.getenv('PORT', '5000')}"]
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Streams one gateway connection may have in flight at once
+h2_max_concurrent_streams = int(os.getenv("H2_MAX_CONCURRENT_STREAMS", "256"))
+
+# Gateway connections stay open between bursts
+keep_alive_timeout = float(os.getenv("KEEPALIVE_TIMEOUT", "75"))
+graceful_timeout = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").upper()
@@ -0,0 +1,63 @@
+"""
+Bulk ingest CLI - Streams a CSV / JSONL file of restaurants or menu items into MongoDB
+Same pipeline as POST /internal/ingest/{kind}; running workers pick the
+changes up from their change feeds.
+Usage (from backend/flask-service):
+    python ingest.py menu items.csv
+    python ingest.py restaurants chain.jsonl --report report.json
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import orjson
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.services.ingest import (INGEST_BATCH_SIZE, INGEST_MAX_IN_FLIGHT, KINDS, FORMATS,
+                                 guess_format, ingest, iter_file, parse)
+
+
+async def run(args) -> int:
+    client = AsyncIOMotorClient(args.uri)
+    try:
+        db = client.get_default_database()
+        rows = parse(args.format or guess_format(args.path), iter_file(args.path))
+        report = await ingest(db, args.kind, rows, batch_size=args.batch_size, max_in_flight=args.in_flight)
+    finally:
+        client.close()
+
+    summary = report.to_dict()
+    print(f"✓ {summary['rows']:,} rows in {summary['seconds']:.1f}s: "
+          f"{summary['upserted']:,} inserted, {summary['modified']:,} updated, {summary['failed']:,} failed")
+    for error in summary["errors"][:args.show_errors]:
+        print(f"❌ row {error['row']}: {error['error']}")
+    if summary["failed"] > args.show_errors:
+        print(f"⚠️  {summary['failed'] - args.show_errors:,} more errors" +
+              (f" in {args.report}" if args.report else " (use --report to save them)"))
+    if args.report:
+        with open(args.report, "wb") as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+    return 1 if summary["failed"] else 0
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=list(KINDS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults from the file extension")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI"))
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--in-flight", type=int, default=INGEST_MAX_IN_FLIGHT)
+    parser.add_argument("--show-errors", type=int, default=20)
+    parser.add_argument("--report", help="write the full report as JSON")
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("MONGODB_URI not set (or pass --uri)")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,38 @@ Exposed ONLY to Node.js backend
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+import multiprocessing
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.config.database import connect_db, close_db, get_database
+from app.config.indexes import ENSURE_INDEXES, ensure_indexes
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.content_negotiation import ContentNegotiationMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import SlowRequestMiddleware
+from app.routes import restaurants, menu, delivery, debug, search, ingest
+from app.routes.responses import FastJSONResponse
+from app.services.admission import ADMISSION_CONTROL
+from app.services.catalog_index import catalog_index
+from app.services.circuit_breaker import db_breaker
+from app.services.delivery_status import delivery_status
+from app.services.menu_feed import menu_feed
+from app.services.nearby_index import nearby_index
+from app.services import metrics
+from app.services.last_known_good import last_known_good
+from app.services.profiler import loop_monitor
+from app.services.search_index import search_index
+from app.services.tracking_hub import tracking_hub
+
 app = FastAPI(
     title="Food Delivery Internal Service",
     description="Python FastAPI backend for restaurant and delivery management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS - only allow Node.js backend
@@ -26,14 +48,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Startup event
+# MessagePack request/response bodies for clients that ask for them
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Slow request capture (stack samples for requests over SLOW_REQUEST_MS)
+app.add_middleware(SlowRequestMiddleware)
+
+# Per-class concurrency limits; sheds browsing before checkout under load
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware)
+
+# Per-route request metrics (outermost, so CORS and error handling are timed too)
+app.add_middleware(MetricsMiddleware)
+
+# Internal routes
+app.include_router(restaurants.router, prefix="/internal/restaurants", tags=["restaurants"])
+app.include_router(menu.router, prefix="/internal/menu", tags=["menu"])
+app.include_router(delivery.router, prefix="/internal", tags=["delivery"])
+app.include_router(search.router, prefix="/internal/search", tags=["search"])
+app.include_router(ingest.router, prefix="/internal/ingest", tags=["ingest"])
+app.include_router(debug.router, prefix="/internal/debug", tags=["debug"], include_in_schema=False)
+
+ready = False
+
+# Startup event - runs once per worker process
 @app.on_event("startup")
 async def startup_event():
-    print("✓ Python FastAPI service started")
+    global ready
+    await loop_monitor.start()
+    await tracking_hub.start()
+    await connect_db()
+    db = get_database()
+    if db is not None:
+        last_known_good.load()
+        if ENSURE_INDEXES and db_breaker.closed:
+            await ensure_indexes(db)
+        try:
+            await catalog_index.start(db)
+        except Exception as e:
+            print(f"❌ Catalog index load failed: {e}")
+        nearby_index.start(catalog_index)
+        last_known_good.start(catalog_index)
+        # Builds in the background; /internal/search answers 503 until loaded
+        search_index.start(db, catalog_index)
+        menu_feed.start(db)
+        delivery_status.start(db)
+    ready = True
+    print(f"✓ Python FastAPI service started (pid {os.getpid()})")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
+    global ready
+    ready = False
+    await last_known_good.stop()
+    await menu_feed.stop()
+    await search_index.stop()
+    await catalog_index.stop()
+    await delivery_status.stop()
+    await tracking_hub.stop()
+    await close_db()
+    await loop_monitor.stop()
     print("✓ Python FastAPI service stopped")
 
 # Health check
@@ -42,9 +117,22 @@ async def health_check():
     return JSONResponse({
         "status": "ok",
         "service": "python-fastapi-service",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "mongo": "connected" if get_database() is not None and db_breaker.closed else "disconnected"
     })
 
+# Readiness - true once the DB pool is warm and the catalog is loaded
+@app.get("/readyz")
+async def readiness_check():
+    if not ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready", "catalog": len(catalog_index), "database": db_breaker.state})
+
+# Prometheus scrape endpoint (this worker's counters)
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -54,96 +142,6 @@ async def root():
         "docs": "/docs"
     }
 
-# Restaurant routes
-@app.get("/internal/restaurants")
-async def get_restaurants(cuisine: str = None, rating: float = None, search: str = None):
-    """Get list of restaurants with optional filters"""
-    return {
-        "restaurants": [
-            {
-                "id": "res-1",
-                "name": "Spice Garden",
-                "cuisine": ["North Indian", "Chinese"],
-                "rating": 4.3,
-                "eta": 30
-            },
-            {
-                "id": "res-4",
-                "name": "Saravana Bhavan",
-                "cuisine": ["South Indian"],
-                "rating": 4.6,
-                "eta": 25
-            }
-        ]
-    }
-
-@app.get("/internal/restaurants/{restaurant_id}")
-async def get_restaurant(restaurant_id: str):
-    """Get restaurant details by ID"""
-    restaurants = {
-        "res-1": {
-            "id": "res-1",
-            "name": "Spice Garden",
-            "cuisine": ["North Indian", "Chinese"],
-            "rating": 4.3,
-            "eta": 30
-        },
-        "res-4": {
-            "id": "res-4",
-            "name": "Saravana Bhavan",
-            "cuisine": ["South Indian"],
-            "rating": 4.6,
-            "eta": 25
-        }
-    }
-    return restaurants.get(restaurant_id, {"error": "Restaurant not found"})
-
-# Menu routes
-@app.get("/internal/menu/{restaurant_id}")
-async def get_menu(restaurant_id: str):
-    """Get menu for a restaurant"""
-    menus = {
-        "res-1": {
-            "restaurantId": "res-1",
-            "items": [
-                {"id": "m1", "name": "Butter Chicken", "price": 299, "isVeg": False, "category": "Curries"},
-                {"id": "m2", "name": "Paneer Tikka", "price": 199, "isVeg": True, "category": "Curries"}
-            ]
-        },
-        "res-4": {
-            "restaurantId": "res-4",
-            "items": [
-                {"id": "m7", "name": "Masala Dosa", "price": 149, "isVeg": True, "category": "Dosa"},
-                {"id": "m8", "name": "Idly Sambar", "price": 89, "isVeg": True, "category": "Idly"}
-            ]
-        }
-    }
-    return menus.get(restaurant_id, {"restaurantId": restaurant_id, "items": []})
-
-# Delivery routes
-@app.post("/internal/eta")
-async def calculate_eta(request: dict):
-    """Calculate estimated delivery time"""
-    return {"eta": 30, "unit": "minutes"}
-
-@app.post("/internal/delivery/assign")
-async def assign_delivery(assignment: dict):
-    """Assign delivery for an order"""
-    return {
-        "success": True,
-        "orderId": assignment.get("orderId"),
-        "status": "ASSIGNED"
-    }
-
-@app.patch("/internal/delivery/{order_id}")
-async def update_delivery_status(order_id: str, request: dict):
-    """Update delivery status"""
-    return {
-        "success": True,
-        "orderId": order_id,
-        "status": request.get("status", "UNKNOWN")
-    }
-
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 5000))
@@ -152,6 +150,5 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=port,
         reload=False,
-        workers=1
+        workers=int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
     )
-
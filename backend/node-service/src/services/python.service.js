@@ -18,7 +18,13 @@ axiosRetry(pythonClient, {
   retries: 3,
   retryDelay: axiosRetry.exponentialDelay,
   retryCondition: (error) => {
-    // Retry on network errors or 5xx server errors
+    // A 503 is load shedding (admission control or an open database
+    // circuit): retry it at most once, after its Retry-After, which
+    // exponentialDelay waits for, rather than adding to the overload
+    if (error.response && error.response.status === 503) {
+      return (error.config?.['axios-retry']?.retryCount || 0) === 0
+    }
+    // Retry on network errors or other 5xx server errors
     return axiosRetry.isNetworkOrIdempotentRequestError(error) ||
            (error.response && error.response.status >= 500)
   },
@@ -50,6 +56,17 @@ class PythonBackendService {
     }
   }
 
+  // Restaurants delivering to a point, ranked by rating and live ETA
+  async getNearbyRestaurants(lat, lng, radius, limit = 20) {
+    try {
+      const { data } = await pythonClient.get('/internal/restaurants/nearby', { params: { lat, lng, radius, limit } })
+      return data
+    } catch (error) {
+      console.error('Get nearby restaurants failed:', error.message)
+      throw this.handleError(error)
+    }
+  }
+
   // Get restaurant by ID
   async getRestaurant(restaurantId) {
     try {
@@ -61,6 +78,29 @@ class PythonBackendService {
     }
   }
 
+  // Get many restaurants in one round-trip; `failed` lists ids that could
+  // not be looked up (retry them), `missing` those that do not exist
+  async getRestaurantsBatch(restaurantIds) {
+    try {
+      const { data } = await pythonClient.post('/internal/restaurants/batch', { ids: restaurantIds })
+      return data
+    } catch (error) {
+      console.error('Get restaurants batch failed:', error.message)
+      throw this.handleError(error)
+    }
+  }
+
+  // Typo-tolerant search over restaurants and dishes
+  async search(query, limit = 10) {
+    try {
+      const { data } = await pythonClient.get('/internal/search', { params: { q: query, limit } })
+      return data
+    } catch (error) {
+      console.error('Search failed:', error.message)
+      throw this.handleError(error)
+    }
+  }
+
   // Get menu for restaurant
   async getMenu(restaurantId) {
     try {
@@ -72,6 +112,41 @@ class PythonBackendService {
     }
   }
 
+  // Get menu items changed or removed since a menu version
+  async getMenuChanges(restaurantId, since) {
+    try {
+      const { data } = await pythonClient.get(`/internal/menu/${restaurantId}/changes`, { params: { since } })
+      return data
+    } catch (error) {
+      console.error(`Get menu changes for ${restaurantId} failed:`, error.message)
+      throw this.handleError(error)
+    }
+  }
+
+  // Get menu items filtered by isVeg, isAvailable, minPrice, maxPrice,
+  // category and tags (comma-separated), optionally sorted by price
+  async filterMenu(restaurantId, filters = {}) {
+    try {
+      const { data } = await pythonClient.get(`/internal/menu/${restaurantId}/items`, { params: filters })
+      return data
+    } catch (error) {
+      console.error(`Filter menu for ${restaurantId} failed:`, error.message)
+      throw this.handleError(error)
+    }
+  }
+
+  // Get menus for many restaurants in one round-trip; `failed` lists ids
+  // whose menus could not be loaded (retry them), `missing` those with none
+  async getMenusBatch(restaurantIds) {
+    try {
+      const { data } = await pythonClient.post('/internal/menu/batch', { ids: restaurantIds })
+      return data
+    } catch (error) {
+      console.error('Get menus batch failed:', error.message)
+      throw this.handleError(error)
+    }
+  }
+
   // Calculate delivery ETA
   async calculateETA(restaurantId, deliveryAddress) {
     try {
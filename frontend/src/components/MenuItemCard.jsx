@@ -4,7 +4,7 @@ import { useCartStore } from '../store/cart.js'
 export default function MenuItemCard({ item, restaurant }) {
   const add = useCartStore(s=>s.add)
   const dec = useCartStore(s=>s.decrement)
-  const qty = useCartStore(s=> s.items.find(it=> it.id===item.id)?.qty || 0)
+  const qty = useCartStore(s=> s.items.find(it=> it.id===item._id)?.qty || 0)
 
   return (
     <div className="p-4 border border-neutral-200 dark:border-neutral-800 rounded-xl flex gap-4 hover:shadow-md transition bg-white dark:bg-neutral-900">
@@ -25,7 +25,7 @@ export default function MenuItemCard({ item, restaurant }) {
         <div className="flex items-center justify-between">
           <span className="font-bold text-primary-600 text-lg">₹{item.price}</span>
           <div className="flex items-center gap-2">
-            {qty>0 && <button onClick={()=>dec(item.id)} className="p-1.5 rounded-lg border border-neutral-300 dark:border-neutral-700 hover:bg-neutral-50 dark:hover:bg-neutral-800"><Minus className="w-4 h-4"/></button>}
+            {qty>0 && <button onClick={()=>dec(item._id)} className="p-1.5 rounded-lg border border-neutral-300 dark:border-neutral-700 hover:bg-neutral-50 dark:hover:bg-neutral-800"><Minus className="w-4 h-4"/></button>}
             {qty>0 && <span className="w-6 text-center font-semibold">{qty}</span>}
             <button onClick={()=>add(item, restaurant)} className="px-3 py-1.5 rounded-lg bg-primary-600 text-white hover:bg-primary-700 transition flex items-center gap-1 font-semibold"><Plus className="w-4 h-4"/> Add</button>
           </div>
@@ -3,7 +3,7 @@ import { Star, Clock, Zap } from 'lucide-react'
 
 export default function RestaurantCard({ r }) {
   return (
-    <Link to={`/restaurant/${r.id}`} className="card-hover group bg-white dark:bg-neutral-900 rounded-xl overflow-hidden border border-neutral-200 dark:border-neutral-800">
+    <Link to={`/restaurant/${r._id}`} className="card-hover group bg-white dark:bg-neutral-900 rounded-xl overflow-hidden border border-neutral-200 dark:border-neutral-800">
       <div className="relative aspect-[16/9] bg-neutral-200 dark:bg-neutral-800 overflow-hidden">
         {r.image ? (
           <img src={r.image} alt={r.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"/>
@@ -77,7 +77,7 @@ export default function Home() {
         </div>
       ) : (
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6">
-          {filtered.map(r=> <RestaurantCard key={r.id} r={r}/>) }
+          {filtered.map(r=> <RestaurantCard key={r._id} r={r}/>) }
         </div>
       )}
     </div>
@@ -80,7 +80,7 @@ export default function Restaurant() {
       <div>
         <h2 className="text-2xl font-bold mb-4 text-neutral-900 dark:text-neutral-100">Menu</h2>
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-4">
-          {restaurant.menu.map(item=> <MenuItemCard key={item.id} item={item} restaurant={restaurant}/>) }
+          {restaurant.menu.map(item=> <MenuItemCard key={item._id} item={item} restaurant={restaurant}/>) }
         </div>
       </div>
     </div>
@@ -2,27 +2,27 @@ import { create } from 'zustand'
 import { persist } from 'zustand/middleware'
 
 export const useCartStore = create(persist((set, get) => ({
-  items: [], // {id, name, price, qty, restaurantId, restaurantName}
+  items: [], // {id, name, price, qty, restaurantId, restaurantName}; ids are the API's _id
   restaurantId: null,
   totalItems: 0,
   subtotal: 0,
   coupon: null,
 
   add: (item, restaurant) => set((state)=>{
-    if (state.restaurantId && state.restaurantId !== restaurant.id) {
+    if (state.restaurantId && state.restaurantId !== restaurant._id) {
       // reset cart if adding from different restaurant
       state = { ...state, items: [], restaurantId: null, subtotal: 0, totalItems: 0, coupon: null }
     }
-    const existing = state.items.find(i=> i.id === item.id)
+    const existing = state.items.find(i=> i.id === item._id)
     let items
     if (existing) {
-      items = state.items.map(i=> i.id===item.id? {...i, qty: i.qty+1}: i)
+      items = state.items.map(i=> i.id===item._id? {...i, qty: i.qty+1}: i)
     } else {
-      items = [...state.items, { id: item.id, name: item.name, price: item.price, qty: 1, restaurantId: restaurant.id, restaurantName: restaurant.name }]
+      items = [...state.items, { id: item._id, name: item.name, price: item.price, qty: 1, restaurantId: restaurant._id, restaurantName: restaurant.name }]
     }
     const subtotal = items.reduce((s,i)=> s + i.price * i.qty, 0)
     const totalItems = items.reduce((s,i)=> s + i.qty, 0)
-    return { items, restaurantId: restaurant.id, subtotal, totalItems }
+    return { items, restaurantId: restaurant._id, subtotal, totalItems }
   }),
 
   decrement: (id) => set((state)=>{
@@ -28,7 +28,7 @@ Write-Host ""
 # Start Flask Service
 Write-Host "[1/3] Starting Flask Service (Port 5000)..." -ForegroundColor Green
 Push-Location "$PSScriptRoot\backend\flask-service"
-$flaskProcess = Start-Process python -ArgumentList "app.py" -PassThru -WindowStyle Hidden
+$flaskProcess = Start-Process python -ArgumentList "main.py" -PassThru -WindowStyle Hidden
 $env:FLASK_PID = $flaskProcess.Id
 Pop-Location
 Start-Sleep -Seconds 2